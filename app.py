@@ -5,19 +5,38 @@ import os
 import json
 import zipfile
 from pathlib import Path
-from automation import download_excel_report
+from automation import (
+    capture_portal_screenshot, download_excel_report, extract_report_data, report_filename, default_user_data_dir,
+    DEFAULT_TAB_LABEL, DEFAULT_FILE_PREFIX
+)
+from wait_conditions import PhaseTimer
+from browser_pool import BrowserPool
+from session_manager import PortalSessionManager
+from export_fetcher import ExportAuthExpired, clear_export_request, fetch_export, load_export_request
+from download_manager import create_run_download_dir, finalize_workbook, remove_run_download_dir
+from report_registry import ReportRegistry
+from report_runner import ReportRunner
+import run_records
+from run_records import RunRecord, RunStore, span_stats
+from selector_resolver import get_selector_cache
+from portal_errors import classify_failure, retry_delay_minutes
+from retry_engine import RetryChainStore
+from chrome_watchdog import get_watchdog
+from office_server import get_office_server
+from conversion_executor import get_conversion_executor
+from conversion_cache import ConversionCache, cache_key, workbook_hash
+from change_probe import ChangeProbe, workbook_fingerprint
+from profile_manager import cleanup_run_profiles, get_profile_manager, profile_managers
+from report_extractor import STRUCTURED_DATA_DIR, latest_structured_report
 from system_settings import SystemSettings
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.styles import Border, Side
-import subprocess
+import shutil
 try:
-    from PyPDF2 import PdfReader, PdfWriter
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter, landscape
-    from reportlab.lib.colors import gray
-    from reportlab.lib.units import inch
+    from pdf_watermark import stamp_watermark, overlay_cache_info
     PDF_LIBRARIES_AVAILABLE = True
 except ImportError:
     PDF_LIBRARIES_AVAILABLE = False
@@ -28,12 +47,29 @@ app = Flask(__name__)
 # Initialize system settings
 settings = SystemSettings()
 
+# Reports exported each cycle (reports.json)
+report_registry = ReportRegistry()
+
 # Base URL for publicly accessible resources
 DEFAULT_BASE_DOWNLOAD_URL = "https://empties.provar.io/portoptimizer"
 BASE_DOWNLOAD_URL = os.environ.get("PORTOPTIMIZER_BASE_URL") or DEFAULT_BASE_DOWNLOAD_URL
 BASE_DOWNLOAD_URL = BASE_DOWNLOAD_URL.rstrip("/")
 
 
+def report_file_prefix():
+    """
+    File prefix for date lookups: the registry report named by the optional
+    ?report=<id> query parameter, or the default POLA_Empty_Returns_ prefix
+    """
+    report_id = request.args.get('report')
+    if not report_id:
+        return DEFAULT_FILE_PREFIX
+    report = report_registry.get_report(report_id)
+    if not report:
+        raise KeyError(report_id)
+    return report["file_prefix"]
+
+
 def build_download_url(filename):
     """
     Construct the public download URL for a given filename.
@@ -75,6 +111,7 @@ def add_separator_lines_to_excel(excel_path, output_path):
         print(f"[{datetime.now()}] Error adding separator lines: {str(e)}")
         return False
 
+@run_records.traced("watermark")
 def add_watermark_to_pdf(pdf_path, watermark_text=None, watermark_data=None, use_pdf_name=False):
     """
     Add watermark to PDF file
@@ -116,160 +153,113 @@ def add_watermark_to_pdf(pdf_path, watermark_text=None, watermark_data=None, use
         
         watermark_text_final = "\n".join(watermark_lines)
         
-        # Read the original PDF
-        reader = PdfReader(pdf_path)
-        writer = PdfWriter()
-        
-        # Get page dimensions (Legal landscape: 14 x 8.5 inches)
-        # Legal size: 14" x 8.5" (landscape)
-        page_width = 14 * inch
-        page_height = 8.5 * inch
-        
-        # Create watermark overlay with Legal landscape dimensions
-        watermark_path = pdf_path.replace('.pdf', '_watermark_temp.pdf')
-        c = canvas.Canvas(watermark_path, pagesize=(page_width, page_height))
-        
-        # Set watermark properties (light gray, semi-transparent, horizontal)
-        # Increase font size by 80%: 24 * 1.8 = 43.2, round to 43
-        font_size = int(24 * 1.8)  # 43
-        c.setFillColor(gray, alpha=0.3)  # 30% opacity
-        c.setFont("Helvetica-Bold", font_size)
-        
-        # Position at top of page, 2 pixels from top (horizontal, not rotated)
-        # PDF coordinates: origin (0,0) is at bottom-left, top is at page_height
-        # 2 pixels = 2 points (ReportLab uses points as units)
-        top_offset = 2  # 2 pixels from top
-        
-        # Split text into lines for multiline support
-        watermark_lines_list = watermark_text_final.split('\n')
-        line_height = font_size * 1.2  # Line spacing (120% of font size)
-        
-        # Draw each line of watermark text (horizontal, top-aligned)
-        # Position: 2 pixels from top, centered horizontally
-        for i, line in enumerate(watermark_lines_list):
-            if line.strip():  # Only draw non-empty lines
-                text_width = c.stringWidth(line, "Helvetica-Bold", font_size)
-                # X position: centered horizontally
-                x_pos = (page_width - text_width) / 2
-                # Y position: top of page minus 2 pixels, then down for each line
-                # drawString uses baseline, so subtract font_size to position top of text at offset
-                y_pos = page_height - top_offset - font_size - (i * line_height)
-                c.drawString(x_pos, y_pos, line)
-        
-        c.save()
-        
-        # Read watermark PDF
-        watermark_reader = PdfReader(watermark_path)
-        watermark_page = watermark_reader.pages[0]
-        
-        # Overlay watermark on all pages
-        for page in reader.pages:
-            # Merge watermark with page
-            page.merge_page(watermark_page)
-            writer.add_page(page)
-        
-        # Write watermarked PDF
-        with open(pdf_path, 'wb') as output_file:
-            writer.write(output_file)
-        
-        # Clean up temporary watermark file
-        if os.path.exists(watermark_path):
-            os.remove(watermark_path)
+        # Overlay from the in-memory cache, fitted to each page's mediabox, written atomically
+        stamp_watermark(pdf_path, watermark_text_final)
         
         print(f"[{datetime.now()}] Watermark added successfully")
         return True
         
     except Exception as e:
         print(f"[{datetime.now()}] Error adding watermark: {str(e)}")
-        # If watermark fails, return True anyway (PDF exists without watermark)
-        return True
+        run_records.count("watermark_errors")
+        # The PDF still exists without watermark: the conversion counts as done,
+        # but the unwatermarked file must not be cached as the watermarked one
+        return False
+
+# Run record span around each engine's conversion
+CONVERSION_SPANS = {"excel": "powershell_export", "native": "native_render", "libreoffice": "libreoffice_export"}
 
-def convert_excel_to_pdf(excel_path, pdf_path, watermark_text=None, watermark_data=None, use_pdf_name=False):
+
+def pdf_engine():
+    """
+    Workbook to PDF engine: "native" or "libreoffice" with that pdf.mode, else
+    "excel"; "excel" needs PowerShell, without it the native renderer is used
+    (the native renderer needs reportlab)
+    """
+    mode = settings.get_pdf_settings().get("mode", "excel")
+    if mode == "libreoffice":
+        return "libreoffice"
+    if not PDF_LIBRARIES_AVAILABLE:
+        return "excel"
+    if mode == "native":
+        return "native"
+    if not shutil.which("powershell"):
+        return "native"
+    return "excel"
+
+
+@run_records.traced("pdf_conversion")
+def convert_excel_to_pdf(excel_path, pdf_path, watermark_text=None, watermark_data=None, use_pdf_name=False,
+                         engine=None):
     """
-    Convert Excel file to PDF with borders in landscape legal format using PowerShell
+    Convert Excel file to PDF with borders in landscape legal format
     Then add watermark if specified
     watermark_text: Text to display as watermark (e.g., "CONFIDENTIAL", timestamp)
     watermark_data: Dictionary of additional data to include in watermark
     use_pdf_name: If True, use PDF filename (date) as the main watermark text
+    engine: "excel" (PowerShell), "native" or "libreoffice"; default from pdf_engine()
     """
-    try:
-        print(f"[{datetime.now()}] Converting Excel to PDF with borders...")
-        
-        # Create PowerShell script for Excel to PDF conversion with borders
-        ps_script = f'''
-        $excel = New-Object -ComObject Excel.Application
-        $excel.Visible = $false
-        $excel.DisplayAlerts = $false
-        
-        try {{
-            $workbook = $excel.Workbooks.Open('{os.path.abspath(excel_path)}')
-            $worksheet = $workbook.Worksheets.Item(1)
-            
-            # Add borders to all cells with data
-            $usedRange = $worksheet.UsedRange
-            if ($usedRange) {{
-                $usedRange.Borders.LineStyle = 1  # xlContinuous
-                $usedRange.Borders.Weight = 1     # xlThin
-                # Set gray color for all border sides
-                $usedRange.Borders.Item(7).Color = 12632256  # xlEdgeLeft - Light gray
-                $usedRange.Borders.Item(8).Color = 12632256  # xlEdgeTop - Light gray  
-                $usedRange.Borders.Item(9).Color = 12632256  # xlEdgeBottom - Light gray
-                $usedRange.Borders.Item(10).Color = 12632256 # xlEdgeRight - Light gray
-            }}
-            
-            # Set to Legal landscape
-            $worksheet.PageSetup.Orientation = 2  # xlLandscape
-            $worksheet.PageSetup.PaperSize = 5     # xlPaperLegal
-            
-            # Export to PDF
-            $pdf_path = '{os.path.abspath(pdf_path)}'
-            $workbook.ExportAsFixedFormat(0, $pdf_path)
-            
-            $workbook.Close()
-            $excel.Quit()
-            
-            Write-Host "PDF created: $pdf_path"
-        }} catch {{
-            Write-Host "Error: $_"
-            $excel.Quit()
-        }}
-        '''
-        
-        # Write PowerShell script to file
-        with open('temp.ps1', 'w') as f:
-            f.write(ps_script)
-        
+    engine = engine or pdf_engine()
+    watermarked = bool(watermark_text or watermark_data or use_pdf_name)
+    
+    # Same workbook content, page settings and watermark as an earlier conversion: reuse its PDF
+    cache = conversion_cache if settings.get_conversion_cache_settings().get("enabled", True) else None
+    if cache:
         try:
-            # Run PowerShell script
-            result = subprocess.run(['powershell', '-ExecutionPolicy', 'Bypass', '-File', 'temp.ps1'], 
-                                  capture_output=True, text=True, timeout=60)
-            
-            if result.returncode == 0:
-                print(f"[{datetime.now()}] PDF conversion successful: {pdf_path}")
-                
-                # Add watermark if specified
-                if watermark_text or watermark_data or use_pdf_name:
-                    add_watermark_to_pdf(pdf_path, watermark_text, watermark_data, use_pdf_name)
-                
-                return True
-            else:
-                print(f"[{datetime.now()}] PowerShell error: {result.stderr}")
-                return False
-                
-        except subprocess.TimeoutExpired:
-            print(f"[{datetime.now()}] PDF conversion timed out")
-            return False
-        except Exception as e:
-            print(f"[{datetime.now()}] Error: {e}")
+            content_hash = workbook_hash(excel_path)
+        except OSError as e:
+            print(f"[{datetime.now()}] Cannot hash {excel_path} for the conversion cache: {str(e)}")
+            cache = None
+    if cache:
+        conversion_key = cache_key(content_hash, engine=engine, page="legal-landscape", borders="light-gray")
+        watermark = effective_watermark(pdf_path, watermark_text, watermark_data, use_pdf_name)
+        pdf_key = None
+        if watermark is not None:
+            pdf_key = cache_key(content_hash, engine=engine, page="legal-landscape", borders="light-gray",
+                                watermark=watermark)
+        if pdf_key and cache.get("pdf", pdf_key, pdf_path):
+            run_records.count("conversion_cache_hits")
+            return True
+    
+    if cache and cache.get("conversion", conversion_key, pdf_path):
+        run_records.count("conversion_cache_hits")
+    else:
+        print(f"[{datetime.now()}] Converting Excel to PDF with borders ({engine})...")
+        # Runs on the conversion executor: parallel conversions each get their own scratch directory
+        with run_records.span(CONVERSION_SPANS.get(engine, "pdf_engine")) as engine_span:
+            result = get_conversion_executor(settings.get_conversion_settings()).convert(
+                excel_path, pdf_path, engine, server_settings=settings.get_office_server_settings())
+            engine_span["ok"] = result["success"]
+            engine_span["worker_seconds"] = result["seconds"]
+        if not result["success"]:
+            print(f"[{datetime.now()}] PDF conversion failed: {result['error']}")
             return False
-        finally:
-            # Clean up
-            if os.path.exists('temp.ps1'):
-                os.remove('temp.ps1')
-            
-    except Exception as e:
-        print(f"[{datetime.now()}] Error in PDF conversion: {str(e)}")
-        return False
+        print(f"[{datetime.now()}] PDF conversion successful: {pdf_path} ({result['seconds']}s)")
+        if cache and watermarked:
+            # Copy of the unwatermarked PDF: a rerun with another watermark only redoes the watermark
+            cache.put("conversion", conversion_key, pdf_path)
+    
+    # Add watermark if specified
+    if watermarked and not add_watermark_to_pdf(pdf_path, watermark_text, watermark_data, use_pdf_name):
+        return True
+    
+    if cache and pdf_key:
+        cache.put("pdf", pdf_key, pdf_path)
+    return True
+
+
+def effective_watermark(pdf_path, watermark_text=None, watermark_data=None, use_pdf_name=False):
+    """
+    Text add_watermark_to_pdf draws for these arguments ("" for no watermark),
+    None when it changes on every call (the generated-at timestamp)
+    """
+    if not (watermark_text or watermark_data or use_pdf_name):
+        return ""
+    if use_pdf_name:
+        return os.path.splitext(os.path.basename(pdf_path))[0]
+    if watermark_text:
+        return watermark_text
+    return None
 
 # Initialize screenshots directory
 SCREENSHOTS_DIR = "screenshots"
@@ -279,83 +269,506 @@ os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
 scheduler = BackgroundScheduler()
 screenshot_lock = threading.Lock()
 
+# Phase wait timings from the most recent Excel download run
+last_run_timings = {}
+
+# Per-execution run records (spans, counters, outcome) behind /runs
+run_store = RunStore()
+
+# Persisted retry chain (survives restarts)
+retry_store = RetryChainStore(settings=settings.get_retry_settings())
+
+# Chrome watchdog: PID registry, orphan reaping and per-browser RSS/CPU caps
+watchdog_settings = settings.get_watchdog_settings()
+chrome_watchdog = get_watchdog(watchdog_settings)
+
+# Converted PDFs by workbook content and PDF settings (repeat conversions are linked, not redone)
+conversion_cache = ConversionCache(max_entries=settings.get_conversion_cache_settings().get("max_entries", 500))
 
-def scheduled_excel_download_task():
-    """Task to download Excel report - runs according to frequency"""
-    with screenshot_lock:
+# Fingerprints of the last stored exports; scheduled runs skip unchanged data
+change_probe = ChangeProbe(settings.get_change_probe_settings().get("max_unchanged_hours", 24))
+
+# Portal login session reuse (skips the Okta login when the session is still valid)
+session_manager = PortalSessionManager()
+
+# Slim golden Chrome profile; every browser runs on a throw-away copy of it
+profile_mode = settings.get_chrome_profile_settings().get("mode", "snapshot")
+main_profile_manager = None
+if profile_mode == "snapshot":
+    main_profile_manager = get_profile_manager(
+        os.path.basename(default_user_data_dir(settings.get_browser_profile())),
+        default_user_data_dir(settings.get_browser_profile())
+    )
+
+# Warm browser pool (drivers stay alive between runs)
+pool_settings = settings.get_browser_pool_settings()
+browser_pool = None
+if pool_settings.get("enabled", True):
+    browser_pool = BrowserPool(
+        size=pool_settings.get("size", 1),
+        max_runs=pool_settings.get("max_runs", 20),
+        max_memory_mb=pool_settings.get("max_memory_mb", 1500),
+        browser_profile=settings.get_browser_profile(),
+        profile_manager=main_profile_manager
+    )
+
+
+def active_change_probe():
+    """The change probe when it is enabled in the settings, else None"""
+    return change_probe if settings.get_change_probe_settings().get("enabled", False) else None
+
+
+def run_excel_download(probe=False):
+    """
+    Run the Excel download with configured step budgets and record phase timings
+    probe: Skip the export when the change probe finds the data unchanged
+           (scheduled runs); the message is then None
+    """
+    global last_run_timings
+    credentials = settings.get_login_credentials()
+    export_settings = settings.get_export_settings()
+    export_mode = export_settings.get("mode", "ui")
+    
+    output_options = export_output_options()
+    
+    # Fastest path: replay the captured export request with saved cookies, no browser
+    # (not when the PDF or the JSON data come from the page: that needs the browser)
+    if (export_mode == "http" and export_settings.get("browserless", False) and not output_options
+            and load_export_request()):
+        filename = report_filename()
+        run_dir = create_run_download_dir()
         try:
-            print(f"[{datetime.now()}] Downloading scheduled Excel report...")
-            credentials = settings.get_login_credentials()
+            with run_records.span("browserless_export") as browserless_span:
+                # Only with cookies saved by a login as the current account
+                success, message = fetch_export(os.path.join(run_dir, filename),
+                                                username=credentials['username'])
+                browserless_span["ok"] = success
+            if success:
+                # No page to probe: compare the downloaded workbook's cell values instead
+                probe_store = active_change_probe() if probe else None
+                fingerprint = None
+                if probe_store:
+                    try:
+                        fingerprint = workbook_fingerprint(os.path.join(run_dir, filename))
+                    except Exception as e:
+                        print(f"[{datetime.now()}] Change probe could not read the workbook: {str(e)}")
+                probe_key = f"{DEFAULT_TAB_LABEL} (workbook)"
+                unchanged = bool(fingerprint) and probe_store.unchanged(probe_key, fingerprint)
+                if not unchanged:
+                    filename = finalize_workbook(os.path.join(run_dir, filename), filename)
+                    if probe_store:
+                        probe_store.record(probe_key, fingerprint)
+                last_run_timings = {
+                    "finished_at": datetime.now().isoformat(),
+                    "success": True,
+                    "unchanged": unchanged,
+                    "mode": "browserless",
+                    "total_waited_seconds": 0,
+                    "phases": []
+                }
+                run_records.annotate(mode="browserless", unchanged=unchanged)
+                return True, None if unchanged else filename
+            print(f"[{datetime.now()}] Browserless export failed ({message}), starting browser")
+        except ExportAuthExpired as e:
+            print(f"[{datetime.now()}] Saved auth expired ({str(e)}), starting browser to refresh it")
+        except Exception as e:
+            print(f"[{datetime.now()}] Browserless export error ({str(e)}), starting browser")
+        finally:
+            remove_run_download_dir(run_dir)
+        run_records.count("retries")
+    
+    timer = PhaseTimer(settings.get_wait_timeouts())
+    if browser_pool:
+        with browser_pool.lease() as lease:
             success, message = download_excel_report(
                 credentials['username'], 
-                credentials['password']
+                credentials['password'],
+                phase_timer=timer,
+                driver=lease["driver"],
+                session_manager=session_manager,
+                export_mode=export_mode,
+                retry_settings=settings.get_retry_settings(),
+                change_probe=active_change_probe() if probe else None,
+                **output_options
             )
-            if success:
+            # Keep the warm browser (and its portal session) for the retry unless the browser itself broke
+            lease["failed"] = not success and timer.failure_reason in ("browser_error", "unknown")
+    else:
+        success, message = download_excel_report(
+            credentials['username'], 
+            credentials['password'],
+            phase_timer=timer,
+            session_manager=session_manager,
+            export_mode=export_mode,
+            browser_profile=settings.get_browser_profile(),
+            retry_settings=settings.get_retry_settings(),
+            profile_manager=main_profile_manager,
+            change_probe=active_change_probe() if probe else None,
+            **output_options
+        )
+    last_run_timings = {
+        "finished_at": datetime.now().isoformat(),
+        "success": success,
+        "unchanged": success and message is None,
+        "mode": "browser",
+        "browser_profile": settings.get_browser_profile(),
+        "resource_usage": timer.resource_usage,
+        "total_waited_seconds": timer.total_waited(),
+        "failure_reason": timer.failure_reason,
+        "phases": timer.phases
+    }
+    run_records.annotate(
+        mode="browser",
+        unchanged=success and message is None,
+        failure_reason=timer.failure_reason,
+        browser_profile=settings.get_browser_profile(),
+        resource_usage=timer.resource_usage,
+        phases=timer.phases
+    )
+    return success, message
+
+
+def pdf_watermark_text(pdf_filename):
+    """Watermark text a report PDF gets under the current watermark settings, or None"""
+    watermark_settings = settings.get_watermark_settings()
+    if watermark_settings.get("use_pdf_name", True):
+        return os.path.splitext(pdf_filename)[0]
+    if watermark_settings.get("enabled", True) and watermark_settings.get("text"):
+        return watermark_settings["text"]
+    return None
+
+
+def export_output_options():
+    """
+    download_excel_reports arguments for the extra per-tab outputs of a browser run:
+    the report printed to PDF (pdf.mode "print") and its table as structured JSON
+    (structured_data.with_export)
+    """
+    options = {}
+    if settings.get_pdf_settings().get("mode", "excel") == "print":
+        options.update(print_pdf_dir=os.path.join("downloads", "pdfs"), watermark_for=pdf_watermark_text)
+    if settings.get_structured_data_settings().get("with_export"):
+        options["extract_data"] = True
+    return options
+
+
+def convert_report_to_pdf(excel_filename):
+    """
+    Convert a downloaded report in downloads/ to a watermarked PDF in downloads/pdfs/
+    (nothing to do when the browser run already printed it)
+    
+    Returns:
+        str or None: PDF filename if the conversion succeeded
+    """
+    excel_path = os.path.join("downloads", excel_filename)
+    if not os.path.exists(excel_path):
+        return None
+    
+    # Create pdfs subdirectory
+    pdfs_dir = os.path.join("downloads", "pdfs")
+    os.makedirs(pdfs_dir, exist_ok=True)
+    
+    # Convert directly to PDF with borders
+    pdf_filename = excel_filename.replace('.xlsx', '.pdf')
+    pdf_path = os.path.join(pdfs_dir, pdf_filename)
+    if os.path.exists(pdf_path):
+        print(f"[{datetime.now()}] PDF already printed from the page: {pdf_path}")
+        return pdf_filename
+    
+    # Get watermark settings
+    watermark_settings = settings.get_watermark_settings()
+    watermark_text = None
+    watermark_data = None  # Only date, no additional data
+    use_pdf_name = watermark_settings.get("use_pdf_name", True)  # Default to True
+    
+    print(f"[{datetime.now()}] Watermark settings: enabled={watermark_settings.get('enabled')}, use_pdf_name={use_pdf_name}, pdf_filename={pdf_filename}")
+    
+    if watermark_settings.get("enabled", True):
+        # Only use PDF name - no timestamp or additional data
+        if use_pdf_name:
+            # Use full PDF filename (will be extracted in watermark function)
+            pass
+        elif watermark_settings.get("text"):
+            watermark_text = watermark_settings["text"]
+    
+    if convert_excel_to_pdf(excel_path, pdf_path, watermark_text, watermark_data, use_pdf_name):
+        print(f"[{datetime.now()}] PDF created successfully: {pdf_path}")
+        return pdf_filename
+    print(f"[{datetime.now()}] PDF conversion failed")
+    return None
+
+
+def is_default_report_set(reports):
+    """True when the registry only holds the single default Return Signal report"""
+    return (
+        len(reports) == 1
+        and reports[0].get("tab") == DEFAULT_TAB_LABEL
+        and reports[0].get("file_prefix") == DEFAULT_FILE_PREFIX
+        and not reports[0].get("credentials")
+    )
+
+
+def run_tab_jobs(job, tabs, browser_profile="headless", max_parallel=2, record=None, options_for=None):
+    """
+    Run a single-tab browser job (capture_portal_screenshot, extract_report_data)
+    for each tab, one browser per tab (at most max_parallel at a time), each on
+    its own copy of the profile snapshot (chrome_profile.mode "snapshot") or one
+    after the other on the persistent profile
+    
+    Args:
+        options_for: Optional callable(tab) -> extra keyword arguments for the job
+    
+    Returns:
+        list: One dict per tab: tab, success, filename, error, failure_reason
+    """
+    credentials = settings.get_login_credentials()
+    manager = None
+    if profile_mode == "snapshot":
+        manager = get_profile_manager(
+            os.path.basename(default_user_data_dir(browser_profile)),
+            default_user_data_dir(browser_profile)
+        )
+    else:
+        # Chrome locks the persistent profile: one browser at a time
+        max_parallel = 1
+    
+    def run(tab):
+        timer = PhaseTimer(settings.get_wait_timeouts())
+        with run_records.activate(record):
+            success, message = job(
+                credentials['username'],
+                credentials['password'],
+                tab_label=tab,
+                phase_timer=timer,
+                browser_profile=browser_profile,
+                profile_manager=manager,
+                retry_settings=settings.get_retry_settings(),
+                **(options_for(tab) if options_for else {})
+            )
+        return {
+            "tab": tab,
+            "success": success,
+            "filename": message if success else None,
+            "error": None if success else message,
+            "failure_reason": timer.failure_reason
+        }
+    
+    with ThreadPoolExecutor(max_workers=max(1, int(max_parallel))) as executor:
+        return list(executor.map(run, tabs))
+
+
+def capture_screenshots(tabs=None, record=None):
+    """Full-page screenshots of report tabs through DevTools (see run_tab_jobs)"""
+    screenshot_settings = settings.get_screenshot_settings()
+    return run_tab_jobs(
+        capture_portal_screenshot,
+        tabs or screenshot_settings.get("tabs") or [DEFAULT_TAB_LABEL],
+        browser_profile=screenshot_settings.get("browser_profile", "headless"),
+        max_parallel=screenshot_settings.get("max_parallel", 2),
+        record=record,
+        options_for=lambda tab: {"screenshots_dir": SCREENSHOTS_DIR}
+    )
+
+
+def tab_file_prefix(tab):
+    """File prefix of the registry report exporting a tab (default report prefix for its tab)"""
+    for report in report_registry.get_reports():
+        if report["tab"] == tab:
+            return report["file_prefix"]
+    if tab == DEFAULT_TAB_LABEL:
+        return DEFAULT_FILE_PREFIX
+    return f"{tab.replace(' ', '_')}_"
+
+
+def refresh_report_data(tabs=None, record=None):
+    """Structured JSON of report tabs read from the DOM, no Excel involved (see run_tab_jobs)"""
+    data_settings = settings.get_structured_data_settings()
+    return run_tab_jobs(
+        extract_report_data,
+        tabs or data_settings.get("tabs") or [DEFAULT_TAB_LABEL],
+        browser_profile=data_settings.get("browser_profile", "headless"),
+        max_parallel=data_settings.get("max_parallel", 2),
+        record=record,
+        options_for=lambda tab: {"file_prefix": tab_file_prefix(tab)}
+    )
+
+
+def run_registered_reports(reports, record=None, probe=False):
+    """
+    Export several registry reports in parallel and convert the results to PDF
+    record: Optional RunRecord the report workers add their spans and counters to
+    probe: Skip reports whose data the change probe finds unchanged (scheduled runs)
+    """
+    runner = ReportRunner(
+        max_workers=settings.get_report_settings().get("max_workers", 2),
+        timeouts=settings.get_wait_timeouts(),
+        export_mode=settings.get_export_settings().get("mode", "ui"),
+        browser_profile=settings.get_browser_profile(),
+        retry_settings=settings.get_retry_settings(),
+        profile_mode=profile_mode,
+        output_options=export_output_options(),
+        change_probe=active_change_probe() if probe else None
+    )
+    results = runner.run(reports, settings.get_login_credentials(), record=record)
+    
+    def convert(result):
+        with run_records.activate(record):
+            result["pdf_filename"] = convert_report_to_pdf(result["filename"])
+    
+    # Conversions run in parallel on the conversion executor
+    to_convert = [result for result in results
+                  if result["success"] and result["convert_pdf"] and not result.get("unchanged")]
+    if to_convert:
+        workers = settings.get_conversion_settings().get("workers", 2)
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+            list(executor.map(convert, to_convert))
+    run_records.annotate(reports=[
+        {key: result.get(key) for key in ("report_id", "success", "unchanged", "filename", "error", "failure_reason",
+                                          "duration_seconds")}
+        for result in results
+    ])
+    return results
+
+
+def schedule_retry_job(chain):
+    """Add the date job for a pending retry chain (immediately if its time has passed)"""
+    run_date = max(datetime.fromisoformat(chain["next_retry_at"]), datetime.now() + timedelta(seconds=5))
+    try:
+        scheduler.add_job(
+            func=scheduled_excel_download_task,
+            trigger="date",
+            run_date=run_date,
+            id='screenshot_retry',
+            args=[chain.get("report_ids")],
+            kwargs={"trigger": "retry"},
+            replace_existing=True
+        )
+    except Exception as e:
+        print(f"[{datetime.now()}] Could not schedule retry: {str(e)}")
+
+
+def schedule_download_retry(report_ids=None, reason=None, error=None, continue_chain=False):
+    """
+    Record a failed attempt in the persisted retry chain and schedule the next
+    one with exponential backoff and jitter (base delay by failure reason, see
+    portal_errors.RETRY_POLICY). Reasons that need a human (bad credentials,
+    locked account, MFA prompt) are not retried, and a chain stops after
+    retries.max_attempts failed runs.
+    """
+    chain = retry_store.record_failure(report_ids, reason or "unknown", error, continue_chain)
+    attempt = len(chain["attempts"])
+    if chain["status"] == "abandoned":
+        print(f"[{datetime.now()}] Not retrying: failure reason '{reason}' needs attention (check the portal account/credentials)")
+        return chain
+    if chain["status"] == "exhausted":
+        print(f"[{datetime.now()}] Giving up after {attempt} failed attempt(s) (last reason: {reason})")
+        return chain
+    print(f"[{datetime.now()}] Scheduling retry {attempt + 1} at {chain['next_retry_at']} (reason: {reason or 'unknown'})...")
+    schedule_retry_job(chain)
+    return chain
+
+
+def clear_retry_chain():
+    """A run succeeded: close the retry chain and drop its pending job"""
+    if retry_store.record_success():
+        try:
+            scheduler.remove_job('screenshot_retry')
+        except Exception:
+            pass
+
+
+def restore_retry_chain():
+    """Re-schedule a retry chain that was pending when the service stopped or the scheduler restarted"""
+    chain = retry_store.pending()
+    if chain:
+        print(f"[{datetime.now()}] Resuming retry chain {chain['chain_id']} (next attempt at {chain['next_retry_at']})")
+        schedule_retry_job(chain)
+
+
+def scheduled_excel_download_task(report_ids=None, trigger="scheduled"):
+    """
+    Task to download Excel report(s) - runs according to frequency
+    report_ids: Only run these registry reports (used by retries)
+    trigger: "scheduled" or "retry", stored on the run record
+    """
+    record = RunRecord(trigger=trigger)
+    outcome, error = False, None
+    # Failures of a retry run extend its chain; a regular run starts a new one
+    continue_chain = trigger == "retry"
+    with screenshot_lock, run_records.activate(record):
+        try:
+            reports = report_registry.get_reports(enabled_only=True)
+            if report_ids:
+                reports = [report for report in reports if report["id"] in report_ids]
+            
+            if not is_default_report_set(reports) and reports:
+                print(f"[{datetime.now()}] Downloading {len(reports)} scheduled report(s)...")
+                results = run_registered_reports(reports, record, probe=True)
+                failed = [result for result in results if not result["success"]]
+                if failed:
+                    print(f"[{datetime.now()}] Report(s) failed: {', '.join(result['report_id'] for result in failed)}")
+                    outcome = "partial" if len(failed) < len(results) else False
+                    error = "Report(s) failed: " + ", ".join(
+                        f"{result['report_id']} ({result.get('failure_reason')})" for result in failed)
+                    # Retry the retryable failures together, as soon as the most urgent reason allows
+                    retryable = [result for result in failed if retry_delay_minutes(result.get("failure_reason")) is not None]
+                    for result in failed:
+                        if result not in retryable:
+                            print(f"[{datetime.now()}] Not retrying '{result['report_id']}': "
+                                  f"failure reason '{result.get('failure_reason')}' needs attention")
+                    retry_from = retryable or failed
+                    reason = min(
+                        (result.get("failure_reason") for result in retry_from),
+                        key=lambda reason: retry_delay_minutes(reason) or float("inf")
+                    )
+                    schedule_download_retry([result["report_id"] for result in retry_from], reason, error, continue_chain)
+                else:
+                    outcome = "unchanged" if all(result.get("unchanged") for result in results) else True
+                    clear_retry_chain()
+                return
+            
+            print(f"[{datetime.now()}] Downloading scheduled Excel report...")
+            success, message = run_excel_download(probe=True)
+            if success and message is None:
+                print(f"[{datetime.now()}] Report data unchanged since the last export, nothing to store")
+                outcome = "unchanged"
+                clear_retry_chain()
+            elif success:
                 print(f"[{datetime.now()}] Excel download completed successfully: {message}")
                 
                 # Convert Excel to PDF with borders
-                excel_path = os.path.join("downloads", message)
-                if os.path.exists(excel_path):
-                    # Create pdfs subdirectory
-                    pdfs_dir = os.path.join("downloads", "pdfs")
-                    os.makedirs(pdfs_dir, exist_ok=True)
-                    
-                    # Convert directly to PDF with borders
-                    pdf_filename = message.replace('.xlsx', '.pdf')
-                    pdf_path = os.path.join(pdfs_dir, pdf_filename)
-                    
-                    # Get watermark settings
-                    watermark_settings = settings.get_watermark_settings()
-                    watermark_text = None
-                    watermark_data = None  # Only date, no additional data
-                    use_pdf_name = watermark_settings.get("use_pdf_name", True)  # Default to True
-                    
-                    print(f"[{datetime.now()}] Watermark settings: enabled={watermark_settings.get('enabled')}, use_pdf_name={use_pdf_name}, pdf_filename={pdf_filename}")
-                    
-                    if watermark_settings.get("enabled", True):
-                        # Only use PDF name - no timestamp or additional data
-                        if use_pdf_name:
-                            # Use full PDF filename (will be extracted in watermark function)
-                            pass
-                        elif watermark_settings.get("text"):
-                            watermark_text = watermark_settings["text"]
-                    
-                    if convert_excel_to_pdf(excel_path, pdf_path, watermark_text, watermark_data, use_pdf_name):
-                        print(f"[{datetime.now()}] PDF created successfully: {pdf_path}")
-                    else:
-                        print(f"[{datetime.now()}] PDF conversion failed")
+                convert_report_to_pdf(message)
+                outcome = True
+                clear_retry_chain()
             else:
-                print(f"[{datetime.now()}] Excel download failed: {message}")
-                # Schedule retry in 5 minutes
-                print(f"[{datetime.now()}] Scheduling retry in 5 minutes...")
-                scheduler.add_job(
-                    func=scheduled_excel_download_task,
-                    trigger="date",
-                    run_date=datetime.now() + timedelta(minutes=5),
-                    id='screenshot_retry',
-                    replace_existing=True
-                )
+                reason = last_run_timings.get("failure_reason")
+                print(f"[{datetime.now()}] Excel download failed ({reason}): {message}")
+                error = message
+                schedule_download_retry(report_ids, reason, error, continue_chain)
         except Exception as e:
             print(f"[{datetime.now()}] Error in scheduled screenshot: {str(e)}")
-            # Schedule retry in 5 minutes on exception
-            print(f"[{datetime.now()}] Scheduling retry in 5 minutes after exception...")
-            try:
-                scheduler.add_job(
-                    func=scheduled_excel_download_task,
-                    trigger="date",
-                    run_date=datetime.now() + timedelta(minutes=5),
-                    id='screenshot_retry',
-                    replace_existing=True
-                )
-            except:
-                pass
+            error = str(e)
+            # Schedule a retry according to the failure reason
+            schedule_download_retry(report_ids, classify_failure(e), error, continue_chain)
+        finally:
+            record.finish(outcome, error)
+            run_store.save(record)
+
+
+def prewarm_browser_task():
+    """Start a warm browser shortly before the scheduled run"""
+    if browser_pool:
+        try:
+            browser_pool.prewarm()
+        except Exception as e:
+            print(f"[{datetime.now()}] Browser pre-warm failed: {str(e)}")
 
 
 def restart_scheduler():
     """Restart the scheduler with updated frequency"""
     scheduler.remove_all_jobs()
     frequency_hours = settings.get_frequency()
-    scheduler.add_job(
+    download_job = scheduler.add_job(
         func=scheduled_excel_download_task,
         trigger="interval",
         hours=frequency_hours,
@@ -363,6 +776,42 @@ def restart_scheduler():
         replace_existing=True
     )
     print(f"Scheduler restarted with frequency: {frequency_hours} hours")
+    
+    if browser_pool:
+        # Pre-warm a driver a few minutes before every run of the download job
+        lead_minutes = settings.get_browser_pool_settings().get("prewarm_minutes", 5)
+        first_run = getattr(download_job, "next_run_time", None) or datetime.now() + timedelta(hours=frequency_hours)
+        prewarm_job = scheduler.add_job(
+            func=prewarm_browser_task,
+            trigger="interval",
+            hours=frequency_hours,
+            start_date=first_run - timedelta(minutes=lead_minutes),
+            id='browser_prewarm',
+            replace_existing=True
+        )
+        print(f"Browser pre-warm scheduled {lead_minutes} minutes before each run "
+              f"(next: {getattr(prewarm_job, 'next_run_time', None)})")
+    
+    if watchdog_settings.get("enabled", True):
+        scheduler.add_job(
+            func=chrome_watchdog.check,
+            trigger="interval",
+            seconds=watchdog_settings.get("interval_seconds", 60),
+            id='chrome_watchdog',
+            replace_existing=True
+        )
+    
+    if pdf_engine() == "libreoffice":
+        scheduler.add_job(
+            func=get_office_server(settings.get_office_server_settings()).check,
+            trigger="interval",
+            seconds=settings.get_office_server_settings().get("health_check_seconds", 60),
+            id='office_server_check',
+            replace_existing=True
+        )
+    
+    # remove_all_jobs() also dropped a pending retry: put it back from the persisted chain
+    restore_retry_chain()
 
 
 @app.route('/')
@@ -412,6 +861,17 @@ def download_file(filename):
                     download_name=filename
                 )
         
+        # Check structured data (JSON) directory
+        if os.path.exists(STRUCTURED_DATA_DIR):
+            file_path = os.path.join(STRUCTURED_DATA_DIR, filename)
+            if os.path.exists(file_path):
+                return send_from_directory(
+                    STRUCTURED_DATA_DIR, 
+                    filename,
+                    as_attachment=True,
+                    download_name=filename
+                )
+        
         # Check screenshots directory as fallback
         if os.path.exists(SCREENSHOTS_DIR):
             file_path = os.path.join(SCREENSHOTS_DIR, filename)
@@ -446,8 +906,9 @@ def get_excel_report(date_str):
         target_date = datetime.strptime(date_str, "%Y-%m-%d")
         
         # Find Excel files for that date
-        # Files now start with "POLA_Empty_Returns_" prefix
+        # Files start with the report prefix ("POLA_Empty_Returns_" by default)
         date_pattern = target_date.strftime("%Y-%m-%d")
+        file_prefix = report_file_prefix()
         matching_files = []
         
         # Check downloads directory
@@ -456,7 +917,7 @@ def get_excel_report(date_str):
             for filename in os.listdir(downloads_dir):
                 # Check if filename contains the date pattern and ends with .xlsx/.xls
                 # Format: POLA_Empty_Returns_YYYY-MM-DD_HH-MM-SS.xlsx
-                if f"POLA_Empty_Returns_{date_pattern}" in filename and filename.endswith(('.xlsx', '.xls')):
+                if f"{file_prefix}{date_pattern}" in filename and filename.endswith(('.xlsx', '.xls')):
                     matching_files.append(filename)
         
         if not matching_files:
@@ -480,6 +941,11 @@ def get_excel_report(date_str):
             "message": f"Excel report found for {date_str}"
         })
     
+    except KeyError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown report: {e.args[0]}"
+        }), 404
     except ValueError:
         return jsonify({
             "success": False,
@@ -504,8 +970,9 @@ def get_pdf_report(date_str):
         target_date = datetime.strptime(date_str, "%Y-%m-%d")
         
         # Find PDF files for that date
-        # Files now start with "POLA_Empty_Returns_" prefix
+        # Files start with the report prefix ("POLA_Empty_Returns_" by default)
         date_pattern = target_date.strftime("%Y-%m-%d")
+        file_prefix = report_file_prefix()
         matching_files = []
         
         # Check downloads/pdfs directory
@@ -513,7 +980,7 @@ def get_pdf_report(date_str):
         if os.path.exists(pdfs_dir):
             for filename in os.listdir(pdfs_dir):
                 # Format: POLA_Empty_Returns_YYYY-MM-DD_HH-MM-SS.pdf
-                if f"POLA_Empty_Returns_{date_pattern}" in filename and filename.endswith('.pdf'):
+                if f"{file_prefix}{date_pattern}" in filename and filename.endswith('.pdf'):
                     matching_files.append(filename)
         
         # Check downloads directory as fallback
@@ -521,7 +988,7 @@ def get_pdf_report(date_str):
         if os.path.exists(downloads_dir):
             for filename in os.listdir(downloads_dir):
                 # Format: POLA_Empty_Returns_YYYY-MM-DD_HH-MM-SS.pdf
-                if f"POLA_Empty_Returns_{date_pattern}" in filename and filename.endswith('.pdf'):
+                if f"{file_prefix}{date_pattern}" in filename and filename.endswith('.pdf'):
                     matching_files.append(filename)
         
         if not matching_files:
@@ -545,6 +1012,11 @@ def get_pdf_report(date_str):
             "message": f"PDF report found for {date_str}"
         })
     
+    except KeyError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown report: {e.args[0]}"
+        }), 404
     except ValueError:
         return jsonify({
             "success": False,
@@ -747,8 +1219,11 @@ def update_credentials():
                 "error": "Invalid admin password"
             }), 403
         
-        # Update credentials
+        # Update credentials and make the next run log in with them (the saved
+        # export request and cookies belong to the previous account)
         settings.set_login_credentials(username, password)
+        session_manager.invalidate()
+        clear_export_request()
         
         return jsonify({
             "success": True,
@@ -936,12 +1411,13 @@ def set_watermark_settings():
         }), 500
 
 
-@app.route('/excel/now', methods=['POST'])
-def download_excel_now():
+@app.route('/admin/wait_timeouts', methods=['POST'])
+def set_wait_timeouts():
     """
-    Download Excel report immediately
+    Configure per-step timeout budgets for the Excel download automation
     Body: {
-        "admin_password": "password"
+        "admin_password": "password",
+        "timeouts": {"portal_load": 60, "post_login": 90, ...}
     }
     """
     try:
@@ -954,11 +1430,12 @@ def download_excel_now():
             }), 400
         
         admin_password = data.get('admin_password')
+        timeouts = data.get('timeouts')
         
-        if not admin_password:
+        if not admin_password or not isinstance(timeouts, dict):
             return jsonify({
                 "success": False,
-                "error": "admin_password is required"
+                "error": "admin_password and timeouts (object) are required"
             }), 400
         
         # Verify admin password
@@ -968,71 +1445,19 @@ def download_excel_now():
                 "error": "Invalid admin password"
             }), 403
         
-        # Download Excel report
-        with screenshot_lock:
-            credentials = settings.get_login_credentials()
-            success, message = download_excel_report(
-                credentials['username'], 
-                credentials['password']
-            )
-        
-        if success:
-            # Convert Excel to PDF with borders
-            excel_path = os.path.join("downloads", message)
-            if os.path.exists(excel_path):
-                # Create pdfs subdirectory
-                pdfs_dir = os.path.join("downloads", "pdfs")
-                os.makedirs(pdfs_dir, exist_ok=True)
-                
-                # Convert directly to PDF with borders
-                pdf_filename = message.replace('.xlsx', '.pdf')
-                pdf_path = os.path.join(pdfs_dir, pdf_filename)
-                
-                # Get watermark settings
-                watermark_settings = settings.get_watermark_settings()
-                watermark_text = None
-                watermark_data = None  # Only date, no additional data
-                use_pdf_name = watermark_settings.get("use_pdf_name", True)  # Default to True
-                
-                print(f"[{datetime.now()}] Watermark settings: enabled={watermark_settings.get('enabled')}, use_pdf_name={use_pdf_name}, pdf_filename={pdf_filename}")
-                
-                if watermark_settings.get("enabled", True):
-                    # Only use PDF name - no timestamp or additional data
-                    if use_pdf_name:
-                        # Use full PDF filename (will be extracted in watermark function)
-                        pass
-                    elif watermark_settings.get("text"):
-                        watermark_text = watermark_settings["text"]
-                
-                if convert_excel_to_pdf(excel_path, pdf_path, watermark_text, watermark_data, use_pdf_name):
-                    print(f"[{datetime.now()}] PDF created successfully: {pdf_path}")
-                    return jsonify({
-                        "success": True,
-                        "message": "Excel report downloaded and PDF created successfully",
-                        "excel_filename": message,
-                        "pdf_filename": pdf_filename,
-                        "download_url": build_download_url(pdf_filename)
-                    })
-                else:
-                    print(f"[{datetime.now()}] PDF conversion failed")
-                    return jsonify({
-                        "success": True,
-                        "message": "Excel report downloaded but PDF conversion failed",
-                        "excel_filename": message,
-                        "download_url": build_download_url(message)
-                    })
-            else:
-                return jsonify({
-                    "success": True,
-                    "message": "Excel report downloaded successfully",
-                    "filename": message,
-                    "download_url": build_download_url(message)
-                })
-        else:
+        try:
+            settings.set_wait_timeouts(timeouts)
+        except ValueError as e:
             return jsonify({
                 "success": False,
-                "error": message
-            }), 500
+                "error": str(e)
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "message": "Wait timeouts updated",
+            "timeouts": settings.get_wait_timeouts()
+        })
     
     except Exception as e:
         return jsonify({
@@ -1041,32 +1466,616 @@ def download_excel_now():
         }), 500
 
 
-@app.route('/status', methods=['GET'])
-def status():
-    """Get current system status"""
+@app.route('/admin/conversion-cache/clear', methods=['POST'])
+def clear_conversion_cache():
+    """
+    Invalidate the conversion cache: the next conversion of every workbook runs again
+    Body: {
+        "admin_password": "password"
+    }
+    """
     try:
-        frequency = settings.get_frequency()
-        preferred_hour = settings.get_preferred_hour()
-        credentials = settings.get_login_credentials()
+        data = request.get_json()
         
-        # Count files
-        screenshot_count = len([f for f in os.listdir(SCREENSHOTS_DIR) if f.endswith('.png')])
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
         
-        # Count Excel and PDF files
-        downloads_dir = "downloads"
-        pdfs_dir = os.path.join("downloads", "pdfs")
+        admin_password = data.get('admin_password')
         
-        excel_count = 0
-        pdf_count = 0
+        if not admin_password:
+            return jsonify({
+                "success": False,
+                "error": "admin_password is required"
+            }), 400
         
-        if os.path.exists(downloads_dir):
-            excel_count = len([f for f in os.listdir(downloads_dir) if f.endswith(('.xlsx', '.xls'))])
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
         
-        if os.path.exists(pdfs_dir):
-            pdf_count = len([f for f in os.listdir(pdfs_dir) if f.endswith('.pdf')])
+        removed = conversion_cache.clear()
         
-        # Get last screenshot time
-        screenshots = sorted(
+        return jsonify({
+            "success": True,
+            "message": f"Conversion cache cleared ({removed} entries)",
+            "removed": removed
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/admin/export/reset', methods=['POST'])
+def reset_export_capture():
+    """
+    Forget the captured export request and saved cookies
+    The next browser run captures them again
+    Body: {
+        "admin_password": "password"
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
+        
+        admin_password = data.get('admin_password')
+        
+        if not admin_password:
+            return jsonify({
+                "success": False,
+                "error": "admin_password is required"
+            }), 400
+        
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
+        
+        clear_export_request()
+        
+        return jsonify({
+            "success": True,
+            "message": "Captured export request cleared"
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/admin/processes', methods=['POST'])
+def chrome_processes():
+    """
+    Live resource usage of the Chrome processes started by the service
+    Optionally reaps orphaned browsers first
+    Body: {
+        "admin_password": "password",
+        "reap": true  // optional
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
+        
+        admin_password = data.get('admin_password')
+        
+        if not admin_password:
+            return jsonify({
+                "success": False,
+                "error": "admin_password is required"
+            }), 400
+        
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
+        
+        reaped = chrome_watchdog.reap_orphans() if data.get('reap') else None
+        
+        return jsonify({
+            "success": True,
+            "reaped": reaped,
+            "watchdog": chrome_watchdog.status()
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/reports', methods=['GET'])
+def list_reports():
+    """List registered reports (passwords hidden)"""
+    try:
+        return jsonify({
+            "success": True,
+            "reports": report_registry.get_public_reports(),
+            "max_workers": settings.get_report_settings().get("max_workers", 2)
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/admin/reports', methods=['POST'])
+def set_report():
+    """
+    Add or update a registered report
+    Body: {
+        "admin_password": "password",
+        "report": {
+            "id": "pola_return_signal",
+            "tab": "Return Signal",
+            "file_prefix": "POLA_Empty_Returns_",
+            "enabled": true (optional),
+            "credentials": {"username": "...", "password": "..."} (optional),
+            "convert_pdf": true (optional)
+        }
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
+        
+        admin_password = data.get('admin_password')
+        report = data.get('report')
+        
+        if not admin_password or not isinstance(report, dict):
+            return jsonify({
+                "success": False,
+                "error": "admin_password and report (object) are required"
+            }), 400
+        
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
+        
+        try:
+            report_registry.set_report(report)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "message": f"Report '{report['id']}' saved",
+            "reports": report_registry.get_public_reports()
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/admin/reports/remove', methods=['POST'])
+def remove_report():
+    """
+    Remove a registered report
+    Body: {
+        "admin_password": "password",
+        "report_id": "pola_return_signal"
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
+        
+        admin_password = data.get('admin_password')
+        report_id = data.get('report_id')
+        
+        if not admin_password or not report_id:
+            return jsonify({
+                "success": False,
+                "error": "admin_password and report_id are required"
+            }), 400
+        
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
+        
+        if not report_registry.remove_report(report_id):
+            return jsonify({
+                "success": False,
+                "error": f"Unknown report: {report_id}"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "message": f"Report '{report_id}' removed"
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/excel/now', methods=['POST'])
+def download_excel_now():
+    """
+    Download Excel report immediately
+    Body: {
+        "admin_password": "password"
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
+        
+        admin_password = data.get('admin_password')
+        
+        if not admin_password:
+            return jsonify({
+                "success": False,
+                "error": "admin_password is required"
+            }), 400
+        
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
+        
+        # Download Excel report
+        record = RunRecord(trigger="manual")
+        pdf_filename = None
+        with run_records.activate(record):
+            try:
+                with screenshot_lock:
+                    success, message = run_excel_download()
+                
+                # Convert Excel to PDF with borders
+                excel_exists = success and os.path.exists(os.path.join("downloads", message))
+                if excel_exists:
+                    pdf_filename = convert_report_to_pdf(message)
+                record.finish(success, None if success else message)
+            except Exception as e:
+                record.finish(False, str(e))
+                raise
+            finally:
+                run_store.save(record)
+        
+        if success:
+            if excel_exists:
+                if pdf_filename:
+                    return jsonify({
+                        "success": True,
+                        "message": "Excel report downloaded and PDF created successfully",
+                        "excel_filename": message,
+                        "pdf_filename": pdf_filename,
+                        "download_url": build_download_url(pdf_filename),
+                        "run_id": record.run_id
+                    })
+                else:
+                    return jsonify({
+                        "success": True,
+                        "message": "Excel report downloaded but PDF conversion failed",
+                        "excel_filename": message,
+                        "download_url": build_download_url(message),
+                        "run_id": record.run_id
+                    })
+            else:
+                return jsonify({
+                    "success": True,
+                    "message": "Excel report downloaded successfully",
+                    "filename": message,
+                    "download_url": build_download_url(message),
+                    "run_id": record.run_id
+                })
+        else:
+            return jsonify({
+                "success": False,
+                "error": message,
+                "failure_reason": last_run_timings.get("failure_reason"),
+                "run_id": record.run_id
+            }), 500
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/screenshot/now', methods=['POST'])
+def screenshot_now():
+    """
+    Take full-page screenshots of report tabs immediately (DevTools capture, headless)
+    Body: {
+        "admin_password": "password",
+        "tabs": ["Return Signal"]  // optional, default: screenshots.tabs
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
+        
+        admin_password = data.get('admin_password')
+        
+        if not admin_password:
+            return jsonify({
+                "success": False,
+                "error": "admin_password is required"
+            }), 400
+        
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
+        
+        tabs = data.get('tabs')
+        if tabs is not None and (not isinstance(tabs, list) or not all(isinstance(tab, str) for tab in tabs)):
+            return jsonify({
+                "success": False,
+                "error": "tabs must be a list of tab labels"
+            }), 400
+        
+        record = RunRecord(kind="screenshot", trigger="manual")
+        try:
+            results = capture_screenshots(tabs, record)
+            failed = [result for result in results if not result["success"]]
+            outcome = "partial" if failed and len(failed) < len(results) else not failed
+            record.finish(outcome, "; ".join(result["error"] for result in failed) or None)
+        except Exception as e:
+            record.finish(False, str(e))
+            raise
+        finally:
+            run_store.save(record)
+        
+        for result in results:
+            if result["success"]:
+                result["download_url"] = build_download_url(result["filename"])
+        
+        return jsonify({
+            "success": not failed,
+            "screenshots": results,
+            "run_id": record.run_id
+        }), 200 if not failed else 500
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/data/now', methods=['POST'])
+def refresh_data_now():
+    """
+    Refresh the structured report data from the live page (no Excel download)
+    Body: {
+        "admin_password": "password",
+        "tabs": ["Return Signal"]  // optional, default: structured_data.tabs
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Request body must be JSON"
+            }), 400
+        
+        admin_password = data.get('admin_password')
+        
+        if not admin_password:
+            return jsonify({
+                "success": False,
+                "error": "admin_password is required"
+            }), 400
+        
+        # Verify admin password
+        if not settings.verify_admin_password(admin_password):
+            return jsonify({
+                "success": False,
+                "error": "Invalid admin password"
+            }), 403
+        
+        tabs = data.get('tabs')
+        if tabs is not None and (not isinstance(tabs, list) or not all(isinstance(tab, str) for tab in tabs)):
+            return jsonify({
+                "success": False,
+                "error": "tabs must be a list of tab labels"
+            }), 400
+        
+        record = RunRecord(kind="data_refresh", trigger="manual")
+        try:
+            results = refresh_report_data(tabs, record)
+            failed = [result for result in results if not result["success"]]
+            outcome = "partial" if failed and len(failed) < len(results) else not failed
+            record.finish(outcome, "; ".join(result["error"] for result in failed) or None)
+        except Exception as e:
+            record.finish(False, str(e))
+            raise
+        finally:
+            run_store.save(record)
+        
+        for result in results:
+            if result["success"]:
+                result["download_url"] = build_download_url(result["filename"])
+        
+        return jsonify({
+            "success": not failed,
+            "data": results,
+            "run_id": record.run_id
+        }), 200 if not failed else 500
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/data/latest', methods=['GET'])
+def latest_data():
+    """
+    Most recent structured report data (terminal, shipping_line, container_acceptance)
+    Parameters:
+    - tab: report tab (optional, default: Return Signal)
+    """
+    try:
+        tab = request.args.get('tab', DEFAULT_TAB_LABEL)
+        filename = latest_structured_report(prefix=tab_file_prefix(tab))
+        if not filename:
+            return jsonify({
+                "success": False,
+                "error": f"No structured data found for {tab}"
+            }), 404
+        
+        with open(os.path.join(STRUCTURED_DATA_DIR, filename), 'r') as f:
+            document = json.load(f)
+        
+        return jsonify({
+            "success": True,
+            "filename": filename,
+            "download_url": build_download_url(filename),
+            "report": document
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/runs', methods=['GET'])
+def list_runs():
+    """
+    Recent run records, newest first, with per-span duration statistics
+    Query params: limit (default 50), kind, outcome (success, partial, unchanged, failed)
+    """
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        runs = run_store.list_runs(
+            limit=limit,
+            kind=request.args.get('kind'),
+            outcome=request.args.get('outcome')
+        )
+        return jsonify({
+            "success": True,
+            "count": len(runs),
+            "span_stats": span_stats(runs),
+            "runs": runs
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/runs/<run_id>', methods=['GET'])
+def get_run(run_id):
+    """Single run record by id"""
+    try:
+        run = run_store.get_run(run_id)
+        if not run:
+            return jsonify({
+                "success": False,
+                "error": f"Run {run_id} not found"
+            }), 404
+        return jsonify({
+            "success": True,
+            "run": run
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/status', methods=['GET'])
+def status():
+    """Get current system status"""
+    try:
+        frequency = settings.get_frequency()
+        preferred_hour = settings.get_preferred_hour()
+        credentials = settings.get_login_credentials()
+        
+        # Count files
+        screenshot_count = len([f for f in os.listdir(SCREENSHOTS_DIR) if f.endswith('.png')])
+        
+        # Count Excel and PDF files
+        downloads_dir = "downloads"
+        pdfs_dir = os.path.join("downloads", "pdfs")
+        
+        excel_count = 0
+        pdf_count = 0
+        
+        if os.path.exists(downloads_dir):
+            excel_count = len([f for f in os.listdir(downloads_dir) if f.endswith(('.xlsx', '.xls'))])
+        
+        if os.path.exists(pdfs_dir):
+            pdf_count = len([f for f in os.listdir(pdfs_dir) if f.endswith('.pdf')])
+        
+        # Get last screenshot time
+        screenshots = sorted(
             [f for f in os.listdir(SCREENSHOTS_DIR) if f.endswith('.png')],
             reverse=True
         )
@@ -1085,6 +2094,25 @@ def status():
             "total_excel_files": excel_count,
             "total_pdf_files": pdf_count,
             "last_screenshot": last_screenshot,
+            "last_run_timings": last_run_timings,
+            "browser_pool": browser_pool.status() if browser_pool else None,
+            "session": session_manager.stats(),
+            "export_mode": settings.get_export_settings().get("mode"),
+            "export_request_captured": load_export_request() is not None,
+            "selectors": get_selector_cache().stats(),
+            "retries": retry_store.stats(),
+            "change_probe": dict(change_probe.status(),
+                                 enabled=settings.get_change_probe_settings().get("enabled", False)),
+            "conversion": get_conversion_executor(settings.get_conversion_settings()).status(),
+            "conversion_cache": dict(conversion_cache.status(),
+                                     enabled=settings.get_conversion_cache_settings().get("enabled", True)),
+            "watermark_overlays": overlay_cache_info() if PDF_LIBRARIES_AVAILABLE else None,
+            "office_server": get_office_server(settings.get_office_server_settings()).status()
+                             if pdf_engine() == "libreoffice" else None,
+            "chrome_profiles": {
+                "mode": profile_mode,
+                "snapshots": [manager.summary() for manager in profile_managers()]
+            },
             "scheduler_running": scheduler.running
         })
     except Exception as e:
@@ -1095,6 +2123,20 @@ def status():
 
 
 if __name__ == '__main__':
+    # Kill Chrome left behind by a previous instance (it holds the profile lock)
+    reaped = chrome_watchdog.reap_orphans()
+    if reaped:
+        print(f"Reaped {reaped} orphaned Chrome process(es) from a previous run")
+    # ...and the throw-away profile copies those browsers were using
+    cleanup_run_profiles()
+    
+    # Scratch directories of conversions interrupted by a previous stop
+    get_conversion_executor(settings.get_conversion_settings()).cleanup_scratch()
+    
+    # Start the LibreOffice workers now instead of on the first conversion
+    if pdf_engine() == "libreoffice" and get_office_server(settings.get_office_server_settings()).start():
+        print("LibreOffice conversion server started")
+    
     # Start the scheduler
     scheduler.start()
     restart_scheduler()
@@ -1111,5 +2153,8 @@ if __name__ == '__main__':
         app.run(host='0.0.0.0', port=5004, debug=False)
     except (KeyboardInterrupt, SystemExit):
         scheduler.shutdown()
+        if browser_pool:
+            browser_pool.shutdown()
+        get_conversion_executor().shutdown()
         print("\nShutdown complete")
 
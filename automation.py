@@ -1,51 +1,100 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 import time
 from datetime import datetime
 import os
-import glob
-from pynput.keyboard import Controller, Key
-import win32gui
-import win32con
 import psutil
+try:
+    import win32gui
+    import win32con
+    WINDOW_MANAGEMENT_AVAILABLE = True
+except ImportError:
+    # Not on Windows (e.g. headless Linux workers): window management is skipped
+    WINDOW_MANAGEMENT_AVAILABLE = False
+from wait_conditions import (
+    PhaseTimer,
+    element_clickable,
+    element_present,
+    network_idle,
+    tab_selected,
+    table_rows_rendered,
+    list_download_dir,
+    download_started,
+    download_finalized,
+    first_of,
+)
+from download_manager import (
+    create_run_download_dir,
+    finalize_workbook,
+    point_driver_downloads,
+    remove_run_download_dir,
+    store_workbook_bytes,
+)
+from cdp_capture import capture_export_bytes
+from page_capture import print_report_pdf, save_full_page_screenshot
+from change_probe import probe_page
+from report_extractor import STRUCTURED_DATA_DIR, extract_structured_report, save_structured_report
+from selector_resolver import resolve_download_button
+from portal_errors import PAGE_ERROR_REASONS, PortalError, classify_failure, guarded
+from retry_engine import DEFAULT_RETRY_SETTINGS, run_step
+from process_metrics import ProcessTreeMonitor, driver_root_pid, process_tree
+from chrome_watchdog import get_watchdog, kill_processes
+import run_records
+from export_fetcher import (
+    ExportAuthExpired,
+    capture_export_request,
+    fetch_export,
+    load_export_request,
+    reset_capture,
+)
 
 
-def kill_chrome_process_tree(driver):
-    """Kill only the Chrome process created by this driver and its children"""
+DEFAULT_PORTAL_URL = 'https://tower.portoptimizer.com/'
+# Override (e.g. the offline mock_portal.py) with PORTOPTIMIZER_PORTAL_URL
+PORTAL_URL = (os.environ.get("PORTOPTIMIZER_PORTAL_URL") or DEFAULT_PORTAL_URL).rstrip("/") + "/"
+RETURN_SIGNAL_TAB_XPATH = "//span[@class='mdc-tab__text-label' and text()='Return Signal']"
+DEFAULT_TAB_LABEL = "Return Signal"
+DEFAULT_FILE_PREFIX = "POLA_Empty_Returns_"
+
+# Browser execution profiles:
+#   "desktop"  - visible, maximized Chrome with the GoFullPage extension (Windows)
+#   "headless" - lean headless Chrome for Linux workers: no extension, no window
+#                management, images/fonts/analytics blocked, eager page loads
+BROWSER_PROFILES = ("desktop", "headless")
+
+# URL patterns blocked in the headless profile (Network.setBlockedURLs)
+HEADLESS_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hotjar.com*", "*segment.io*", "*segment.com*", "*fullstory.com*",
+    "*intercom.io*", "*sentry.io*", "*newrelic.com*", "*nr-data.net*",
+]
+
+
+def kill_chrome_process_tree(driver, processes=None):
+    """
+    Kill only the Chrome process tree created by this driver
+
+    Args:
+        driver: Selenium driver whose chromedriver tree is killed
+        processes: Optional snapshot of the tree taken before quit() (once
+                   chromedriver exits, its Chrome children are re-parented and
+                   can no longer be found from its PID)
+    """
     try:
-        if not driver or not hasattr(driver, 'service') or not driver.service.process:
-            return 0
-        
-        # Get the ChromeDriver service process
-        chromedriver_pid = driver.service.process.pid
-        
-        # Find all child processes (Chrome instances)
-        killed_count = 0
-        parent = psutil.Process(chromedriver_pid)
-        children = parent.children(recursive=True)
-        
-        # Kill children first (Chrome browser processes)
-        for child in children:
-            try:
-                child.kill()
-                killed_count += 1
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        
-        # Kill the parent (ChromeDriver)
-        try:
-            parent.kill()
-            killed_count += 1
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
+        if processes is None:
+            chromedriver_pid = driver_root_pid(driver) if driver else None
+            if not chromedriver_pid:
+                return 0
+            processes = process_tree(chromedriver_pid)
         
+        # Children first, then ChromeDriver; waits for exit instead of sleeping
+        killed_count = kill_processes(processes)
         if killed_count > 0:
             print(f"[{datetime.now()}] Killed {killed_count} process(es) from this driver")
-            time.sleep(1)  # Wait for processes to fully terminate
         
         return killed_count
     except Exception as e:
@@ -55,6 +104,9 @@ def kill_chrome_process_tree(driver):
 
 def bring_chrome_to_front():
     """Force Chrome window to the front and set to fullscreen using aggressive methods"""
+    if not WINDOW_MANAGEMENT_AVAILABLE:
+        print(f"[{datetime.now()}] Window management not available on this platform, skipping")
+        return False
     try:
         def callback(hwnd, windows):
             if win32gui.IsWindowVisible(hwnd):
@@ -136,290 +188,832 @@ def bring_chrome_to_front():
         return False
 
 
-def download_excel_report(username, password):
+def default_user_data_dir(profile="desktop"):
+    """Persistent Chrome profile directory of an execution profile"""
+    profile_name = "chrome_profile_headless" if profile == "headless" else "chrome_profile"
+    return os.path.join(os.getcwd(), profile_name)
+
+
+def build_chrome_options(user_data_dir=None, download_dir=None, profile="desktop"):
     """
-    Automate login to PortOptimizer portal and download Excel report
+    Build Chrome options for the portal automation
     
     Args:
-        username: Portal username
-        password: Portal password
+        user_data_dir: Chrome profile directory (default: ./chrome_profile,
+                       ./chrome_profile_headless for the headless profile)
+        download_dir: Directory Chrome downloads into (default: ./downloads)
+        profile: "desktop" or "headless" (see BROWSER_PROFILES)
     
     Returns:
-        tuple: (success: bool, message: str)
+        Options: configured Chrome options
     """
-    driver = None
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(f"Unknown browser profile: {profile}")
+    headless = profile == "headless"
     
-    try:
-        # Setup Chrome options
-        chrome_options = Options()
+    # Setup Chrome options
+    chrome_options = Options()
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    if headless:
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--disable-extensions')
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        # Return control once the DOM is ready; readiness conditions do the rest
+        chrome_options.page_load_strategy = 'eager'
+    else:
         chrome_options.add_argument('--start-maximized')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Use persistent user data directory so extension permissions are remembered
-        user_data_dir = os.path.join(os.getcwd(), "chrome_profile")
-        os.makedirs(user_data_dir, exist_ok=True)
-        chrome_options.add_argument(f'--user-data-dir={user_data_dir}')
-        chrome_options.add_argument('--profile-directory=Default')
-        print(f"[{datetime.now()}] Using persistent Chrome profile at: {user_data_dir}")
-        
-        # Load GoFullPage extension
-        extension_path = os.path.join(os.getcwd(), "gofullpage.crx")
-        if os.path.exists(extension_path):
-            chrome_options.add_extension(extension_path)
-            print(f"[{datetime.now()}] GoFullPage extension loaded")
-        else:
-            print(f"[{datetime.now()}] WARNING: gofullpage.crx not found in project directory")
-        
-        # Set download preferences and grant extension permissions
+    
+    # Use persistent user data directory so extension permissions are remembered
+    if user_data_dir is None:
+        user_data_dir = default_user_data_dir(profile)
+    os.makedirs(user_data_dir, exist_ok=True)
+    chrome_options.add_argument(f'--user-data-dir={user_data_dir}')
+    chrome_options.add_argument('--profile-directory=Default')
+    print(f"[{datetime.now()}] Using persistent Chrome profile at: {user_data_dir}")
+    
+    # Load GoFullPage extension (desktop profile only)
+    extension_path = os.path.join(os.getcwd(), "gofullpage.crx")
+    if headless:
+        print(f"[{datetime.now()}] Headless profile: GoFullPage extension not loaded")
+    elif os.path.exists(extension_path):
+        chrome_options.add_extension(extension_path)
+        print(f"[{datetime.now()}] GoFullPage extension loaded")
+    else:
+        print(f"[{datetime.now()}] WARNING: gofullpage.crx not found in project directory")
+    
+    # Set download preferences and grant extension permissions
+    if download_dir is None:
         download_dir = os.path.join(os.getcwd(), "downloads")
-        os.makedirs(download_dir, exist_ok=True)
-        
-        prefs = {
-            "download.default_directory": download_dir,
-            "download.prompt_for_download": False,
-            "download.directory_upgrade": True,
-            "safebrowsing.enabled": True,
-            # Auto-grant all permissions for extensions (including downloads)
-            "profile.default_content_setting_values.automatic_downloads": 1,
-            # Disable extension permission prompts
-            "profile.content_settings.exceptions.automatic_downloads": {
-                "*,*": {"setting": 1}
-            }
+    os.makedirs(download_dir, exist_ok=True)
+    
+    prefs = {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True,
+        # Auto-grant all permissions for extensions (including downloads)
+        "profile.default_content_setting_values.automatic_downloads": 1,
+        # Disable extension permission prompts
+        "profile.content_settings.exceptions.automatic_downloads": {
+            "*,*": {"setting": 1}
         }
-        chrome_options.add_experimental_option("prefs", prefs)
-        
-        # Add arguments to disable permission prompts
-        chrome_options.add_argument('--disable-features=DownloadBubble,DownloadBubbleV2')
-        chrome_options.add_argument('--disable-popup-blocking')
-        
-        # Grant extension permissions at startup
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
-        chrome_options.add_argument('--no-first-run')
-        chrome_options.add_argument('--no-service-autorun')
-        chrome_options.add_argument('--password-store=basic')
-        
-        # Uncomment the line below to run in headless mode (without UI)
-        # NOTE: GoFullPage extension may not work in headless mode
-        # chrome_options.add_argument('--headless=new')
-        
-        # Initialize the driver
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        # Force Chrome window to front ONCE at startup
-        print(f"[{datetime.now()}] Forcing Chrome window to front...")
-        time.sleep(1)  # Brief wait for window to appear
-        bring_chrome_to_front()
-        driver.maximize_window()
-        print(f"[{datetime.now()}] Chrome window setup complete")
-        
-        # Wait for extension to fully initialize
-        print(f"[{datetime.now()}] Waiting for extension to initialize...")
-        time.sleep(5)
-        
-        # Check if this is first run - extension permission popup will appear
-        # On first run, user must manually click "Allow" for "Manage your downloads" permission
-        # After that, it will be remembered in the chrome_profile directory
-        print(f"[{datetime.now()}] NOTE: If extension permission popup appears, it will be auto-handled")
-        print(f"[{datetime.now()}] If it's the first run, the popup will appear during screenshot download")
+    }
+    if headless:
+        prefs["profile.managed_default_content_settings.images"] = 2
+    chrome_options.add_experimental_option("prefs", prefs)
+    
+    # Add arguments to disable permission prompts
+    chrome_options.add_argument('--disable-features=DownloadBubble,DownloadBubbleV2')
+    chrome_options.add_argument('--disable-popup-blocking')
+    
+    # Grant extension permissions at startup
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    chrome_options.add_argument('--no-first-run')
+    chrome_options.add_argument('--no-service-autorun')
+    chrome_options.add_argument('--password-store=basic')
+    
+    # Performance log exposes DevTools network events (used to capture the export request)
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    
+    return chrome_options
+
+
+def create_chrome_driver(user_data_dir=None, download_dir=None, timer=None, profile="desktop"):
+    """
+    Launch Chrome with the GoFullPage extension and wait for it to be ready
+    
+    Args:
+        user_data_dir: Chrome profile directory (default depends on profile)
+        download_dir: Directory Chrome downloads into (default: ./downloads)
+        timer: Optional PhaseTimer used for the extension init wait
+        profile: "desktop" or "headless" (see BROWSER_PROFILES)
+    
+    Returns:
+        WebDriver: initialized Chrome driver with only the main tab open
+    """
+    timer = timer or PhaseTimer()
+    chrome_options = build_chrome_options(user_data_dir, download_dir, profile)
+    
+    # Initialize the driver and record its PIDs so a crash cannot leave it running
+    driver = webdriver.Chrome(options=chrome_options)
+    get_watchdog().register(driver)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    
+    if profile == "headless":
+        # No window or extension to wait for; just cut the heavy/irrelevant requests
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": HEADLESS_BLOCKED_URLS})
+        print(f"[{datetime.now()}] Headless Chrome ready ({len(HEADLESS_BLOCKED_URLS)} URL patterns blocked)")
+        return driver
+    
+    # Force Chrome window to front ONCE at startup
+    print(f"[{datetime.now()}] Forcing Chrome window to front...")
+    time.sleep(1)  # Brief wait for window to appear
+    bring_chrome_to_front()
+    driver.maximize_window()
+    print(f"[{datetime.now()}] Chrome window setup complete")
+    
+    # Wait for extension to initialize (it opens a welcome tab on first load)
+    print(f"[{datetime.now()}] Waiting for extension to initialize...")
+    timer.wait(driver, "extension_init", lambda d: len(d.window_handles) > 1, optional=True)
+    
+    # Check if this is first run - extension permission popup will appear
+    # On first run, user must manually click "Allow" for "Manage your downloads" permission
+    # After that, it will be remembered in the chrome_profile directory
+    print(f"[{datetime.now()}] NOTE: If extension permission popup appears, it will be auto-handled")
+    print(f"[{datetime.now()}] If it's the first run, the popup will appear during screenshot download")
+    
+    # Close any extension welcome/onboarding tabs
+    try:
+        all_handles = driver.window_handles
+        if len(all_handles) > 1:
+            print(f"[{datetime.now()}] Closing extension welcome tabs ({len(all_handles)} tabs open)...")
+            main_handle = all_handles[0]
+            for handle in all_handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(main_handle)
+            print(f"[{datetime.now()}] Extension tabs closed")
+    except Exception as e:
+        print(f"[{datetime.now()}] Note: {str(e)}")
+    
+    return driver
+
+
+def quit_driver(driver):
+    """Quit the browser and make sure its whole process tree is gone"""
+    if not driver:
+        return
+    chromedriver_pid = driver_root_pid(driver)
+    # Snapshot the tree while chromedriver is still its parent
+    processes = process_tree(chromedriver_pid) if chromedriver_pid else []
+    try:
+        # First try graceful shutdown
+        driver.quit()
+        print(f"[{datetime.now()}] Browser quit() called")
         
-        # Close any extension welcome/onboarding tabs
+        # Force kill whatever is left to ensure complete cleanup (prevents profile lock)
+        print(f"[{datetime.now()}] Ensuring process cleanup...")
+        psutil.wait_procs(processes, timeout=2)
+        killed = kill_chrome_process_tree(driver, processes)
+        if killed > 0:
+            print(f"[{datetime.now()}] Cleaned up {killed} remaining process(es)")
+            
+    except Exception as e:
+        print(f"[{datetime.now()}] Error during cleanup: {str(e)}")
+        # Try to kill process tree as last resort
         try:
-            all_handles = driver.window_handles
-            if len(all_handles) > 1:
-                print(f"[{datetime.now()}] Closing extension welcome tabs ({len(all_handles)} tabs open)...")
-                main_handle = all_handles[0]
-                for handle in all_handles[1:]:
-                    driver.switch_to.window(handle)
-                    driver.close()
-                driver.switch_to.window(main_handle)
-                print(f"[{datetime.now()}] Extension tabs closed")
-        except Exception as e:
-            print(f"[{datetime.now()}] Note: {str(e)}")
-        
-        print(f"[{datetime.now()}] Navigating to portal...")
-        
-        # Navigate to the portal
-        driver.get('https://tower.portoptimizer.com/')
-        
-        # Wait 30 seconds for page to fully load
-        print(f"[{datetime.now()}] Waiting 30s for page to load...")
-        time.sleep(30)
-        
-        # Click the "Log In" button
+            kill_chrome_process_tree(driver, processes)
+        except:
+            pass
+    finally:
+        get_watchdog().unregister(chromedriver_pid)
+
+
+def tab_xpath(tab_label):
+    """XPath of a portal mdc-tab by its visible label"""
+    return f"//span[@class='mdc-tab__text-label' and text()='{tab_label}']"
+
+
+def report_filename(prefix=DEFAULT_FILE_PREFIX, extension=".xlsx"):
+    """
+    Standardized report filename with UTC timestamp for timezone independence
+    Format: POLA_Empty_Returns_YYYY-MM-DD_HH-MM-SS.xlsx
+    """
+    timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
+    return f"{prefix}{timestamp}{extension}"
+
+
+def login_to_portal(driver, username, password, timer, session_manager=None):
+    """
+    Make sure the driver is logged in to the portal dashboard.
+    
+    Probes the stored session first: if the dashboard (Return Signal tab) shows
+    up, either straight away or via Okta single sign-on after clicking Log In,
+    the identifier/passcode steps are skipped. Otherwise the full login runs.
+    
+    Returns:
+        bool: True if an existing session was reused, False if a full login ran
+    """
+    dashboard = element_clickable(By.XPATH, RETURN_SIGNAL_TAB_XPATH)
+    
+    if session_manager and session_manager.consume_force_login():
+        print(f"[{datetime.now()}] Fresh login requested - clearing stored cookies...")
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    elif driver.current_url.startswith(PORTAL_URL):
+        # Warm (pooled) driver still sitting on the portal: cheapest possible probe
+        if timer.wait(driver, "session_probe", dashboard, optional=True):
+            if session_manager:
+                session_manager.record_hit(driver)
+            return True
+    
+    print(f"[{datetime.now()}] Navigating to portal...")
+    driver.get(PORTAL_URL)
+    
+    # Either the dashboard (session still valid) or the "Log In" button appears
+    print(f"[{datetime.now()}] Waiting for portal page to load...")
+    state, element = timer.wait(
+        driver, "portal_load",
+        guarded(first_of({
+            "dashboard": dashboard,
+            "login": element_clickable(By.CSS_SELECTOR, "button.button.login"),
+        }), "portal_load", PAGE_ERROR_REASONS)
+    )
+    if state == "login":
         print(f"[{datetime.now()}] Clicking login button...")
-        login_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.button.login"))
-        )
-        login_button.click()
+        element.click()
         
-        # Wait 30 seconds for login page to load
-        print(f"[{datetime.now()}] Waiting 30s for login page...")
-        time.sleep(30)
-        
-        # Enter username
-        print(f"[{datetime.now()}] Entering username...")
-        username_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='identifier']"))
+        # Okta may still have a session and redirect straight back to the dashboard
+        print(f"[{datetime.now()}] Waiting for login page...")
+        state, element = timer.wait(
+            driver, "login_page",
+            guarded(first_of({
+                "dashboard": dashboard,
+                "login_form": element_present(By.CSS_SELECTOR, "input[name='identifier']"),
+            }), "login_page")
         )
-        username_field.clear()
-        username_field.send_keys(username)
-        
-        # Click "Next" button
-        print(f"[{datetime.now()}] Clicking Next button...")
-        next_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "input[type='submit'][value='Next']"))
-        )
-        next_button.click()
-        
-        # Wait 15 seconds for password field to appear
-        print(f"[{datetime.now()}] Waiting 15s for password field...")
-        time.sleep(15)
-        
-        # Enter password
-        print(f"[{datetime.now()}] Entering password...")
-        password_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='credentials.passcode']"))
+    
+    if state == "dashboard":
+        if session_manager:
+            session_manager.record_hit(driver)
+        return True
+    
+    # Enter username
+    print(f"[{datetime.now()}] Entering username...")
+    username_field = element
+    username_field.clear()
+    username_field.send_keys(username)
+    
+    # Click "Next" button
+    print(f"[{datetime.now()}] Clicking Next button...")
+    next_button = timer.wait(
+        driver, "next_button", element_clickable(By.CSS_SELECTOR, "input[type='submit'][value='Next']")
+    )
+    next_button.click()
+    
+    # Wait for password field to appear
+    print(f"[{datetime.now()}] Waiting for password field...")
+    password_field = timer.wait(
+        driver, "password_field",
+        guarded(element_clickable(By.CSS_SELECTOR, "input[name='credentials.passcode']"), "password_field")
+    )
+    
+    # Enter password
+    print(f"[{datetime.now()}] Entering password...")
+    password_field.clear()
+    password_field.send_keys(password)
+    
+    # Click "Verify" button
+    print(f"[{datetime.now()}] Clicking Verify button...")
+    verify_button = timer.wait(
+        driver, "verify_button", element_clickable(By.CSS_SELECTOR, "input[type='submit'][value='Verify']")
+    )
+    verify_button.click()
+    
+    # Wait for the dashboard so the new session's cookies are recorded; a rejected
+    # password, MFA prompt or lockout aborts right away instead of running out the budget
+    timer.wait(driver, "post_login", guarded(dashboard, "post_login"))
+    if session_manager:
+        session_manager.record_miss(driver)
+    return False
+
+
+def open_report_tab(driver, timer, tab_label=DEFAULT_TAB_LABEL):
+    """Open a report tab on the logged-in dashboard and wait for its table to settle"""
+    try:
+        report_tab = timer.wait(
+            driver, "return_signal_tab",
+            element_clickable(By.XPATH, tab_xpath(tab_label))
         )
-        password_field.clear()
-        password_field.send_keys(password)
+        print(f"[{datetime.now()}] Clicking {tab_label} tab...")
+        report_tab.click()
         
-        # Click "Verify" button
-        print(f"[{datetime.now()}] Clicking Verify button...")
-        verify_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "input[type='submit'][value='Verify']"))
+        # When switching from another tab, make sure the new one is active before
+        # the table check (the previous tab's rows would satisfy it otherwise)
+        timer.wait(
+            driver, "tab_selected",
+            tab_selected(By.XPATH, f"{tab_xpath(tab_label)}/ancestor::*[@role='tab'][1]"),
+            optional=True
         )
-        verify_button.click()
-        
-        # Wait 45 seconds for page to fully load
-        print(f"[{datetime.now()}] Waiting 45s for page to load after login...")
-        time.sleep(45)
         
-        # Click the "Return Signal" tab and wait 15 seconds
-        print(f"[{datetime.now()}] Looking for Return Signal tab...")
+        # Wait for the report table to render and its data requests to settle
+        print(f"[{datetime.now()}] Waiting for {tab_label} table...")
+        timer.wait(driver, "return_signal_table",
+                   guarded(table_rows_rendered(min_rows=1), "return_signal_table", PAGE_ERROR_REASONS))
+        timer.wait(driver, "return_signal_idle", network_idle(), optional=True)
+    except PortalError:
+        raise
+    except Exception as e:
+        print(f"[{datetime.now()}] Error: Could not find or click {tab_label} tab: {str(e)}")
+        raise Exception(f"Could not find {tab_label} tab: {str(e)}") from e
+
+
+def report_tab_open(driver, tab_label=DEFAULT_TAB_LABEL):
+    """Whether the report tab is already active with its table rendered (checked once, no waiting)"""
+    try:
+        return bool(tab_selected(By.XPATH, f"{tab_xpath(tab_label)}/ancestor::*[@role='tab'][1]")(driver)
+                    and table_rows_rendered(min_rows=1)(driver))
+    except Exception:
+        return False
+
+
+def ensure_report_tab(driver, timer, tab_label=DEFAULT_TAB_LABEL):
+    """Open the report tab unless it is already open (the export or probe left it there)"""
+    if report_tab_open(driver, tab_label):
+        return
+    open_report_tab(driver, timer, tab_label)
+
+
+def print_tab_pdf(driver, timer, tab_label, excel_filename, pdf_dir, watermark_for=None):
+    """
+    Print the report tab straight to PDF (Page.printToPDF) next to its workbook
+    
+    Args:
+        excel_filename: Workbook saved for this tab; the PDF gets the same name
+        pdf_dir: Directory the PDF is written to (downloads/pdfs)
+        watermark_for: Optional callable(pdf_filename) -> watermark text or None
+    
+    Returns:
+        str or None: PDF filename, None when printing failed (the caller can
+                     still convert the workbook)
+    """
+    pdf_filename = os.path.splitext(excel_filename)[0] + ".pdf"
+    with run_records.span("print_pdf", tab=tab_label) as print_span:
         try:
-            return_signal_tab = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//span[@class='mdc-tab__text-label' and text()='Return Signal']"))
-            )
-            print(f"[{datetime.now()}] Clicking Return Signal tab...")
-            return_signal_tab.click()
-            print(f"[{datetime.now()}] Waiting 15 seconds after clicking Return Signal tab...")
-            time.sleep(15)  # Wait 15 seconds as requested
+            # Only the direct HTTP export leaves the tab unopened
+            ensure_report_tab(driver, timer, tab_label)
+            watermark = watermark_for(pdf_filename) if watermark_for else None
+            print_report_pdf(driver, os.path.join(pdf_dir, pdf_filename), watermark)
+            return pdf_filename
         except Exception as e:
-            print(f"[{datetime.now()}] Error: Could not find or click Return Signal tab: {str(e)}")
-            raise Exception(f"Could not find Return Signal tab: {str(e)}")
-        
-        # Look for download button
-        print(f"[{datetime.now()}] Looking for download button...")
-        download_button = None
-        
-        # Try multiple selectors for the download button
-        selectors = [
-            "button[title='Download']",
-            "button[aria-label='Download']",
-            "button:contains('Download')",
-            "a[href*='download']",
-            "button[class*='download']",
-            "a[class*='download']",
-            "button[onclick*='download']",
-            "a[onclick*='download']"
-        ]
+            print(f"[{datetime.now()}] Could not print {tab_label} to PDF: {str(e)}")
+            print_span["ok"] = False
+            print_span["error"] = str(e)
+            return None
+
+
+def probe_tab(driver, timer, tab_label=DEFAULT_TAB_LABEL):
+    """
+    Open the report tab and fingerprint its table (see change_probe.py)
+    
+    Returns:
+        dict or None: probe_page result, None when the probe failed (the caller
+                      then exports as usual)
+    """
+    with run_records.span("change_probe", tab=tab_label) as probe_span:
+        try:
+            open_report_tab(driver, timer, tab_label)
+            probe = probe_page(driver)
+            probe_span["rows"] = probe["rows"]
+            return probe
+        except PortalError:
+            raise
+        except Exception as e:
+            print(f"[{datetime.now()}] Change probe failed for {tab_label}: {str(e)}")
+            probe_span["ok"] = False
+            probe_span["error"] = str(e)
+            return None
+
+
+def export_tab(driver, timer, download_dir, tab_label=DEFAULT_TAB_LABEL,
+               file_prefix=DEFAULT_FILE_PREFIX, export_mode="ui", username=None):
+    """
+    Export one portal tab in an already logged-in session
+    
+    Args:
+        driver: Logged-in driver whose downloads go to download_dir
+        timer: PhaseTimer recording this export's waits
+        download_dir: Empty per-export scratch directory
+        tab_label: Portal tab to export
+        file_prefix: Prefix of the saved workbook name
+        export_mode: "ui", "http" or "cdp" (see download_excel_report)
+        username: Portal account the driver is logged in as (recorded with the saved cookies)
+    
+    Returns:
+        str: Filename of the workbook saved in downloads/
+    """
+    # The captured HTTP export request belongs to the default Return Signal tab
+    capture_http = export_mode == "http" and tab_label == DEFAULT_TAB_LABEL
+    
+    # Direct HTTP export: skip the tab and Download button entirely
+    if capture_http and load_export_request():
+        final_filename = report_filename(file_prefix)
+        try:
+            success, message = fetch_export(os.path.join(download_dir, final_filename), driver=driver,
+                                            username=username)
+            if success:
+                return finalize_workbook(os.path.join(download_dir, final_filename), final_filename)
+            print(f"[{datetime.now()}] Direct export failed ({message}), falling back to Download button")
+        except ExportAuthExpired as e:
+            print(f"[{datetime.now()}] Direct export rejected ({str(e)}), falling back to Download button")
+        except Exception as e:
+            print(f"[{datetime.now()}] Direct export error ({str(e)}), falling back to Download button")
+        run_records.count("retries")
+    
+    # Dashboard is already up after login_to_portal; open the report's tab
+    # (the change probe may have opened it already)
+    ensure_report_tab(driver, timer, tab_label)
+    
+    # Look for download button (all candidate locators in one round trip, learned winner first)
+    print(f"[{datetime.now()}] Looking for download button...")
+    download_button = resolve_download_button(driver, timer, tab_label)
+    
+    if download_button and export_mode == "cdp":
+        # Workbook goes from the network response straight into downloads/
+        data = capture_export_bytes(driver, download_button, timer)
+        return store_workbook_bytes(data, report_filename(file_prefix))
+    elif download_button:
+        existing_files = list_download_dir(download_dir)
+        if capture_http:
+            reset_capture(driver)
+        print(f"[{datetime.now()}] Clicking download button...")
+        download_button.click()
+        print(f"[{datetime.now()}] Download button clicked")
         
-        for selector in selectors:
-            try:
-                if "contains" in selector:
-                    # Use XPath for text contains
-                    xpath_selector = f"//button[contains(text(), 'Download')]"
-                    download_button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, xpath_selector))
-                    )
-                else:
-                    download_button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                print(f"[{datetime.now()}] Found download button with selector: {selector}")
-                break
-            except:
-                continue
+        # Wait for the download to start, then for Chrome to finalize it (stable size, no partial file)
+        timer.wait(driver, "download_start", download_started(download_dir, existing_files))
+        downloaded_path = timer.wait(driver, "download_complete", download_finalized(download_dir))
+        print(f"[{datetime.now()}] Excel download complete")
         
-        if download_button:
-            print(f"[{datetime.now()}] Clicking download button...")
-            download_button.click()
-            print(f"[{datetime.now()}] Download button clicked")
-            
-            # Wait for download to complete
-            time.sleep(10)
-            print(f"[{datetime.now()}] Excel download should be complete")
+        if capture_http:
+            # Remember the request behind the button for direct exports next time
+            capture_export_request(driver, username)
+    else:
+        print(f"[{datetime.now()}] Download button not found")
+        print(f"[{datetime.now()}] Page source length: {len(driver.page_source)} characters")
+        if "download" in driver.page_source.lower():
+            print(f"[{datetime.now()}] Download text found in page source")
         else:
-            print(f"[{datetime.now()}] Download button not found")
-            print(f"[{datetime.now()}] Page source length: {len(driver.page_source)} characters")
-            if "download" in driver.page_source.lower():
-                print(f"[{datetime.now()}] Download text found in page source")
-            else:
-                print(f"[{datetime.now()}] Download text NOT found in page source")
-            raise Exception("Could not find download button")
-        
-        # Generate our standardized filename with UTC timestamp for timezone independence
-        # Format: POLA_Empty_Returns_YYYY-MM-DD_HH-MM-SS.xlsx
-        timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
-        final_filename = f"POLA_Empty_Returns_{timestamp}.xlsx"
+            print(f"[{datetime.now()}] Download text NOT found in page source")
+        raise Exception("Could not find download button")
+    
+    # Validate the workbook and move it into downloads/ under our standardized
+    # filename with UTC timestamp for timezone independence
+    return finalize_workbook(downloaded_path, report_filename(file_prefix))
+
+
+def download_excel_reports(username, password, exports, timeouts=None, phase_timer=None, driver=None,
+                           session_manager=None, export_mode="ui", browser_profile="desktop", user_data_dir=None,
+                           retry_settings=None, profile_manager=None, print_pdf_dir=None, watermark_for=None,
+                           extract_data=False, change_probe=None):
+    """
+    Log in once and export several portal tabs in the same session
+    
+    Args:
+        username: Portal username
+        password: Portal password
+        exports: List of dicts with "tab" and "file_prefix" (and an optional
+                 "label" used to tag the export's phase timings, e.g. a report id)
+        retry_settings: Optional step retry settings (see retry_engine.DEFAULT_RETRY_SETTINGS);
+                        a failed browser launch, login or tab export is retried in place
+                        without restarting the browser or logging in again
+        profile_manager: Optional ProfileManager; when this call starts its own driver
+                         without a user_data_dir, Chrome runs on a throw-away copy of
+                         the manager's profile snapshot
+        print_pdf_dir: When set, every exported tab is also printed to PDF in this
+                       directory (see print_tab_pdf); watermark_for gives its watermark
+        extract_data: Also save every exported tab's table as structured JSON read
+                      from the page (see extract_tab_data)
+        change_probe: Optional ChangeProbe; every tab is fingerprinted first and
+                      not exported when its data matches the last stored export
+        Other arguments: see download_excel_report
+    
+    Returns:
+        list: One dict per export, in order: label, tab, file_prefix, success,
+              filename, error, failure_reason, duration_seconds (and pdf_filename
+              when printing, data_filename when extracting, unchanged=True with
+              no filename when the change probe skipped the export)
+    """
+    owns_driver = driver is None
+    timer = phase_timer or PhaseTimer(timeouts)
+    results = []
+    run_dirs = []
+    retry = dict(DEFAULT_RETRY_SETTINGS)
+    retry.update(retry_settings or {})
+    step_retry = {
+        "attempts": retry["step_attempts"],
+        "base_seconds": retry["step_base_seconds"],
+        "max_seconds": retry["step_max_seconds"],
+        "jitter": retry["jitter"],
+    }
+    
+    monitor = None
+    run_profile_dir = None
+    logged_in = False
+    
+    try:
+        # Isolated scratch directory per export: only that export's download can land there
+        run_dirs.append(create_run_download_dir())
+        if owns_driver:
+            if profile_manager and user_data_dir is None:
+                run_profile_dir = user_data_dir = profile_manager.checkout()
+            with run_records.span("browser_launch", profile=browser_profile, snapshot=bool(run_profile_dir)):
+                launch_start = time.monotonic()
+                driver = run_step(
+                    "browser_launch",
+                    lambda: create_chrome_driver(user_data_dir=user_data_dir, download_dir=run_dirs[0],
+                                                 timer=timer, profile=browser_profile),
+                    **step_retry
+                )
+                if profile_manager:
+                    profile_manager.record_launch(time.monotonic() - launch_start, snapshot=bool(run_profile_dir))
+        else:
+            point_driver_downloads(driver, run_dirs[0])
+        run_records.instrument_driver(driver)
         
-        # Check downloads directory (where Chrome downloads files)
-        downloads_dir = "downloads"
-        os.makedirs(downloads_dir, exist_ok=True)
+        # Track CPU time and peak memory of the browser for this run
+        root_pid = driver_root_pid(driver)
+        if root_pid:
+            monitor = ProcessTreeMonitor(root_pid).start()
         
-        # Find the downloaded Excel file
-        downloaded_files = []
+        with run_records.span("login") as login_span:
+            login_span["session_reused"] = run_step(
+                "login",
+                lambda: login_to_portal(driver, username, password, timer, session_manager),
+                **step_retry
+            )
+        logged_in = True
         
-        # Check downloads directory
-        if os.path.exists(downloads_dir):
-            downloaded_files.extend(glob.glob(os.path.join(downloads_dir, "*.xlsx")))
-            downloaded_files.extend(glob.glob(os.path.join(downloads_dir, "*.xls")))
+        def resume_at_dashboard():
+            # Fresh scratch directory (the failed attempt may have left a partial
+            # file), then back to the dashboard in the same session
+            run_dirs.append(create_run_download_dir())
+            point_driver_downloads(driver, run_dirs[-1])
+            login_to_portal(driver, username, password, timer)
         
-        if downloaded_files:
-            # Get the most recent file
-            latest_file = max(downloaded_files, key=os.path.getctime)
-            final_path = os.path.join(downloads_dir, final_filename)
+        for index, export in enumerate(exports):
+            tab_label = export.get("tab", DEFAULT_TAB_LABEL)
+            file_prefix = export.get("file_prefix", DEFAULT_FILE_PREFIX)
+            timer.label = export.get("label") or (tab_label if len(exports) > 1 else None)
+            if index > 0:
+                run_dirs.append(create_run_download_dir())
+                point_driver_downloads(driver, run_dirs[-1])
             
-            # Rename to our standard format
-            os.rename(latest_file, final_path)
-            print(f"[{datetime.now()}] Excel file saved: {final_filename}")
-            return True, final_filename
-        else:
-            print(f"[{datetime.now()}] WARNING: Downloaded Excel file not found in {downloads_dir}")
-            print(f"[{datetime.now()}] Available files in downloads: {os.listdir(downloads_dir) if os.path.exists(downloads_dir) else 'Directory not found'}")
-            return True, "Excel file downloaded but filename unknown"
+            start = time.monotonic()
+            result = {"label": export.get("label"), "tab": tab_label, "file_prefix": file_prefix}
+            with run_records.span("tab_export", tab=tab_label, label=export.get("label"), mode=export_mode) as tab_span:
+                try:
+                    probe = probe_tab(driver, timer, tab_label) if change_probe else None
+                    probe_key = export.get("label") or tab_label
+                    if probe and change_probe.unchanged(probe_key, probe["fingerprint"], probe["marker"]):
+                        result.update(success=True, unchanged=True, filename=None, error=None, failure_reason=None)
+                        tab_span["unchanged"] = True
+                        run_records.count("unchanged")
+                        result["duration_seconds"] = round(time.monotonic() - start, 2)
+                        results.append(result)
+                        continue
+                    filename = run_step(
+                        f"export:{tab_label}",
+                        lambda: export_tab(driver, timer, run_dirs[-1], tab_label, file_prefix, export_mode,
+                                           username),
+                        recover=resume_at_dashboard,
+                        **step_retry
+                    )
+                    result.update(success=True, filename=filename, error=None, failure_reason=None)
+                    print(f"[{datetime.now()}] Exported {tab_label}: {filename}")
+                    if probe:
+                        change_probe.record(probe_key, probe["fingerprint"], probe["marker"])
+                    if print_pdf_dir:
+                        result["pdf_filename"] = print_tab_pdf(
+                            driver, timer, tab_label, filename, print_pdf_dir, watermark_for)
+                    if extract_data:
+                        result["data_filename"] = extract_tab_data(driver, timer, tab_label, filename)
+                except Exception as e:
+                    error_msg = f"Error downloading Excel report: {str(e)}"
+                    reason = classify_failure(e)
+                    print(f"[{datetime.now()}] {tab_label}: {error_msg} (reason: {reason})")
+                    result.update(success=False, filename=None, error=error_msg, failure_reason=reason)
+                    timer.failure_reason = timer.failure_reason or reason
+                    tab_span["ok"] = False
+                    tab_span["error"] = str(e)
+                    tab_span["failure_reason"] = reason
+                    if isinstance(e, PortalError) and not e.retryable:
+                        # Session-level problem (credentials, lockout, MFA): the other tabs would fail too
+                        raise
+            result["duration_seconds"] = round(time.monotonic() - start, 2)
+            results.append(result)
+        timer.label = None
     
     except Exception as e:
+        # Browser start or login failed: every export not yet attempted fails with it
+        timer.label = None
         error_msg = f"Error downloading Excel report: {str(e)}"
-        print(f"[{datetime.now()}] {error_msg}")
-        return False, error_msg
+        reason = classify_failure(e)
+        timer.failure_reason = timer.failure_reason or reason
+        print(f"[{datetime.now()}] {error_msg} (reason: {reason})")
+        for export in exports[len(results):]:
+            results.append({
+                "label": export.get("label"),
+                "tab": export.get("tab", DEFAULT_TAB_LABEL),
+                "file_prefix": export.get("file_prefix", DEFAULT_FILE_PREFIX),
+                "success": False,
+                "filename": None,
+                "error": error_msg,
+                "failure_reason": reason,
+                "duration_seconds": 0,
+            })
     
     finally:
-        # Close the browser
-        if driver:
-            try:
-                # First try graceful shutdown
-                driver.quit()
-                print(f"[{datetime.now()}] Browser quit() called")
-                time.sleep(1)  # Brief wait for quit() to complete
-                
-                # Force kill to ensure complete cleanup (prevents profile lock)
-                print(f"[{datetime.now()}] Ensuring process cleanup...")
-                killed = kill_chrome_process_tree(driver)
-                if killed > 0:
-                    print(f"[{datetime.now()}] Cleaned up {killed} remaining process(es)")
-                    
-            except Exception as e:
-                print(f"[{datetime.now()}] Error during cleanup: {str(e)}")
-                # Try to kill process tree as last resort
-                try:
-                    kill_chrome_process_tree(driver)
-                except:
-                    pass
-            
+        if monitor:
+            timer.resource_usage = monitor.stop()
+            print(f"[{datetime.now()}] Browser resource usage: {timer.resource_usage}")
+        
+        # Close the browser unless it belongs to the caller (browser pool)
+        if owns_driver:
+            quit_driver(driver)
+        if run_profile_dir:
+            # Keep the refreshed login in the snapshot, drop everything else the run stored
+            profile_manager.release(run_profile_dir, keep_auth=logged_in)
+        for run_dir in run_dirs:
+            remove_run_download_dir(run_dir)
+        
+        print(f"[{datetime.now()}] Phase waits: {timer.summary()} (total {timer.total_waited()}s)")
         print(f"[{datetime.now()}] Cleanup complete")
+    
+    return results
+
+
+def download_excel_report(username, password, timeouts=None, phase_timer=None, driver=None,
+                          session_manager=None, export_mode="ui", browser_profile="desktop",
+                          tab_label=DEFAULT_TAB_LABEL, file_prefix=DEFAULT_FILE_PREFIX, user_data_dir=None,
+                          retry_settings=None, profile_manager=None, print_pdf_dir=None, watermark_for=None,
+                          extract_data=False, change_probe=None):
+    """
+    Automate login to PortOptimizer portal and download Excel report
+    
+    Args:
+        username: Portal username
+        password: Portal password
+        timeouts: Optional dict of per-step timeout budgets (seconds)
+        phase_timer: Optional PhaseTimer that records how long each phase waited
+        driver: Optional already-initialized driver (e.g. from the browser pool).
+                When given, the caller owns it and it is left running afterwards.
+        session_manager: Optional PortalSessionManager used to reuse the stored
+                         login session and record hit/miss statistics
+        export_mode: "ui" clicks the Download button; "http" replays the captured
+                     export request with the browser's cookies (capturing it on
+                     the first run) and falls back to clicking when that fails;
+                     "cdp" clicks Download but captures the response in memory
+                     through DevTools instead of Chrome's download manager
+        browser_profile: "desktop" or "headless"; used when this call starts its own driver
+        tab_label: Portal tab to export (default: Return Signal)
+        file_prefix: Prefix of the saved workbook name (default: POLA_Empty_Returns_)
+        user_data_dir: Chrome profile directory when this call starts its own driver
+        retry_settings: Optional step retry settings (see retry_engine.DEFAULT_RETRY_SETTINGS)
+        profile_manager: Optional ProfileManager to run Chrome on a copy of its profile snapshot
+        print_pdf_dir: Also print the tab to PDF in this directory (Page.printToPDF)
+        watermark_for: Optional callable(pdf_filename) -> watermark text for the printed PDF
+        extract_data: Also save the tab's table as structured JSON in downloads/json/
+        change_probe: Optional ChangeProbe to skip the export when the tab has not changed
+    
+    Returns:
+        tuple: (success: bool, message: str); message is None when the change
+               probe found the tab unchanged and nothing was exported
+    """
+    result = download_excel_reports(
+        username, password,
+        [{"tab": tab_label, "file_prefix": file_prefix}],
+        timeouts=timeouts,
+        phase_timer=phase_timer,
+        driver=driver,
+        session_manager=session_manager,
+        export_mode=export_mode,
+        browser_profile=browser_profile,
+        user_data_dir=user_data_dir,
+        retry_settings=retry_settings,
+        profile_manager=profile_manager,
+        print_pdf_dir=print_pdf_dir,
+        watermark_for=watermark_for,
+        extract_data=extract_data,
+        change_probe=change_probe,
+    )[0]
+    if result["success"]:
+        return True, result["filename"]
+    return False, result["error"]
+
+
+def run_on_report_tab(username, password, action, tab_label=DEFAULT_TAB_LABEL, span_name="tab_action",
+                      timeouts=None, phase_timer=None, browser_profile="headless", user_data_dir=None,
+                      profile_manager=None, retry_settings=None):
+    """
+    Start a browser, log in, open a report tab and run action(driver) on it
+    
+    Every call starts its own browser, so calls can run in parallel as long as
+    each gets its own profile (user_data_dir or a profile_manager copy).
+    
+    Args:
+        action: Callable(driver) -> result, run once the tab's table has settled
+        span_name: Run record span around opening the tab and the action
+        Other arguments: see download_excel_reports
+    
+    Returns:
+        tuple: (success: bool, action result or error message)
+    """
+    timer = phase_timer or PhaseTimer(timeouts)
+    retry = dict(DEFAULT_RETRY_SETTINGS)
+    retry.update(retry_settings or {})
+    step_retry = {
+        "attempts": retry["step_attempts"],
+        "base_seconds": retry["step_base_seconds"],
+        "max_seconds": retry["step_max_seconds"],
+        "jitter": retry["jitter"],
+    }
+    driver = None
+    run_profile_dir = None
+    logged_in = False
+    try:
+        if profile_manager and user_data_dir is None:
+            run_profile_dir = user_data_dir = profile_manager.checkout()
+        with run_records.span("browser_launch", profile=browser_profile, snapshot=bool(run_profile_dir)):
+            driver = run_step(
+                "browser_launch",
+                lambda: create_chrome_driver(user_data_dir=user_data_dir, timer=timer, profile=browser_profile),
+                **step_retry
+            )
+        run_records.instrument_driver(driver)
+        with run_records.span("login"):
+            run_step("login", lambda: login_to_portal(driver, username, password, timer), **step_retry)
+        logged_in = True
+        with run_records.span(span_name, tab=tab_label):
+            open_report_tab(driver, timer, tab_label)
+            return True, action(driver)
+    except Exception as e:
+        reason = classify_failure(e)
+        timer.failure_reason = timer.failure_reason or reason
+        print(f"[{datetime.now()}] {span_name} of {tab_label} failed: {str(e)} (reason: {reason})")
+        return False, f"Error on {tab_label} tab: {str(e)}"
+    finally:
+        if driver:
+            quit_driver(driver)
+        if run_profile_dir:
+            profile_manager.release(run_profile_dir, keep_auth=logged_in)
+
+
+def capture_portal_screenshot(username, password, tab_label=DEFAULT_TAB_LABEL, screenshots_dir="screenshots",
+                              **options):
+    """
+    Log in and save a full-page screenshot of a report tab through DevTools
+    (no GoFullPage extension, keyboard shortcuts or foreground window needed)
+    
+    Args:
+        screenshots_dir: Directory the YYYY-MM-DD_HH-MM-SS.png file is written to
+        options: see run_on_report_tab
+    
+    Returns:
+        tuple: (success: bool, filename or error message: str)
+    """
+    return run_on_report_tab(
+        username, password,
+        lambda driver: save_full_page_screenshot(driver, screenshots_dir),
+        tab_label=tab_label, span_name="screenshot", **options
+    )
+
+
+def extract_report_data(username, password, tab_label=DEFAULT_TAB_LABEL, file_prefix=DEFAULT_FILE_PREFIX,
+                        data_dir=STRUCTURED_DATA_DIR, **options):
+    """
+    Log in and save the tab's table as structured JSON read from the DOM
+    (no Excel download or parsing)
+    
+    Args:
+        file_prefix: Prefix of the saved <prefix>YYYY-MM-DD_HH-MM-SS.json name
+        data_dir: Directory the JSON document is written to
+        options: see run_on_report_tab
+    
+    Returns:
+        tuple: (success: bool, filename or error message: str)
+    """
+    return run_on_report_tab(
+        username, password,
+        lambda driver: save_structured_report(
+            extract_structured_report(driver, tab_label), report_filename(file_prefix, ".json"), data_dir),
+        tab_label=tab_label, span_name="extract_data", **options
+    )
+
+
+def extract_tab_data(driver, timer, tab_label, excel_filename, data_dir=STRUCTURED_DATA_DIR):
+    """
+    Save the exported tab's table as structured JSON next to its workbook
+    
+    Returns:
+        str or None: JSON filename, None when the extraction failed
+    """
+    data_filename = os.path.splitext(excel_filename)[0] + ".json"
+    with run_records.span("extract_data", tab=tab_label) as extract_span:
+        try:
+            # Only the direct HTTP export leaves the tab unopened
+            ensure_report_tab(driver, timer, tab_label)
+            return save_structured_report(extract_structured_report(driver, tab_label), data_filename, data_dir)
+        except Exception as e:
+            print(f"[{datetime.now()}] Could not extract {tab_label} data: {str(e)}")
+            extract_span["ok"] = False
+            extract_span["error"] = str(e)
+            return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,267 @@
+"""
+Warm browser pool for the PortOptimizer automation
+
+Keeps one or more initialized Chrome drivers (extension loaded, welcome tabs
+closed) alive between runs so a download does not pay Chrome cold-start,
+profile load and extension init every time. Drivers are health-checked before
+being handed out and recycled after a number of runs or when their process
+tree uses too much memory. With a profile manager, every driver runs on its
+own copy of the profile snapshot, which is thrown away when it is recycled.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import psutil
+
+from automation import create_chrome_driver, quit_driver
+
+
+class PooledDriver:
+    """A Chrome driver owned by the pool plus its bookkeeping"""
+
+    def __init__(self, slot, driver, profile_dir):
+        self.slot = slot
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.created_at = datetime.now()
+        self.last_used = None
+        self.runs = 0
+
+    def memory_mb(self):
+        """Resident memory of chromedriver and all Chrome child processes (MB)"""
+        try:
+            service = getattr(self.driver, "service", None)
+            if not service or not service.process:
+                return 0.0
+            parent = psutil.Process(service.process.pid)
+            total = parent.memory_info().rss
+            for child in parent.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            return round(total / (1024 * 1024), 1)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0.0
+
+    def to_dict(self):
+        return {
+            "slot": self.slot,
+            "profile_dir": self.profile_dir,
+            "created_at": self.created_at.isoformat(),
+            "last_used": self.last_used.isoformat() if self.last_used else None,
+            "runs": self.runs,
+            "memory_mb": self.memory_mb(),
+        }
+
+
+class BrowserPool:
+    """Thread-safe pool of warm Chrome drivers"""
+
+    def __init__(self, size=1, max_runs=20, max_memory_mb=1500, driver_factory=None, browser_profile="desktop",
+                 profile_manager=None):
+        """
+        size: Maximum number of drivers kept alive (each gets its own profile dir)
+        max_runs: Recycle a driver after this many runs
+        max_memory_mb: Recycle a driver whose process tree exceeds this RSS
+        driver_factory: Callable(user_data_dir) -> WebDriver (default: create_chrome_driver)
+        browser_profile: "desktop" or "headless" execution profile for new drivers
+        profile_manager: Optional ProfileManager; drivers then start on a copy of its
+                         snapshot instead of a persistent slot profile
+        """
+        self.size = max(1, int(size))
+        self.max_runs = max_runs
+        self.max_memory_mb = max_memory_mb
+        self.browser_profile = browser_profile
+        self.profile_manager = profile_manager
+        self.driver_factory = driver_factory or (
+            lambda profile_dir: create_chrome_driver(user_data_dir=profile_dir, profile=browser_profile)
+        )
+        self._idle = []
+        self._in_use = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self.stats = {"created": 0, "reused": 0, "recycled": 0, "unhealthy": 0}
+
+    def _profile_dir(self, slot):
+        """Slot 0 keeps the original profile directory; extra slots get their own copy"""
+        base = "chrome_profile_headless" if self.browser_profile == "headless" else "chrome_profile"
+        if slot == 0:
+            return os.path.join(os.getcwd(), base)
+        return os.path.join(os.getcwd(), f"{base}_pool_{slot}")
+
+    def _free_slot(self):
+        used = {pooled.slot for pooled in self._idle} | {pooled.slot for pooled in self._in_use.values()}
+        for slot in range(self.size):
+            if slot not in used:
+                return slot
+        return None
+
+    def _create(self, slot):
+        profile_dir = self.profile_manager.checkout() if self.profile_manager else self._profile_dir(slot)
+        print(f"[{datetime.now()}] Browser pool: starting driver in slot {slot}...")
+        start = time.monotonic()
+        try:
+            driver = self.driver_factory(profile_dir)
+        except Exception:
+            if self.profile_manager:
+                self.profile_manager.release(profile_dir, keep_auth=False)
+            raise
+        elapsed = time.monotonic() - start
+        if self.profile_manager:
+            self.profile_manager.record_launch(elapsed, snapshot=True)
+        self.stats["created"] += 1
+        print(f"[{datetime.now()}] Browser pool: slot {slot} ready in {elapsed:.1f}s")
+        return PooledDriver(slot, driver, profile_dir)
+
+    def _destroy(self, pooled, reason):
+        print(f"[{datetime.now()}] Browser pool: recycling slot {pooled.slot} ({reason})")
+        quit_driver(pooled.driver)
+        if self.profile_manager:
+            # Keep the driver's login in the snapshot, drop its cache and history
+            self.profile_manager.release(pooled.profile_dir, keep_auth=True)
+        self.stats["recycled"] += 1
+
+    def is_healthy(self, pooled):
+        """Cheap liveness check: the driver answers a script call and has a window"""
+        try:
+            if pooled.driver.execute_script("return 1") != 1:
+                return False
+            return len(pooled.driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def _needs_recycle(self, pooled):
+        if self.max_runs and pooled.runs >= self.max_runs:
+            return f"reached {pooled.runs} runs"
+        if self.max_memory_mb:
+            memory = pooled.memory_mb()
+            if memory > self.max_memory_mb:
+                return f"using {memory} MB"
+        return None
+
+    def acquire(self, timeout=None):
+        """
+        Get a healthy driver, starting one if a slot is free.
+        Blocks until a driver is available or timeout (seconds) expires.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            slot = None
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Browser pool is shut down")
+                while not self._idle and self._free_slot() is None:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No browser available in pool")
+                    self._condition.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._in_use[id(pooled)] = pooled
+                else:
+                    slot = self._free_slot()
+                    pooled = None
+                    # Reserve the slot while the driver starts outside the lock
+                    self._in_use[("starting", slot)] = PooledDriver(slot, None, self._profile_dir(slot))
+
+            if pooled is None:
+                try:
+                    pooled = self._create(slot)
+                finally:
+                    with self._condition:
+                        self._in_use.pop(("starting", slot), None)
+                        self._condition.notify_all()
+                with self._condition:
+                    self._in_use[id(pooled)] = pooled
+                return pooled
+
+            if self.is_healthy(pooled):
+                self.stats["reused"] += 1
+                return pooled
+
+            self.stats["unhealthy"] += 1
+            self._destroy(pooled, "failed health check")
+            with self._condition:
+                self._in_use.pop(id(pooled), None)
+                self._condition.notify_all()
+
+    def release(self, pooled, recycle=False):
+        """Return a driver to the pool (or recycle it if it is worn out)"""
+        pooled.runs += 1
+        pooled.last_used = datetime.now()
+        reason = "run failed" if recycle else self._needs_recycle(pooled)
+        if reason is None and not self.is_healthy(pooled):
+            reason = "failed health check"
+        with self._condition:
+            self._in_use.pop(id(pooled), None)
+            if reason is None and not self._closed:
+                self._idle.append(pooled)
+                self._condition.notify_all()
+                return
+        self._destroy(pooled, reason or "pool closed")
+        with self._condition:
+            self._condition.notify_all()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Context manager yielding {"driver": WebDriver, "failed": False}.
+        Set holder["failed"] = True to have the driver recycled instead of kept.
+        """
+        pooled = self.acquire(timeout)
+        holder = {"driver": pooled.driver, "failed": False}
+        try:
+            yield holder
+        except Exception:
+            holder["failed"] = True
+            raise
+        finally:
+            self.release(pooled, recycle=holder["failed"])
+
+    def prewarm(self):
+        """Make sure at least one healthy idle driver is ready"""
+        with self._condition:
+            if self._closed:
+                return False
+            idle = list(self._idle)
+        for pooled in idle:
+            if self.is_healthy(pooled):
+                print(f"[{datetime.now()}] Browser pool: warm driver already available (slot {pooled.slot})")
+                return True
+        try:
+            pooled = self.acquire(timeout=0)
+        except TimeoutError:
+            print(f"[{datetime.now()}] Browser pool: all drivers busy, nothing to pre-warm")
+            return False
+        # Not a real run, so do not count it towards max_runs
+        pooled.runs -= 1
+        self.release(pooled)
+        return True
+
+    def shutdown(self):
+        """Quit all idle drivers; drivers in use are quit when released"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            self._destroy(pooled, "shutdown")
+
+    def status(self):
+        """Pool state for the status endpoint"""
+        with self._condition:
+            idle = [pooled.to_dict() for pooled in self._idle]
+            in_use = [pooled.slot for pooled in self._in_use.values()]
+        return {
+            "browser_profile": self.browser_profile,
+            "size": self.size,
+            "max_runs": self.max_runs,
+            "max_memory_mb": self.max_memory_mb,
+            "idle": idle,
+            "in_use_slots": in_use,
+            "stats": dict(self.stats),
+        }
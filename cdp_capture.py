@@ -0,0 +1,217 @@
+"""
+In-memory capture of the Return Signal export via Chrome DevTools
+
+Before the Download button is clicked, responses are paused at the response
+stage (Fetch.enable with requestStage "Response") on a DevTools session of the
+driver's tab. The export response's body is read with Fetch.getResponseBody
+and the request is then fulfilled with an empty response, so Chrome never
+starts a download. When the portal builds the file client-side and hands it to
+a blob: URL instead, it is read back from a hook on URL.createObjectURL.
+
+Chrome's download manager is switched to "deny" for the duration (that keeps
+blob downloads off the disk) and pointed back at the driver's previous
+download directory afterwards.
+"""
+import base64
+import threading
+from datetime import datetime
+
+from download_manager import driver_download_dir, point_driver_downloads
+from export_fetcher import is_export_response
+
+try:
+    import trio
+    TRIO_AVAILABLE = True
+except ImportError:
+    TRIO_AVAILABLE = False
+
+
+# Keeps every Blob the page turns into an object URL so it can be read back
+BLOB_HOOK_SCRIPT = """
+if (!window.__poCapturedBlobs) {
+    window.__poCapturedBlobs = [];
+    var originalCreateObjectURL = URL.createObjectURL;
+    URL.createObjectURL = function(obj) {
+        if (obj instanceof Blob) { window.__poCapturedBlobs.push(obj); }
+        return originalCreateObjectURL.apply(this, arguments);
+    };
+}
+window.__poCapturedBlobs.length = 0;
+"""
+
+READ_BLOB_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var blobs = window.__poCapturedBlobs || [];
+if (!blobs.length) { done(null); return; }
+var reader = new FileReader();
+reader.onload = function() { done(reader.result.split(',')[1]); };
+reader.onerror = function() { done(null); };
+reader.readAsDataURL(blobs[blobs.length - 1]);
+"""
+
+SPREADSHEET_MIME_HINTS = ("spreadsheet", "excel")
+
+# Seconds to wait for the DevTools session to be attached before clicking
+INTERCEPT_START_TIMEOUT = 10
+
+
+class CaptureNotFound(Exception):
+    """The export response could not be captured from the page"""
+
+
+def _looks_like_export(response):
+    mime = response.get("mimeType", "").lower()
+    return is_export_response(response) or any(hint in mime for hint in SPREADSHEET_MIME_HINTS)
+
+
+def paused_response(headers):
+    """Network.Response-like dict (headers, mimeType) of a paused response's header entries"""
+    headers = {entry.name: entry.value for entry in headers or []}
+    content_type = next((value for name, value in headers.items() if name.lower() == "content-type"), "")
+    return {"headers": headers, "mimeType": content_type.split(";")[0].strip()}
+
+
+def _set_download_behavior(driver, behavior):
+    try:
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": behavior})
+    except Exception:
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": behavior})
+
+
+class ResponseInterceptor:
+    """
+    Pauses the tab's responses at the response stage on a DevTools session run
+    in a background thread, keeps the body of the first export response and
+    answers that request itself (empty 204), letting every other response through
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.data = None
+        self.error = None
+        self._armed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Attach to the tab and enable interception (raises when DevTools is not reachable)"""
+        if not TRIO_AVAILABLE:
+            raise RuntimeError("trio not available")
+        self._thread = threading.Thread(target=trio.run, args=(self._run,), name="cdp-capture", daemon=True)
+        self._thread.start()
+        if not self._armed.wait(INTERCEPT_START_TIMEOUT):
+            self.stop()
+            raise RuntimeError("DevTools session did not attach in time")
+        if self.error:
+            raise self.error
+
+    def stop(self):
+        """Disable interception and close the DevTools session"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    async def _run(self):
+        try:
+            async with self.driver.bidi_connection() as connection:
+                session, fetch = connection.session, connection.devtools.fetch
+                await session.execute(fetch.enable(patterns=[
+                    fetch.RequestPattern(url_pattern="*", request_stage=fetch.RequestStage.RESPONSE)
+                ]))
+                paused = session.listen(fetch.RequestPaused)
+                self._armed.set()
+                try:
+                    while not self._stop.is_set():
+                        event = None
+                        with trio.move_on_after(0.2):
+                            event = await paused.receive()
+                        if event is not None:
+                            await self._handle(session, fetch, event)
+                finally:
+                    with trio.move_on_after(2):
+                        await session.execute(fetch.disable())
+        except Exception as e:
+            self.error = e
+        finally:
+            self._armed.set()
+
+    async def _handle(self, session, fetch, event):
+        try:
+            response = paused_response(event.response_headers)
+            if self.data is None and event.response_status_code == 200 and _looks_like_export(response):
+                body, base64_encoded = await session.execute(fetch.get_response_body(event.request_id))
+                self.data = base64.b64decode(body) if base64_encoded else body.encode("latin-1")
+                # The page gets an empty response: Chrome has nothing to download
+                await session.execute(fetch.fulfill_request(event.request_id, response_code=204))
+            else:
+                await session.execute(fetch.continue_request(event.request_id))
+        except Exception as e:
+            print(f"[{datetime.now()}] Paused response {event.request_id} not handled: {str(e)}")
+
+
+def prepare_capture(driver):
+    """
+    Arm the capture before clicking Download: intercept responses, hook blob
+    creation and stop Chrome saving downloads.
+
+    Returns:
+        ResponseInterceptor or None when only the blob hook is available
+    """
+    interceptor = ResponseInterceptor(driver)
+    try:
+        interceptor.start()
+    except Exception as e:
+        print(f"[{datetime.now()}] Response interception not available ({str(e)}), capturing blobs only")
+        interceptor = None
+    driver.execute_script(BLOB_HOOK_SCRIPT)
+    _set_download_behavior(driver, "deny")
+    return interceptor
+
+
+def finish_capture(driver, interceptor=None):
+    """Stop intercepting and send downloads to the driver's previous download directory again"""
+    if interceptor:
+        interceptor.stop()
+    try:
+        download_dir = driver_download_dir(driver)
+        if download_dir:
+            point_driver_downloads(driver, download_dir)
+        else:
+            _set_download_behavior(driver, "default")
+    except Exception as e:
+        print(f"[{datetime.now()}] Could not restore download behavior: {str(e)}")
+
+
+def export_captured(interceptor=None):
+    """
+    Readiness condition for PhaseTimer: returns the workbook bytes once the
+    export response was intercepted (or a blob was created), else False.
+    """
+    def _predicate(drv):
+        if interceptor is not None and interceptor.data is not None:
+            return interceptor.data
+        encoded = drv.execute_async_script(READ_BLOB_SCRIPT)
+        if encoded:
+            return base64.b64decode(encoded)
+        return False
+    return _predicate
+
+
+def capture_export_bytes(driver, download_button, timer):
+    """
+    Click the Download button and return the workbook bytes captured in memory.
+
+    Raises:
+        StepTimeout / CaptureNotFound: nothing was captured within the download budget
+    """
+    interceptor = prepare_capture(driver)
+    try:
+        print(f"[{datetime.now()}] Clicking download button (DevTools capture)...")
+        download_button.click()
+        data = timer.wait(driver, "download_complete", export_captured(interceptor))
+    finally:
+        finish_capture(driver, interceptor)
+    if not data:
+        raise CaptureNotFound("Export response was not captured")
+    print(f"[{datetime.now()}] Captured workbook in memory ({len(data)} bytes)")
+    return data
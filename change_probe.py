@@ -0,0 +1,192 @@
+"""
+Change probe for scheduled report runs
+
+Most scheduled runs export a Return Signal table that has not changed since
+the previous run. Before a tab is exported, the probe fingerprints what the
+portal currently shows (a hash of the table rows, read in one script call)
+and compares it with the fingerprint of the last export that was stored. When
+they match, the run records the tab as "unchanged" and skips the download,
+the PDF conversion and the storage of yet another identical file.
+
+Browserless runs have no page to read; they fingerprint the downloaded
+workbook's cell values instead (the file bytes differ on every export) and
+skip finalizing, converting and storing it.
+
+The page's "last updated" text is kept with each fingerprint for reference
+only: the portal refreshes it on reloads even when the data stays the same.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from report_extractor import EXTRACT_TABLE_SCRIPT
+
+
+# Text of the portal's "Last updated ..." marker, or null when the page has none
+LAST_UPDATED_SCRIPT = """
+var marker = document.querySelector('#last-updated, [data-last-updated], [class*="last-updated"], [class*="lastUpdated"]');
+if (marker) { return (marker.innerText || marker.textContent || '').trim(); }
+var candidates = document.querySelectorAll('p, span, div, small');
+for (var i = 0; i < candidates.length; i++) {
+    var text = (candidates[i].innerText || '').trim();
+    if (text.length < 80 && /last\\s+updated|as\\s+of/i.test(text)) { return text; }
+}
+return null;
+"""
+
+
+def rows_fingerprint(rows):
+    """Stable hash of a table given as lists of cell values"""
+    normalized = [[str(value if value is not None else "").strip() for value in row] for row in rows]
+    return hashlib.sha256(json.dumps(normalized, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def probe_page(driver):
+    """
+    Fingerprint of the report table currently shown in the browser
+
+    Returns:
+        dict: fingerprint, rows and the page's last-updated marker (or None)
+
+    Raises:
+        Exception: when the page has no report table
+    """
+    rows = driver.execute_script(EXTRACT_TABLE_SCRIPT)
+    if rows is None:
+        raise Exception("No report table found on the page")
+    try:
+        marker = driver.execute_script(LAST_UPDATED_SCRIPT)
+    except Exception:
+        marker = None
+    return {"fingerprint": rows_fingerprint(rows), "rows": len(rows), "marker": marker}
+
+
+def workbook_fingerprint(path):
+    """Fingerprint of a workbook's cell values (every sheet), independent of file metadata"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = []
+        for sheet in workbook.worksheets:
+            rows.append([sheet.title])
+            rows.extend(list(row) for row in sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+    return rows_fingerprint(rows)
+
+
+class ChangeProbe:
+    """Fingerprints of the last stored export per report, with skip statistics"""
+
+    STATE_FILE = "change_probe.json"
+
+    DEFAULT_STATE = {
+        "reports": {},    # key -> fingerprint, marker, exported_at, last_checked_at, last_changed
+        "changed": 0,     # Probes that found new data (or no previous export)
+        "unchanged": 0,   # Probes that let a run skip the export
+    }
+
+    # Fraction of max_unchanged_hours by which an export counts as old early. exported_at is
+    # written minutes into a run, so with the cap equal to the schedule interval the next
+    # run would otherwise still see it as fresh and only every other run would export.
+    AGE_MARGIN = 0.1
+
+    def __init__(self, max_unchanged_hours=24, state_file=None):
+        """
+        max_unchanged_hours: Export anyway when the last stored export is older
+                             than this, so the stored files never get too old
+                             (0 = skip for as long as nothing changes)
+        """
+        self.max_unchanged_hours = max_unchanged_hours
+        self.state_file = state_file or self.STATE_FILE
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        """Load probe state from file"""
+        state = {}
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    state = json.load(f)
+            except Exception as e:
+                print(f"Error loading change probe state: {e}")
+        state = {**self.DEFAULT_STATE, **state}
+        state["reports"] = dict(state["reports"])
+        return state
+
+    def _save_state(self, state):
+        """Save probe state to file"""
+        try:
+            temp_file = self.state_file + ".tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(state, f, indent=4)
+            os.replace(temp_file, self.state_file)
+            return True
+        except Exception as e:
+            print(f"Error saving change probe state: {e}")
+            return False
+
+    def unchanged(self, key, fingerprint, marker=None):
+        """
+        Whether the report's data matches its last stored export (and that
+        export is recent enough to keep serving)
+        """
+        with self._lock:
+            state = self._load_state()
+            entry = state["reports"].get(key)
+            now = datetime.now()
+            unchanged = bool(entry) and entry.get("fingerprint") == fingerprint
+            if unchanged and self.max_unchanged_hours and entry.get("exported_at"):
+                age = now - datetime.fromisoformat(entry["exported_at"])
+                unchanged = age < timedelta(hours=self.max_unchanged_hours * (1 - self.AGE_MARGIN))
+            state["unchanged" if unchanged else "changed"] += 1
+            if entry:
+                entry["last_checked_at"] = now.isoformat()
+                entry["last_changed"] = not unchanged
+                entry["marker"] = marker if marker is not None else entry.get("marker")
+            self._save_state(state)
+        if unchanged:
+            print(f"[{datetime.now()}] Change probe: '{key}' unchanged since {entry['exported_at']}"
+                  + (f" ({marker})" if marker else ""))
+        return unchanged
+
+    def record(self, key, fingerprint, marker=None):
+        """Remember the fingerprint of an export that was stored"""
+        if not fingerprint:
+            return
+        with self._lock:
+            state = self._load_state()
+            now = datetime.now().isoformat()
+            state["reports"][key] = {
+                "fingerprint": fingerprint,
+                "marker": marker,
+                "exported_at": now,
+                "last_checked_at": now,
+                "last_changed": True,
+            }
+            self._save_state(state)
+
+    def forget(self, key=None):
+        """Drop the stored fingerprint of one report (or all), forcing the next export"""
+        with self._lock:
+            state = self._load_state()
+            if key is None:
+                state["reports"] = {}
+            else:
+                state["reports"].pop(key, None)
+            self._save_state(state)
+
+    def status(self):
+        """Skip statistics and the stored fingerprint per report"""
+        state = self._load_state()
+        probes = state["changed"] + state["unchanged"]
+        return {
+            "changed": state["changed"],
+            "unchanged": state["unchanged"],
+            "skip_rate": round(state["unchanged"] / probes, 3) if probes else None,
+            "max_unchanged_hours": self.max_unchanged_hours,
+            "reports": state["reports"],
+        }
@@ -0,0 +1,368 @@
+"""
+Chrome process watchdog and orphan reaper
+
+Every chromedriver the automation starts is recorded in chrome_pids.json
+together with the PID of the service process that owns it. The watchdog:
+
+- reaps orphans on startup and on a timer: registered browsers whose owner
+  process is gone (e.g. the service died mid-run), and Chrome processes that no
+  live registered driver accounts for on a profile directory only the service
+  creates (run copies, snapshots, worker and pool profiles). Unregistered
+  Chrome on the persistent chrome_profile may be a tester script's or a
+  developer's and is left alone;
+- enforces per-browser caps: a browser tree above max_rss_mb, or above
+  max_cpu_percent for cpu_strikes checks in a row, is killed;
+- reports live per-browser resource usage for the admin endpoint.
+"""
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import psutil
+
+from process_metrics import process_tree
+from profile_manager import PROFILE_SNAPSHOTS_DIR, RUN_PROFILES_DIR
+
+
+PID_REGISTRY_FILE = "chrome_pids.json"
+MAX_WATCHDOG_EVENTS = 50
+
+DEFAULT_WATCHDOG_SETTINGS = {
+    "enabled": True,
+    "interval_seconds": 60,      # How often orphans are reaped and caps enforced
+    "max_rss_mb": 3000,          # Kill a browser tree using more memory than this
+    "max_cpu_percent": 95,       # Kill a browser tree pegging the CPU above this...
+    "cpu_strikes": 5,            # ...for this many checks in a row
+}
+
+CHROME_PROCESS_NAMES = ("chrome", "chromedriver", "google chrome", "chromium")
+
+# Directories (below the base directory) holding profiles only the service creates:
+# snapshots and run copies (profile_manager), worker profiles (report_runner)
+SERVICE_PROFILE_DIRS = (PROFILE_SNAPSHOTS_DIR, RUN_PROFILES_DIR, "chrome_profiles")
+# Extra browser pool slots (browser_pool.BrowserPool._profile_dir)
+POOL_PROFILE_PATTERN = re.compile(r"^chrome_profile(_headless)?_pool_\d+$")
+
+# Unregistered Chrome younger than this may still be starting up (registered right after launch)
+LAUNCH_GRACE_SECONDS = 60
+
+
+def kill_processes(processes, timeout=3):
+    """
+    Kill the given processes (children before parents) and wait up to timeout
+    seconds for them to exit instead of sleeping a fixed time.
+
+    Returns:
+        int: number of processes that were still running and are now gone
+    """
+    targets = []
+    for process in reversed(processes):
+        try:
+            if process.is_running():
+                process.kill()
+                targets.append(process)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    if not targets:
+        return 0
+    gone, alive = psutil.wait_procs(targets, timeout=timeout)
+    if alive:
+        print(f"[{datetime.now()}] {len(alive)} process(es) still alive after kill: {[p.pid for p in alive]}")
+    return len(gone)
+
+
+def kill_process_tree(root_pid, timeout=3):
+    """Kill a process and all of its descendants; returns the number killed"""
+    return kill_processes(process_tree(root_pid), timeout)
+
+
+def _is_chrome(process):
+    try:
+        name = (process.name() or "").lower()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+    return any(chrome_name in name for chrome_name in CHROME_PROCESS_NAMES)
+
+
+def _user_data_dir(cmdline):
+    for argument in cmdline or []:
+        if argument.startswith("--user-data-dir="):
+            return os.path.normcase(os.path.abspath(argument.split("=", 1)[1]))
+    return None
+
+
+def _driver_profile_dir(driver):
+    """--user-data-dir the driver's Chrome was started with, if known"""
+    capabilities = getattr(driver, "capabilities", None) or {}
+    chrome = capabilities.get("chrome", {})
+    return chrome.get("userDataDir")
+
+
+class ChromeWatchdog:
+    """Tracks spawned browsers, reaps orphans and enforces RSS/CPU caps"""
+
+    REGISTRY_FILE = PID_REGISTRY_FILE
+
+    def __init__(self, registry_file=None, settings=None, base_dir=None):
+        self.registry_file = registry_file or self.REGISTRY_FILE
+        self.settings = dict(DEFAULT_WATCHDOG_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        # Unregistered Chrome is only reaped on service-created profiles below this directory
+        self.base_dir = os.path.normcase(os.path.abspath(base_dir or os.getcwd()))
+        self.owner_pid = os.getpid()
+        self.owner_create_time = psutil.Process(self.owner_pid).create_time()
+        self.events = []
+        self.stats = {"orphans_reaped": 0, "cap_kills": 0, "checks": 0}
+        self._cpu_samples = {}   # root pid -> (cpu seconds, monotonic time)
+        self._cpu_strikes = {}
+        self._lock = threading.Lock()
+
+    # Registry file
+
+    def _load_registry(self):
+        if not os.path.exists(self.registry_file):
+            return {}
+        try:
+            with open(self.registry_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading Chrome PID registry: {e}")
+            return {}
+
+    def _save_registry(self, registry):
+        try:
+            temp_path = self.registry_file + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(registry, f, indent=4)
+            os.replace(temp_path, self.registry_file)
+            return True
+        except Exception as e:
+            print(f"Error saving Chrome PID registry: {e}")
+            return False
+
+    def _event(self, kind, pid, detail):
+        event = {"at": datetime.now().isoformat(), "event": kind, "pid": pid, "detail": detail}
+        self.events = (self.events + [event])[-MAX_WATCHDOG_EVENTS:]
+        print(f"[{datetime.now()}] Chrome watchdog: {kind} pid {pid} ({detail})")
+
+    def register(self, driver, profile_dir=None):
+        """Record a newly started driver's chromedriver PID (and its profile directory)"""
+        service = getattr(driver, "service", None)
+        process = getattr(service, "process", None) if service else None
+        if not process:
+            return None
+        pid = process.pid
+        try:
+            create_time = psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            create_time = None
+        entry = {
+            "pid": pid,
+            "create_time": create_time,
+            "owner_pid": self.owner_pid,
+            "owner_create_time": self.owner_create_time,
+            "profile_dir": profile_dir or _driver_profile_dir(driver),
+            "registered_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            registry = self._load_registry()
+            registry[str(pid)] = entry
+            self._save_registry(registry)
+        return pid
+
+    def unregister(self, pid):
+        """Forget a driver that was shut down normally"""
+        if not pid:
+            return
+        with self._lock:
+            registry = self._load_registry()
+            if registry.pop(str(pid), None) is not None:
+                self._save_registry(registry)
+            self._cpu_samples.pop(pid, None)
+            self._cpu_strikes.pop(pid, None)
+
+    # Orphans
+
+    @staticmethod
+    def _running(pid, create_time):
+        """PID still refers to the process recorded at create_time (guards against PID reuse)"""
+        try:
+            process = psutil.Process(pid)
+            if create_time and abs(process.create_time() - create_time) > 1:
+                return False
+            return process.is_running()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def _same_process(self, entry):
+        return self._running(entry["pid"], entry.get("create_time"))
+
+    def _owner_alive(self, entry):
+        return self._running(entry.get("owner_pid", -1), entry.get("owner_create_time"))
+
+    def _service_profile(self, profile):
+        """profile is a directory only the service creates (see SERVICE_PROFILE_DIRS)"""
+        try:
+            relative = os.path.relpath(profile, self.base_dir)
+        except ValueError:
+            return False   # Other drive
+        parts = relative.split(os.sep)
+        if parts[0] in (os.pardir, os.curdir):
+            return False
+        if parts[0] in SERVICE_PROFILE_DIRS:
+            return len(parts) > 1
+        return len(parts) == 1 and bool(POOL_PROFILE_PATTERN.match(parts[0]))
+
+    def reap_orphans(self):
+        """
+        Kill registered browsers whose owning service process is gone and
+        unregistered Chrome processes using a profile directory the service creates.
+
+        Returns:
+            int: number of processes killed
+        """
+        killed = 0
+        live_tree = set()
+        with self._lock:
+            registry = self._load_registry()
+            changed = False
+            for key, entry in list(registry.items()):
+                alive = self._same_process(entry)
+                orphaned = not self._owner_alive(entry)
+                if alive and not orphaned:
+                    live_tree.update(process.pid for process in process_tree(entry["pid"]))
+                    continue
+                if alive:
+                    count = kill_process_tree(entry["pid"])
+                    killed += count
+                    self._event("orphan_reaped", entry["pid"], f"owner {entry.get('owner_pid')} gone, {count} process(es)")
+                registry.pop(key)
+                changed = True
+            if changed:
+                self._save_registry(registry)
+
+        # Chrome processes on service-created profiles that no live registered driver accounts for
+        for process in psutil.process_iter(["pid", "name", "cmdline", "create_time"]):
+            if process.pid in live_tree or not _is_chrome(process):
+                continue
+            if time.time() - (process.info.get("create_time") or 0) < LAUNCH_GRACE_SECONDS:
+                continue
+            profile = _user_data_dir(process.info.get("cmdline"))
+            if not profile or not self._service_profile(profile):
+                continue
+            try:
+                parent = process.parent()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                parent = None
+            if parent is not None and _is_chrome(parent) and _user_data_dir(parent.cmdline()) == profile:
+                # Renderer/helper of a browser process: killed with its browser
+                continue
+            count = kill_process_tree(process.pid)
+            killed += count
+            self._event("orphan_reaped", process.pid, f"unregistered Chrome on {profile}, {count} process(es)")
+
+        self.stats["orphans_reaped"] += killed
+        return killed
+
+    # Caps
+
+    def _cpu_percent(self, pid, processes):
+        cpu = 0.0
+        for process in processes:
+            try:
+                times = process.cpu_times()
+                cpu += times.user + times.system
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        now = time.monotonic()
+        previous = self._cpu_samples.get(pid)
+        self._cpu_samples[pid] = (cpu, now)
+        if not previous or now <= previous[1]:
+            return 0.0
+        # Percent of one core, averaged over the whole tree since the last check
+        return max(0.0, (cpu - previous[0]) / (now - previous[1]) * 100)
+
+    def usage(self):
+        """Live resource usage of every registered browser tree"""
+        browsers = []
+        with self._lock:
+            registry = self._load_registry()
+        for entry in registry.values():
+            processes = process_tree(entry["pid"]) if self._same_process(entry) else []
+            rss = 0
+            for process in processes:
+                try:
+                    rss += process.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            browsers.append({
+                "pid": entry["pid"],
+                "owner_pid": entry.get("owner_pid"),
+                "profile_dir": entry.get("profile_dir"),
+                "registered_at": entry.get("registered_at"),
+                "alive": bool(processes),
+                "processes": len(processes),
+                "rss_mb": round(rss / (1024 * 1024), 1),
+                "cpu_percent": round(self._cpu_percent(entry["pid"], processes), 1) if processes else 0.0,
+                "cpu_strikes": self._cpu_strikes.get(entry["pid"], 0),
+            })
+        return browsers
+
+    def enforce_caps(self):
+        """Kill browser trees of this process that exceed the RSS or sustained CPU cap"""
+        killed = 0
+        for browser in self.usage():
+            pid = browser["pid"]
+            if not browser["alive"] or browser["owner_pid"] != self.owner_pid:
+                continue
+            reason = None
+            if browser["rss_mb"] > self.settings["max_rss_mb"]:
+                reason = f"RSS {browser['rss_mb']} MB > {self.settings['max_rss_mb']} MB"
+            elif browser["cpu_percent"] > self.settings["max_cpu_percent"]:
+                self._cpu_strikes[pid] = self._cpu_strikes.get(pid, 0) + 1
+                if self._cpu_strikes[pid] >= self.settings["cpu_strikes"]:
+                    reason = f"CPU {browser['cpu_percent']}% > {self.settings['max_cpu_percent']}% for {self._cpu_strikes[pid]} checks"
+            else:
+                self._cpu_strikes[pid] = 0
+            if reason:
+                killed += kill_process_tree(pid)
+                self.stats["cap_kills"] += 1
+                self._event("cap_exceeded", pid, reason)
+                self.unregister(pid)
+        return killed
+
+    def check(self):
+        """One watchdog pass: reap orphans, then enforce caps"""
+        self.stats["checks"] += 1
+        try:
+            self.reap_orphans()
+            self.enforce_caps()
+        except Exception as e:
+            print(f"[{datetime.now()}] Chrome watchdog check failed: {str(e)}")
+
+    def status(self):
+        """Registered browsers with live usage, caps, counters and recent events"""
+        return {
+            "owner_pid": self.owner_pid,
+            "settings": dict(self.settings),
+            "browsers": self.usage(),
+            "stats": dict(self.stats),
+            "recent_events": self.events[-10:],
+        }
+
+
+_watchdog = None
+_watchdog_lock = threading.Lock()
+
+
+def get_watchdog(settings=None):
+    """Process-wide watchdog backed by chrome_pids.json (settings apply on first call)"""
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = ChromeWatchdog(settings=settings)
+        return _watchdog
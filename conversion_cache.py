@@ -0,0 +1,183 @@
+"""
+Content-hash cache for Excel to PDF conversions
+
+The same workbook data is often converted more than once: /excel/now repeats,
+batch tools rerun over downloads/, and scheduled runs export identical data.
+Cache keys are a hash of the workbook's content plus a hash of the settings
+that shape the PDF, and the cache keeps two kinds of entries:
+
+- "pdf": the finished PDF, keyed with the effective watermark text; a hit is
+  hard-linked into place (no conversion, no watermark)
+- "conversion": the PDF before watermarking, keyed without the watermark; a
+  hit is copied into place and only the watermark is added (the default
+  watermark is the PDF's name, which differs on every run)
+
+The workbook hash covers the cell data inside the .xlsx, not its document
+properties, so two exports of unchanged data hash the same even though their
+bytes differ in the embedded timestamps.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+import zipfile
+from datetime import datetime
+
+
+CONVERSION_CACHE_DIR = "conversion_cache"
+
+# Bump when the conversion output changes, so old entries are not reused
+CACHE_FORMAT_VERSION = 1
+
+# Parts of an .xlsx that change on every save without changing the data
+VOLATILE_XLSX_PARTS = ("docProps/core.xml", "docProps/app.xml")
+
+
+def workbook_hash(path):
+    """Hash of a workbook's content (every part except document properties), raw bytes for non-zip files"""
+    digest = hashlib.sha256()
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for name in sorted(archive.namelist()):
+                if name in VOLATILE_XLSX_PARTS:
+                    continue
+                digest.update(name.encode("utf-8"))
+                digest.update(archive.read(name))
+        return digest.hexdigest()
+    except zipfile.BadZipFile:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+def cache_key(content_hash, **options):
+    """Cache key of a workbook hash plus the options that shape the PDF"""
+    options = dict(options, version=CACHE_FORMAT_VERSION)
+    options_hash = hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{content_hash[:32]}_{options_hash[:16]}"
+
+
+def place_file(source, target, link=True):
+    """Hard-link (or copy) source to target, replacing target atomically"""
+    temp_path = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        if link:
+            try:
+                os.link(source, temp_path)
+            except OSError:
+                # Other file system, or no hard links there
+                shutil.copyfile(source, temp_path)
+        else:
+            shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class ConversionCache:
+    """Converted PDFs by workbook content and PDF settings, with hit/miss statistics"""
+
+    def __init__(self, cache_dir=None, max_entries=500):
+        self.cache_dir = cache_dir or CONVERSION_CACHE_DIR
+        self.max_entries = max_entries
+        self.stats = {kind: {"hits": 0, "misses": 0} for kind in ("pdf", "conversion")}
+        self.last_cleared_at = None
+        self._lock = threading.Lock()
+
+    def _path(self, kind, key):
+        return os.path.join(self.cache_dir, f"{kind}_{key}.pdf")
+
+    def get(self, kind, key, target_path):
+        """
+        Put the cached PDF for key at target_path: hard-linked for "pdf" entries,
+        copied for "conversion" entries (the copy is watermarked in place)
+
+        Returns:
+            bool: True on a cache hit
+        """
+        path = self._path(kind, key)
+        hit = False
+        if os.path.exists(path):
+            try:
+                place_file(path, target_path, link=kind == "pdf")
+                os.utime(path)   # Most recently used entries survive pruning
+                hit = True
+            except OSError as e:
+                print(f"[{datetime.now()}] Conversion cache entry unusable ({str(e)})")
+        with self._lock:
+            self.stats[kind]["hits" if hit else "misses"] += 1
+        if hit:
+            print(f"[{datetime.now()}] Conversion cache hit ({kind}): {os.path.basename(target_path)}")
+        return hit
+
+    def put(self, kind, key, source_path):
+        """Store a PDF under key ("pdf" entries share the file through a hard link)"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            place_file(source_path, self._path(kind, key), link=kind == "pdf")
+            self.prune()
+        except OSError as e:
+            print(f"[{datetime.now()}] Could not cache {os.path.basename(source_path)}: {str(e)}")
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [
+            os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+            if name.endswith(".pdf")
+        ]
+
+    def prune(self):
+        """Drop the least recently used entries above max_entries"""
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return 0
+        entries.sort(key=os.path.getmtime)
+        stale = entries[:len(entries) - self.max_entries]
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(stale)
+
+    def clear(self):
+        """Invalidate every entry (PDFs already placed in downloads/pdfs/ are kept)"""
+        removed = 0
+        with self._lock:
+            for path in self._entries():
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+            self.last_cleared_at = datetime.now().isoformat()
+        print(f"[{datetime.now()}] Conversion cache cleared ({removed} entries)")
+        return removed
+
+    def status(self):
+        entries = self._entries()
+        size = 0
+        for path in entries:
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+
+        def rate(stats):
+            lookups = stats["hits"] + stats["misses"]
+            return round(stats["hits"] / lookups, 3) if lookups else None
+
+        return {
+            "entries": len(entries),
+            "size_mb": round(size / (1024 * 1024), 2),
+            "max_entries": self.max_entries,
+            "pdf": dict(self.stats["pdf"], hit_rate=rate(self.stats["pdf"])),
+            "conversion": dict(self.stats["conversion"], hit_rate=rate(self.stats["conversion"])),
+            "last_cleared_at": self.last_cleared_at,
+        }
@@ -0,0 +1,329 @@
+"""
+Conversion executor: workbook to PDF jobs off the request thread
+
+Callers submit a conversion and await its future instead of converting inline,
+so several workbooks convert in parallel:
+
+- "excel" (PowerShell) and "native" jobs each run in their own Python process
+  (python conversion_executor.py ...), so a job that hangs is stopped by
+  killing just its process tree (PowerShell and Excel included) while other
+  jobs carry on; a job whose process dies without a result is retried once;
+- "libreoffice" jobs are handed to the persistent LibreOffice server
+  (office_server.py), which has its own worker pool.
+
+At most "workers" jobs run at the same time.
+
+Every job gets its own scratch directory below conversion_jobs/: the
+PowerShell script and the PDF being written live there, and the finished PDF
+is moved into place with os.replace. Two conversions never share a script
+file or see each other's half-written output.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+
+
+CONVERSION_SCRATCH_DIR = "conversion_jobs"
+POWERSHELL_TIMEOUT_SECONDS = 60
+
+DEFAULT_CONVERSION_SETTINGS = {
+    "workers": 2,               # Conversions running at the same time
+    "timeout_seconds": 180,     # Give up waiting for a conversion after this long
+}
+
+# Excel through COM: light-gray borders on the used range, Legal landscape, PDF export
+POWERSHELL_EXPORT_SCRIPT = '''
+        $excel = New-Object -ComObject Excel.Application
+        $excel.Visible = $false
+        $excel.DisplayAlerts = $false
+
+        try {{
+            $workbook = $excel.Workbooks.Open('{excel_path}')
+            $worksheet = $workbook.Worksheets.Item(1)
+
+            # Add borders to all cells with data
+            $usedRange = $worksheet.UsedRange
+            if ($usedRange) {{
+                $usedRange.Borders.LineStyle = 1  # xlContinuous
+                $usedRange.Borders.Weight = 1     # xlThin
+                # Set gray color for all border sides
+                $usedRange.Borders.Item(7).Color = 12632256  # xlEdgeLeft - Light gray
+                $usedRange.Borders.Item(8).Color = 12632256  # xlEdgeTop - Light gray
+                $usedRange.Borders.Item(9).Color = 12632256  # xlEdgeBottom - Light gray
+                $usedRange.Borders.Item(10).Color = 12632256 # xlEdgeRight - Light gray
+            }}
+
+            # Set to Legal landscape
+            $worksheet.PageSetup.Orientation = 2  # xlLandscape
+            $worksheet.PageSetup.PaperSize = 5     # xlPaperLegal
+
+            # Export to PDF
+            $pdf_path = '{pdf_path}'
+            $workbook.ExportAsFixedFormat(0, $pdf_path)
+
+            $workbook.Close()
+            $excel.Quit()
+
+            Write-Host "PDF created: $pdf_path"
+        }} catch {{
+            Write-Host "Error: $_"
+            $excel.Quit()
+        }}
+        '''
+
+
+def export_pdf_with_excel(excel_path, pdf_path, scratch_dir):
+    """
+    Convert Excel file to PDF with borders in landscape legal format using PowerShell
+    (Excel through COM; Windows with Office only). The script is written to scratch_dir.
+
+    Raises:
+        Exception: when PowerShell fails, times out or produces no PDF
+    """
+    script_path = os.path.join(scratch_dir, "export.ps1")
+    with open(script_path, 'w') as f:
+        f.write(POWERSHELL_EXPORT_SCRIPT.format(
+            excel_path=os.path.abspath(excel_path),
+            pdf_path=os.path.abspath(pdf_path),
+        ))
+    try:
+        result = subprocess.run(['powershell', '-ExecutionPolicy', 'Bypass', '-File', script_path],
+                                capture_output=True, text=True, timeout=POWERSHELL_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        raise Exception("PDF conversion timed out")
+    if result.returncode != 0:
+        raise Exception(f"PowerShell error: {result.stderr}")
+    if not os.path.exists(pdf_path):
+        # The script reports Excel errors on stdout and still exits 0
+        raise Exception(f"PowerShell produced no PDF: {result.stdout.strip()}")
+
+
+def _run_in_scratch(convert, pdf_path, scratch_root, engine, abandoned=None):
+    """
+    Run convert(scratch_dir, scratch_pdf) in a fresh scratch directory and move the PDF into place
+    (not when the abandoned event is set: the caller timed out and has moved on)
+    """
+    start = time.monotonic()
+    os.makedirs(scratch_root, exist_ok=True)
+    scratch_dir = tempfile.mkdtemp(prefix="job_", dir=scratch_root)
+    scratch_pdf = os.path.join(scratch_dir, os.path.basename(pdf_path))
+    try:
+        convert(scratch_dir, scratch_pdf)
+        if abandoned is not None and abandoned.is_set():
+            raise Exception("Conversion abandoned: the caller timed out")
+        os.makedirs(os.path.dirname(os.path.abspath(pdf_path)), exist_ok=True)
+        os.replace(scratch_pdf, pdf_path)
+        return {"success": True, "engine": engine, "error": None,
+                "seconds": round(time.monotonic() - start, 3), "pid": os.getpid()}
+    except Exception as e:
+        return {"success": False, "engine": engine, "error": str(e),
+                "seconds": round(time.monotonic() - start, 3), "pid": os.getpid()}
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def run_conversion(excel_path, pdf_path, engine, scratch_root):
+    """Job process entry point for "excel" and "native" jobs (see __main__ below)"""
+    def convert(scratch_dir, scratch_pdf):
+        if engine == "native":
+            from excel_pdf_renderer import render_workbook_pdf
+            render_workbook_pdf(excel_path, scratch_pdf)
+        else:
+            export_pdf_with_excel(excel_path, scratch_pdf, scratch_dir)
+    return _run_in_scratch(convert, pdf_path, scratch_root, engine)
+
+
+def run_libreoffice_conversion(excel_path, pdf_path, scratch_root, server_settings=None, abandoned=None):
+    """Thread entry point for "libreoffice" jobs (the office server lives in this process)"""
+    from convert_excel_to_pdf_libreoffice import convert_excel_to_pdf_libreoffice
+
+    def convert(scratch_dir, scratch_pdf):
+        if not convert_excel_to_pdf_libreoffice(excel_path, scratch_pdf, server_settings):
+            raise Exception("LibreOffice conversion failed")
+    return _run_in_scratch(convert, pdf_path, scratch_root, "libreoffice", abandoned)
+
+
+class ConversionJob:
+    """One submitted conversion: its job process (if any) and whether the caller gave up on it"""
+
+    def __init__(self, excel_path, pdf_path, engine, server_settings=None):
+        self.excel_path = excel_path
+        self.pdf_path = pdf_path
+        self.engine = engine
+        self.server_settings = server_settings
+        self.process = None
+        self.abandoned = threading.Event()
+
+
+class ConversionExecutor:
+    """Submit/await workbook to PDF conversions, each in its own process"""
+
+    def __init__(self, settings=None, base_dir=None):
+        self.settings = dict(DEFAULT_CONVERSION_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.workers = max(1, int(self.settings["workers"]))
+        self.scratch_root = os.path.join(base_dir or os.getcwd(), CONVERSION_SCRATCH_DIR)
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "seconds_total": 0.0,
+                      "killed": 0, "retried": 0}
+        self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="conversion")
+        self._lock = threading.Lock()
+
+    def submit(self, excel_path, pdf_path, engine="native", server_settings=None):
+        """
+        Queue a conversion
+
+        Returns:
+            Future: resolves to a dict with success, engine, error, seconds, pid
+        """
+        job = ConversionJob(os.path.abspath(excel_path), os.path.abspath(pdf_path), engine, server_settings)
+        with self._lock:
+            self.stats["submitted"] += 1
+        future = self._threads.submit(self._run_job, job)
+        future.job = job
+        future.add_done_callback(self._record)
+        return future
+
+    def _run_job(self, job):
+        if job.engine == "libreoffice":
+            return run_libreoffice_conversion(
+                job.excel_path, job.pdf_path, self.scratch_root, job.server_settings, job.abandoned)
+        # A job process that dies without a result (crash, killed from outside) gets one more try
+        for attempt in (1, 2):
+            result = self._run_job_process(job)
+            if result is not None or job.abandoned.is_set() or attempt == 2:
+                break
+            print(f"[{datetime.now()}] Conversion process died without a result, retrying "
+                  f"{os.path.basename(job.excel_path)}")
+            with self._lock:
+                self.stats["retried"] += 1
+        if result is None:
+            error = "Conversion abandoned: the caller timed out" if job.abandoned.is_set() \
+                else "Conversion process died without a result"
+            result = {"success": False, "engine": job.engine, "error": error, "seconds": 0, "pid": None}
+        return result
+
+    def _run_job_process(self, job):
+        """Run the job in a new Python process; its result, or None when it produced none"""
+        if job.abandoned.is_set():
+            return None
+        job.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), job.excel_path, job.pdf_path, job.engine, self.scratch_root],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        if job.abandoned.is_set():
+            # Abandoned while the process was starting
+            self._kill(job)
+        try:
+            # Hard cap for jobs nobody waits on with a timeout (submit without convert)
+            output, _ = job.process.communicate(timeout=self.settings["timeout_seconds"])
+        except subprocess.TimeoutExpired:
+            self._kill(job)
+            job.process.communicate()
+            return {"success": False, "engine": job.engine, "seconds": self.settings["timeout_seconds"],
+                    "error": f"Conversion did not finish within {self.settings['timeout_seconds']}s",
+                    "pid": job.process.pid}
+        lines = [line for line in (output or "").splitlines() if line.strip()]
+        try:
+            return json.loads(lines[-1])
+        except (IndexError, ValueError):
+            if lines and not job.abandoned.is_set():
+                print(f"[{datetime.now()}] Conversion process output: {lines[-1]}")
+            return None
+
+    def _kill(self, job):
+        """Kill a job's process tree (PowerShell and Excel included)"""
+        from chrome_watchdog import kill_process_tree
+        if job.process is None or job.process.poll() is not None:
+            return
+        killed = kill_process_tree(job.process.pid)
+        with self._lock:
+            self.stats["killed"] += 1
+        print(f"[{datetime.now()}] Conversion of {os.path.basename(job.excel_path)} stopped "
+              f"({killed} process(es) killed)")
+
+    def _record(self, future):
+        try:
+            result = future.result()
+        except Exception:
+            result = {"success": False, "seconds": 0}
+        with self._lock:
+            self.stats["succeeded" if result["success"] else "failed"] += 1
+            self.stats["seconds_total"] += result.get("seconds") or 0
+
+    def convert(self, excel_path, pdf_path, engine="native", server_settings=None, timeout=None):
+        """
+        Submit a conversion and wait for it
+
+        Returns:
+            dict: success, engine, error, seconds, pid
+        """
+        timeout = timeout or self.settings["timeout_seconds"]
+        future = self.submit(excel_path, pdf_path, engine, server_settings)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._abandon(future)
+            return {"success": False, "engine": engine, "error": f"Conversion did not finish within {timeout}s",
+                    "seconds": timeout, "pid": None}
+
+    def _abandon(self, future):
+        """Make sure a timed-out job can neither hold a worker nor write its PDF later"""
+        if future.cancel() or future.done():
+            return   # Still queued (it never starts) or finished after all
+        future.job.abandoned.set()
+        # Job process: killed with its children. LibreOffice job: the office server's
+        # watchdog ends it and the abandoned flag keeps its PDF from being moved into place.
+        self._kill(future.job)
+
+    def cleanup_scratch(self):
+        """Delete scratch directories left behind by a previous instance (call on startup)"""
+        if not os.path.isdir(self.scratch_root):
+            return 0
+        entries = os.listdir(self.scratch_root)
+        for entry in entries:
+            shutil.rmtree(os.path.join(self.scratch_root, entry), ignore_errors=True)
+        return len(entries)
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+    def status(self):
+        finished = self.stats["succeeded"] + self.stats["failed"]
+        return {
+            "workers": self.workers,
+            "submitted": self.stats["submitted"],
+            "running_or_queued": self.stats["submitted"] - finished,
+            "succeeded": self.stats["succeeded"],
+            "failed": self.stats["failed"],
+            "killed": self.stats["killed"],
+            "retried": self.stats["retried"],
+            "avg_seconds": round(self.stats["seconds_total"] / finished, 3) if finished else None,
+        }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_conversion_executor(settings=None):
+    """Process-wide conversion executor (settings apply on first call)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ConversionExecutor(settings=settings)
+        return _executor
+
+
+if __name__ == "__main__":
+    # Job process: python conversion_executor.py <excel_path> <pdf_path> <engine> <scratch_root>
+    # The result is the last line of output (JSON)
+    print(json.dumps(run_conversion(*sys.argv[1:5])))
@@ -1,20 +1,37 @@
 import os
+import shutil
 import subprocess
+import tempfile
 from datetime import datetime
+from pathlib import Path
 
-def convert_excel_to_pdf_libreoffice(excel_path, pdf_path):
+from office_server import get_office_server
+
+def convert_excel_to_pdf_libreoffice(excel_path, pdf_path, server_settings=None):
     """
     Convert Excel file to PDF using LibreOffice (no Excel required)
+    Jobs go to the persistent conversion server (office_server.py) when the UNO
+    bridge is installed; otherwise a one-off soffice process is started
+    server_settings: Optional office server settings (used on first call)
     """
+    os.makedirs(os.path.dirname(os.path.abspath(pdf_path)), exist_ok=True)
+    server = get_office_server(server_settings)
+    if server.available():
+        try:
+            server.convert(excel_path, pdf_path)
+            return True
+        except Exception as e:
+            print(f"[{datetime.now()}] Conversion server failed ({str(e)}), starting LibreOffice for this file")
+    
+    # Throw-away user profile: parallel one-off conversions do not collide on the profile lock
+    profile_dir = tempfile.mkdtemp(prefix="lo_profile_")
     try:
         print(f"[{datetime.now()}] Converting Excel to PDF using LibreOffice...")
         
-        # Create output directory if it doesn't exist
-        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
-        
         # LibreOffice command for Excel to PDF conversion
         cmd = [
             'libreoffice',
+            f'-env:UserInstallation={Path(profile_dir).as_uri()}',
             '--headless',
             '--convert-to', 'pdf',
             '--outdir', os.path.dirname(pdf_path),
@@ -60,6 +77,8 @@ def convert_excel_to_pdf_libreoffice(excel_path, pdf_path):
     except Exception as e:
         print(f"[{datetime.now()}] Error in LibreOffice conversion: {str(e)}")
         return False
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
 
 def convert_excel_to_pdf_python_libraries(excel_path, pdf_path):
     """
@@ -0,0 +1,142 @@
+"""
+Per-run download directories and workbook finalization
+
+Each run downloads into its own scratch directory under downloads/.runs, so a
+run never picks up a file from another run or an older report. Once the
+download is finalized the workbook is validated as a complete xlsx (ZIP)
+container and moved atomically into downloads/ under its report name.
+"""
+import io
+import os
+import shutil
+import uuid
+import weakref
+import zipfile
+from datetime import datetime
+
+import run_records
+
+
+DOWNLOADS_DIR = "downloads"
+RUNS_DIR = os.path.join(DOWNLOADS_DIR, ".runs")
+
+# Parts every Excel workbook package contains
+REQUIRED_XLSX_PARTS = ("[Content_Types].xml", "xl/workbook.xml")
+
+# Download directory each running driver was last pointed at
+_driver_download_dirs = weakref.WeakKeyDictionary()
+
+
+class InvalidWorkbook(Exception):
+    """Downloaded file is not a complete xlsx workbook"""
+
+
+def create_run_download_dir():
+    """Create an empty scratch download directory for one run"""
+    run_id = f"{datetime.utcnow().strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex[:8]}"
+    run_dir = os.path.abspath(os.path.join(RUNS_DIR, run_id))
+    os.makedirs(run_dir, exist_ok=True)
+    return run_dir
+
+
+def remove_run_download_dir(run_dir):
+    """Delete a run's scratch directory and anything left in it"""
+    if run_dir and os.path.isdir(run_dir):
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def point_driver_downloads(driver, download_dir):
+    """Send the browser's downloads to download_dir (works on an already-running driver)"""
+    params = {"behavior": "allow", "downloadPath": download_dir}
+    try:
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", params)
+    except Exception:
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", params)
+    _driver_download_dirs[driver] = download_dir
+
+
+def driver_download_dir(driver):
+    """Directory point_driver_downloads last sent the driver's downloads to (None: Chrome's default)"""
+    return _driver_download_dirs.get(driver)
+
+
+def validate_xlsx(path):
+    """Raise InvalidWorkbook unless path is a complete, readable xlsx package"""
+    _validate_xlsx_source(path, os.path.basename(path))
+
+
+def validate_xlsx_bytes(data):
+    """Raise InvalidWorkbook unless data (bytes) is a complete, readable xlsx package"""
+    _validate_xlsx_source(io.BytesIO(data), "Captured workbook")
+
+
+def _validate_xlsx_source(source, label):
+    if not zipfile.is_zipfile(source):
+        raise InvalidWorkbook(f"{label} is not a ZIP container")
+    try:
+        with zipfile.ZipFile(source) as workbook:
+            names = set(workbook.namelist())
+            missing = [part for part in REQUIRED_XLSX_PARTS if part not in names]
+            if missing:
+                raise InvalidWorkbook(f"{label} is missing {', '.join(missing)}")
+            corrupt = workbook.testzip()
+            if corrupt:
+                raise InvalidWorkbook(f"{label} has a corrupt member: {corrupt}")
+    except zipfile.BadZipFile as e:
+        raise InvalidWorkbook(f"{label} is truncated or corrupt: {str(e)}")
+
+
+def finalize_workbook(path, final_filename, downloads_dir=DOWNLOADS_DIR):
+    """
+    Validate a downloaded workbook and move it atomically into downloads_dir.
+    If final_filename is already taken a numeric suffix is added.
+
+    Returns:
+        str: the filename the workbook was stored under
+    """
+    validate_xlsx(path)
+    run_records.count("bytes_downloaded", os.path.getsize(path))
+    os.makedirs(downloads_dir, exist_ok=True)
+
+    base, extension = os.path.splitext(final_filename)
+    filename = final_filename
+    counter = 2
+    while True:
+        target = os.path.join(downloads_dir, filename)
+        try:
+            # A hard link never overwrites, so two concurrent runs cannot claim the same name
+            os.link(path, target)
+            os.remove(path)
+            break
+        except FileExistsError:
+            filename = f"{base}_{counter}{extension}"
+            counter += 1
+        except OSError:
+            # Filesystem without hard links: fall back to an atomic rename
+            if os.path.exists(target):
+                filename = f"{base}_{counter}{extension}"
+                counter += 1
+                continue
+            os.replace(path, target)
+            break
+
+    print(f"[{datetime.now()}] Excel file saved: {filename}")
+    return filename
+
+
+def store_workbook_bytes(data, final_filename, downloads_dir=DOWNLOADS_DIR):
+    """
+    Validate an in-memory workbook and write it into downloads_dir in one pass.
+
+    Returns:
+        str: the filename the workbook was stored under
+    """
+    validate_xlsx_bytes(data)
+    run_dir = create_run_download_dir()
+    try:
+        temp_path = os.path.join(run_dir, final_filename)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        return finalize_workbook(temp_path, final_filename, downloads_dir)
+    finally:
+        remove_run_download_dir(run_dir)
@@ -0,0 +1,232 @@
+"""
+Native Excel to PDF rendering (no Office, no LibreOffice)
+
+Reads the workbook once with openpyxl and lays out each visible sheet's used
+range as a reportlab table on Legal landscape, with the same thin light-gray
+borders the PowerShell/Excel conversion draws. Column widths, row heights,
+merged cells, hidden rows/columns, bold/italic fonts, font colors, solid fills
+and horizontal alignment are taken from the workbook; a sheet wider than the
+page is scaled down to fit its width (rows continue on the next pages).
+
+Runs in-process on any platform and renders a report in a fraction of a second.
+"""
+import os
+import time
+from datetime import date, datetime
+
+from openpyxl import load_workbook
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
+
+
+# Legal landscape: 14 x 8.5 inches
+LEGAL_LANDSCAPE = (14 * inch, 8.5 * inch)
+PAGE_MARGIN = 0.5 * inch
+
+# Excel's light gray border (12632256 = 0xC0C0C0), xlThin
+BORDER_COLOR = colors.HexColor("#C0C0C0")
+BORDER_WIDTH = 0.5
+
+# Excel defaults for unset dimensions and fonts
+DEFAULT_COLUMN_WIDTH = 8.43   # characters of the default font
+DEFAULT_ROW_HEIGHT = 15       # points
+DEFAULT_FONT_SIZE = 11
+CELL_PADDING = 2              # points, left and right
+
+FONT_NAMES = {
+    (False, False): "Helvetica",
+    (True, False): "Helvetica-Bold",
+    (False, True): "Helvetica-Oblique",
+    (True, True): "Helvetica-BoldOblique",
+}
+ALIGNMENTS = {"center": "CENTER", "centerContinuous": "CENTER", "right": "RIGHT", "left": "LEFT"}
+
+
+def column_width_points(width):
+    """Excel column width (characters) in points: 7px per character plus 5px padding, 0.75pt per px"""
+    return (width * 7 + 5) * 0.75
+
+
+def hex_color(color):
+    """"#RRGGBB" of an openpyxl ARGB color, None for theme/indexed/unset colors"""
+    if color is None or getattr(color, "type", None) != "rgb":
+        return None
+    value = color.rgb
+    if not isinstance(value, str) or len(value) not in (6, 8):
+        return None
+    return f"#{value[-6:]}"
+
+
+def cell_text(value):
+    """Cell value as printed text"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M") if (value.hour or value.minute) else value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def used_range(worksheet):
+    """(min_row, min_col, max_row, max_col) of the cells holding values, None for an empty sheet"""
+    bounds = None
+    for row in worksheet.iter_rows():
+        for cell in row:
+            if cell.value is None or cell.value == "":
+                continue
+            if bounds is None:
+                bounds = [cell.row, cell.column, cell.row, cell.column]
+            else:
+                bounds[0] = min(bounds[0], cell.row)
+                bounds[1] = min(bounds[1], cell.column)
+                bounds[2] = max(bounds[2], cell.row)
+                bounds[3] = max(bounds[3], cell.column)
+    return tuple(bounds) if bounds else None
+
+
+def column_widths(worksheet):
+    """Column index -> (width in characters, hidden), including grouped column ranges"""
+    widths = {}
+    for dimension in worksheet.column_dimensions.values():
+        if dimension.min is None:
+            continue
+        for column in range(dimension.min, (dimension.max or dimension.min) + 1):
+            widths[column] = (dimension.width or None, dimension.hidden)
+    return widths
+
+
+def sheet_table(worksheet, available_width):
+    """
+    reportlab Table for a worksheet's used range, scaled down to available_width
+
+    Returns:
+        Table or None: None when the sheet holds no values, or none in a visible row and column
+    """
+    bounds = used_range(worksheet)
+    if bounds is None:
+        return None
+    min_row, min_col, max_row, max_col = bounds
+
+    widths = column_widths(worksheet)
+    columns = [column for column in range(min_col, max_col + 1) if not widths.get(column, (None, False))[1]]
+    rows = [row for row in range(min_row, max_row + 1) if not worksheet.row_dimensions[row].hidden]
+    if not columns or not rows:
+        return None
+    column_index = {column: index for index, column in enumerate(columns)}
+    row_index = {row: index for index, row in enumerate(rows)}
+
+    col_widths = [column_width_points(widths.get(column, (None, False))[0] or DEFAULT_COLUMN_WIDTH)
+                  for column in columns]
+    total_width = sum(col_widths)
+    if total_width <= 0:
+        return None
+    scale = min(1.0, available_width / total_width)
+
+    data = []
+    style = [
+        ("GRID", (0, 0), (-1, -1), BORDER_WIDTH, BORDER_COLOR),
+        ("FONTNAME", (0, 0), (-1, -1), FONT_NAMES[(False, False)]),
+        ("FONTSIZE", (0, 0), (-1, -1), DEFAULT_FONT_SIZE * scale),
+        ("LEADING", (0, 0), (-1, -1), DEFAULT_FONT_SIZE * scale * 1.2),
+        ("VALIGN", (0, 0), (-1, -1), "BOTTOM"),
+        ("LEFTPADDING", (0, 0), (-1, -1), CELL_PADDING * scale),
+        ("RIGHTPADDING", (0, 0), (-1, -1), CELL_PADDING * scale),
+        ("TOPPADDING", (0, 0), (-1, -1), 0),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), scale),
+    ]
+    for row in rows:
+        values = []
+        for column in columns:
+            cell = worksheet.cell(row=row, column=column)
+            values.append(cell_text(cell.value))
+            position = (column_index[column], row_index[row])
+
+            # Only non-default formatting gets its own style command
+            font = cell.font
+            if font is not None:
+                if font.b or font.i:
+                    style.append(("FONTNAME", position, position, FONT_NAMES[(bool(font.b), bool(font.i))]))
+                if font.sz and float(font.sz) != DEFAULT_FONT_SIZE:
+                    style.append(("FONTSIZE", position, position, float(font.sz) * scale))
+                    style.append(("LEADING", position, position, float(font.sz) * scale * 1.2))
+                font_color = hex_color(font.color)
+                if font_color and font_color.upper() != "#000000":
+                    style.append(("TEXTCOLOR", position, position, colors.HexColor(font_color)))
+            if cell.fill is not None and cell.fill.fill_type == "solid":
+                fill_color = hex_color(cell.fill.fgColor)
+                if fill_color:
+                    style.append(("BACKGROUND", position, position, colors.HexColor(fill_color)))
+            horizontal = cell.alignment.horizontal if cell.alignment is not None else None
+            if horizontal in ALIGNMENTS:
+                style.append(("ALIGN", position, position, ALIGNMENTS[horizontal]))
+            elif horizontal is None and isinstance(cell.value, (int, float)) and not isinstance(cell.value, bool):
+                # Excel's general alignment puts numbers on the right
+                style.append(("ALIGN", position, position, "RIGHT"))
+            if cell.alignment is not None and cell.alignment.vertical in ("center", "top"):
+                style.append(("VALIGN", position, position, "MIDDLE" if cell.alignment.vertical == "center" else "TOP"))
+        data.append(values)
+
+    for merged in worksheet.merged_cells.ranges:
+        start = (column_index.get(merged.min_col), row_index.get(merged.min_row))
+        end = (column_index.get(merged.max_col), row_index.get(merged.max_row))
+        if None in start or None in end or start == end:
+            continue
+        style.append(("SPAN", start, end))
+
+    row_heights = [(worksheet.row_dimensions[row].height or DEFAULT_ROW_HEIGHT) * scale for row in rows]
+    table = Table(data, colWidths=[width * scale for width in col_widths], rowHeights=row_heights, hAlign="LEFT")
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def render_workbook_pdf(excel_path, pdf_path):
+    """
+    Render every visible sheet of a workbook to a Legal landscape PDF with
+    light-gray cell borders (written atomically)
+
+    Returns:
+        str: pdf_path
+
+    Raises:
+        ValueError: when no sheet holds any values
+    """
+    start = time.monotonic()
+    # Not read-only: merged cells and column dimensions are needed
+    workbook = load_workbook(excel_path, data_only=True)
+    page_width, page_height = LEGAL_LANDSCAPE
+    available_width = page_width - 2 * PAGE_MARGIN
+
+    story = []
+    for worksheet in workbook.worksheets:
+        if worksheet.sheet_state != "visible":
+            continue
+        table = sheet_table(worksheet, available_width)
+        if table is None:
+            continue
+        if story:
+            story.append(PageBreak())
+        story.append(table)
+    workbook.close()
+    if not story:
+        raise ValueError(f"Workbook has no data: {excel_path}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(pdf_path)), exist_ok=True)
+    temp_path = pdf_path + ".tmp"
+    document = SimpleDocTemplate(
+        temp_path,
+        pagesize=LEGAL_LANDSCAPE,
+        leftMargin=PAGE_MARGIN,
+        rightMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN,
+        title=os.path.splitext(os.path.basename(pdf_path))[0],
+    )
+    document.build(story)
+    os.replace(temp_path, pdf_path)
+    print(f"[{datetime.now()}] Workbook rendered to PDF: {os.path.basename(pdf_path)} "
+          f"in {time.monotonic() - start:.2f}s")
+    return pdf_path
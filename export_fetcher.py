@@ -0,0 +1,254 @@
+"""
+Direct HTTP export of the Return Signal workbook
+
+The first browser run captures the request behind the Return Signal Download
+button from Chrome's performance log (URL, method, headers, body) and saves it
+to export_request.json together with the authenticated cookies. Later runs
+replay that request over a pooled HTTP session and stream the workbook straight
+to disk, so the browser is only needed when the auth has to be refreshed.
+
+The cookie jar records the portal account it was saved for; browser-less
+exports only use it for that same account.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+    print("[WARNING] requests not available. Direct HTTP export will be disabled.")
+
+
+EXPORT_REQUEST_FILE = "export_request.json"
+COOKIE_JAR_FILE = "export_cookies.json"
+
+# Response types that identify the workbook export
+EXPORT_MIME_HINTS = ("spreadsheet", "excel", "octet-stream")
+
+# Headers that must not be replayed verbatim
+SKIP_HEADERS = {"host", "content-length", "cookie", "connection", "accept-encoding"}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class ExportAuthExpired(Exception):
+    """The portal rejected the replayed export request (browser login needed)"""
+
+
+def get_http_session():
+    """Shared HTTP session with a small connection pool (keep-alive between exports)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[{datetime.now()}] Error reading {path}: {str(e)}")
+        return None
+
+
+def _save_json(path, data):
+    """Write data readable by the owner only: the files hold session cookies and request headers"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.chmod(path, 0o600)   # Files written before by a version without restricted permissions
+        return True
+    except Exception as e:
+        print(f"[{datetime.now()}] Error saving {path}: {str(e)}")
+        return False
+
+
+def load_export_request():
+    """Captured export request spec, or None if not captured yet"""
+    return _load_json(EXPORT_REQUEST_FILE)
+
+
+def clear_export_request():
+    """Forget the captured request (e.g. after the portal changed its export API)"""
+    for path in (EXPORT_REQUEST_FILE, COOKIE_JAR_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_performance_events(driver):
+    """Parsed DevTools events from Chrome's performance log (drains the buffer)"""
+    events = []
+    try:
+        entries = driver.get_log("performance")
+    except Exception as e:
+        print(f"[{datetime.now()}] Performance log not available: {str(e)}")
+        return events
+    for entry in entries:
+        try:
+            events.append(json.loads(entry["message"])["message"])
+        except (KeyError, ValueError):
+            continue
+    return events
+
+
+def reset_capture(driver):
+    """Drop buffered performance log entries before clicking Download"""
+    read_performance_events(driver)
+
+
+def is_export_response(response):
+    """Whether a DevTools Network.Response looks like the workbook export"""
+    headers = {k.lower(): v for k, v in response.get("headers", {}).items()}
+    disposition = headers.get("content-disposition", "").lower()
+    if ".xls" in disposition:
+        return True
+    mime = response.get("mimeType", "").lower()
+    return any(hint in mime for hint in EXPORT_MIME_HINTS) and "attachment" in disposition
+
+
+def capture_export_request(driver, username=None):
+    """
+    Find the export request in the performance log after Download was clicked
+    and save it (plus the current cookies of username's session) for replay.
+    Returns the captured spec or None if the export was not an HTTP request
+    (e.g. generated client-side).
+    """
+    events = read_performance_events(driver)
+    requests_by_id = {}
+    export_id = None
+    for event in events:
+        method = event.get("method")
+        params = event.get("params", {})
+        if method == "Network.requestWillBeSent":
+            requests_by_id[params.get("requestId")] = params.get("request", {})
+        elif method == "Network.responseReceived" and is_export_response(params.get("response", {})):
+            export_id = params.get("requestId")
+
+    request = requests_by_id.get(export_id) if export_id else None
+    if not request:
+        print(f"[{datetime.now()}] Export request not found in performance log")
+        return None
+
+    spec = {
+        "url": request.get("url"),
+        "method": request.get("method", "GET"),
+        "headers": {k: v for k, v in request.get("headers", {}).items() if k.lower() not in SKIP_HEADERS},
+        "post_data": request.get("postData"),
+        "captured_at": datetime.now().isoformat(),
+    }
+    _save_json(EXPORT_REQUEST_FILE, spec)
+    save_cookies(driver, username)
+    print(f"[{datetime.now()}] Captured export request: {spec['method']} {spec['url']}")
+    return spec
+
+
+def save_cookies(driver, username=None):
+    """Persist the driver's authenticated cookies (logged in as username) for browser-less exports"""
+    try:
+        cookies = driver.get_cookies()
+    except Exception as e:
+        print(f"[{datetime.now()}] Could not read cookies from driver: {str(e)}")
+        return False
+    return _save_json(COOKIE_JAR_FILE, {
+        "username": username,
+        "saved_at": datetime.now().isoformat(),
+        "cookies": cookies,
+    })
+
+
+def load_cookie_jar():
+    """Saved cookie jar: dict with username (None when unknown) and cookies, or None"""
+    jar = _load_json(COOKIE_JAR_FILE)
+    if isinstance(jar, list):
+        # Jar saved before the account was recorded
+        return {"username": None, "saved_at": None, "cookies": jar}
+    return jar
+
+
+def _apply_cookies(session, cookies):
+    session.cookies.clear()
+    for cookie in cookies or []:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/"),
+        )
+
+
+def fetch_export(output_path, driver=None, timeout=60, username=None):
+    """
+    Replay the captured export request and stream the workbook to output_path.
+    Uses the driver's cookies when a driver is given, otherwise the saved cookies,
+    and then only when they were saved for username (the current portal account).
+
+    Returns:
+        tuple: (success: bool, message: str)
+    Raises:
+        ExportAuthExpired: the portal rejected the saved auth
+    """
+    if not REQUESTS_AVAILABLE:
+        return False, "requests library not available"
+
+    spec = load_export_request()
+    if not spec:
+        return False, "Export request not captured yet"
+
+    if driver is not None:
+        save_cookies(driver, username)
+    jar = load_cookie_jar()
+    if not jar or not jar.get("cookies"):
+        return False, "No saved cookies"
+    if driver is None and jar.get("username") != username:
+        # Saved by another account (or before accounts were recorded): log in first
+        return False, "Saved cookies do not belong to the current account"
+
+    session = get_http_session()
+    _apply_cookies(session, jar["cookies"])
+
+    print(f"[{datetime.now()}] Fetching export directly: {spec['method']} {spec['url']}")
+    response = session.request(
+        spec["method"],
+        spec["url"],
+        headers=spec.get("headers"),
+        data=spec.get("post_data"),
+        stream=True,
+        timeout=timeout,
+        allow_redirects=False,
+    )
+    try:
+        if response.status_code in (401, 403) or response.is_redirect:
+            raise ExportAuthExpired(f"Export request rejected with HTTP {response.status_code}")
+        if response.status_code != 200:
+            return False, f"Export request failed with HTTP {response.status_code}"
+        if "text/html" in response.headers.get("Content-Type", ""):
+            # Login page served instead of the workbook
+            raise ExportAuthExpired("Export request returned an HTML page")
+
+        temp_path = output_path + ".part"
+        size = 0
+        with open(temp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    f.write(chunk)
+                    size += len(chunk)
+        os.replace(temp_path, output_path)
+    finally:
+        response.close()
+
+    print(f"[{datetime.now()}] Export saved directly: {output_path} ({size} bytes)")
+    return True, os.path.basename(output_path)
@@ -0,0 +1,467 @@
+"""
+Offline stand-in for the PortOptimizer portal
+
+Serves just enough of tower.portoptimizer.com for automation.download_excel_report
+to run end to end on a plain Linux box: the landing page with the "Log In"
+button, the Okta-style identifier and credentials.passcode forms, the dashboard
+with mdc-tab tabs (Return Signal by default) whose table renders after a data
+request, and a Download button that exports a synthetic workbook.
+
+Latency and failure modes are configurable, so benchmarks and regression runs
+can exercise slow pages and the portal's error paths without the real site.
+
+Usage:
+    python mock_portal.py --port 5055 --table-latency-ms 800 --failure-rate 0.1
+    PORTOPTIMIZER_PORTAL_URL=http://127.0.0.1:5055/ python automation.py
+"""
+import argparse
+import html
+import io
+import json
+import random
+import secrets
+import threading
+import time
+from datetime import datetime
+
+from flask import Flask, jsonify, make_response, redirect, request
+from openpyxl import Workbook
+
+
+CONTAINER_TYPES = ["20ST", "40ST", "40HC", "45", "20RF", "40RF", "Special", "Flat"]
+SHIFTS = ["Shift 1", "Shift 2"]
+TERMINALS = ["APM", "ETS", "FMS", "LBCT", "PCT", "PierA", "TraPac", "TTI", "WBCT", "YTI"]
+SHIPPING_LINES = ["CMA CGM", "COSCO", "Evergreen", "Hapag-Lloyd", "HMM", "Maersk", "MSC", "ONE", "OOCL", "Yang Ming", "ZIM"]
+
+# Failure modes that can be injected (each request point rolls failure_rate)
+FAILURE_MODES = (
+    "login_rejected",     # Verify shows "Invalid credentials" instead of signing in
+    "session_expired",    # Dashboard ignores the session cookie and shows the landing page
+    "table_timeout",      # Table data request fails, so no rows ever render
+    "export_error",       # Export endpoint answers HTTP 500
+    "corrupt_workbook",   # Export endpoint returns a truncated workbook
+)
+
+DEFAULT_MOCK_CONFIG = {
+    "tabs": ["Return Signal", "Dual Transactions", "Street Turns"],
+    "rows": 40,                     # Table rows per tab
+    "page_latency_ms": 150,         # Server delay for every HTML page
+    "table_latency_ms": 500,        # Delay of the table data request
+    "download_latency_ms": 300,     # Delay of the export request
+    "jitter_ms": 50,                # Random extra delay added to each of the above
+    "failure_rate": 0.0,            # Probability that an enabled failure mode triggers
+    "failure_modes": [],            # Subset of FAILURE_MODES to inject
+    "username": None,               # Accepted username (None: any)
+    "password": None,               # Accepted password (None: any)
+    "session_ttl_seconds": 3600,    # Portal session lifetime
+}
+
+PAGE_STYLE = """
+<style>
+body { font-family: Arial, sans-serif; margin: 24px; }
+.mdc-tab { border: none; background: none; padding: 8px 16px; cursor: pointer; }
+.mdc-tab--active { border-bottom: 2px solid #1976d2; }
+table { border-collapse: collapse; margin-top: 12px; }
+td, th { border: 1px solid #ccc; padding: 2px 6px; font-size: 12px; }
+.error { color: #b00020; }
+</style>
+"""
+
+LANDING_PAGE = """<!DOCTYPE html>
+<html><head><title>PortOptimizer</title>{style}</head>
+<body>
+<h1>PortOptimizer Tower</h1>
+<button class="button login" onclick="window.location.href='/oauth2/v1/authorize'">Log In</button>
+</body></html>"""
+
+IDENTIFIER_PAGE = """<!DOCTYPE html>
+<html><head><title>Sign In</title>{style}</head>
+<body>
+<h2>Sign In</h2>
+<form method="post" action="/oauth2/v1/identify">
+<label>Username <input type="text" name="identifier" autocomplete="username"></label>
+<input type="submit" value="Next">
+</form>
+</body></html>"""
+
+PASSCODE_PAGE = """<!DOCTYPE html>
+<html><head><title>Verify</title>{style}</head>
+<body>
+<h2>Verify with your password</h2>
+<p class="error">{error}</p>
+<form method="post" action="/oauth2/v1/verify">
+<input type="hidden" name="identifier" value="{identifier}">
+<label>Password <input type="password" name="credentials.passcode" autocomplete="current-password"></label>
+<input type="submit" value="Verify">
+</form>
+</body></html>"""
+
+DASHBOARD_PAGE = """<!DOCTYPE html>
+<html><head><title>PortOptimizer - Dashboard</title>{style}</head>
+<body>
+<h1>PortOptimizer Tower</h1>
+<div class="mdc-tab-bar" role="tablist">{tabs}</div>
+<div id="status"></div>
+<button title="Download" aria-label="Download" onclick="downloadReport()">Download</button>
+<p id="last-updated"></p>
+<table id="report"><thead></thead><tbody></tbody></table>
+<script>
+var activeTab = null;
+
+function selectTab(button) {{
+    document.querySelectorAll('.mdc-tab').forEach(function(tab) {{
+        tab.classList.remove('mdc-tab--active');
+        tab.setAttribute('aria-selected', 'false');
+    }});
+    button.classList.add('mdc-tab--active');
+    button.setAttribute('aria-selected', 'true');
+    activeTab = button.getAttribute('data-tab');
+    loadTable(activeTab);
+}}
+
+function loadTable(tab) {{
+    document.querySelector('#report thead').innerHTML = '';
+    document.querySelector('#report tbody').innerHTML = '';
+    document.getElementById('status').textContent = 'Loading...';
+    fetch('/api/table?tab=' + encodeURIComponent(tab))
+        .then(function(response) {{
+            if (!response.ok) {{ throw new Error('HTTP ' + response.status); }}
+            return response.json();
+        }})
+        .then(function(data) {{
+            if (tab !== activeTab) {{ return; }}
+            var head = '<tr><th rowspan="2">Terminal</th><th rowspan="2">Shipping Line</th>';
+            data.container_types.forEach(function(type) {{ head += '<th colspan="2">' + type + '</th>'; }});
+            head += '</tr><tr>';
+            data.container_types.forEach(function() {{ head += '<th>Shift 1</th><th>Shift 2</th>'; }});
+            document.querySelector('#report thead').innerHTML = head + '</tr>';
+            var body = '';
+            data.rows.forEach(function(row) {{
+                body += '<tr>' + row.map(function(cell) {{ return '<td>' + cell + '</td>'; }}).join('') + '</tr>';
+            }});
+            document.querySelector('#report tbody').innerHTML = body;
+            document.getElementById('last-updated').textContent = 'Last updated: ' + data.updated_at;
+            document.getElementById('status').textContent = '';
+        }})
+        .catch(function(error) {{
+            document.getElementById('status').innerHTML = '<span class="error">Something went wrong: ' + error.message + '</span>';
+        }});
+}}
+
+function downloadReport() {{
+    fetch('/api/export?tab=' + encodeURIComponent(activeTab))
+        .then(function(response) {{
+            if (!response.ok) {{ throw new Error('HTTP ' + response.status); }}
+            var disposition = response.headers.get('Content-Disposition') || '';
+            var match = disposition.match(/filename="?([^";]+)"?/);
+            return response.blob().then(function(blob) {{
+                var link = document.createElement('a');
+                link.href = URL.createObjectURL(blob);
+                link.download = match ? match[1] : 'export.xlsx';
+                document.body.appendChild(link);
+                link.click();
+                link.remove();
+            }});
+        }})
+        .catch(function(error) {{
+            document.getElementById('status').innerHTML = '<span class="error">Export failed: ' + error.message + '</span>';
+        }});
+}}
+
+selectTab(document.querySelector('.mdc-tab'));
+</script>
+</body></html>"""
+
+TAB_TEMPLATE = (
+    '<button class="mdc-tab" role="tab" aria-selected="false" data-tab="{label}" onclick="selectTab(this)">'
+    '<span class="mdc-tab__content"><span class="mdc-tab__text-label">{label}</span></span>'
+    '</button>'
+)
+
+
+class MockPortalState:
+    """Configuration, sessions and request counters of a mock portal instance"""
+
+    def __init__(self, config=None):
+        self.config = dict(DEFAULT_MOCK_CONFIG)
+        if config:
+            self.config.update(config)
+        self.sessions = {}       # session token -> expiry (epoch seconds)
+        self.sso_sessions = set()
+        self.counters = {}
+        self.failures = {}
+        self._workbooks = {}
+        self._lock = threading.Lock()
+
+    def update_config(self, changes):
+        unknown = [mode for mode in changes.get("failure_modes", []) if mode not in FAILURE_MODES]
+        if unknown:
+            raise ValueError(f"Unknown failure mode(s): {', '.join(unknown)}")
+        with self._lock:
+            self.config.update(changes)
+            if "rows" in changes or "tabs" in changes:
+                self._workbooks.clear()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def delay(self, setting):
+        """Sleep for a configured latency plus jitter"""
+        milliseconds = self.config.get(setting, 0) + random.uniform(0, self.config.get("jitter_ms", 0))
+        if milliseconds > 0:
+            time.sleep(milliseconds / 1000.0)
+
+    def should_fail(self, mode):
+        """Roll failure_rate for an enabled failure mode"""
+        if mode not in self.config.get("failure_modes", []):
+            return False
+        if random.random() >= self.config.get("failure_rate", 0):
+            return False
+        with self._lock:
+            self.failures[mode] = self.failures.get(mode, 0) + 1
+        return True
+
+    def new_session(self):
+        token = secrets.token_hex(16)
+        with self._lock:
+            self.sessions[token] = time.time() + self.config.get("session_ttl_seconds", 3600)
+        return token
+
+    def session_valid(self, token):
+        with self._lock:
+            expires = self.sessions.get(token)
+        return bool(expires and expires > time.time())
+
+    def table_rows(self, tab):
+        """Deterministic synthetic rows for a tab: terminal, line, then Shift 1/2 per container type"""
+        rng = random.Random(f"{tab}:{self.config.get('rows')}")
+        rows = []
+        for index in range(self.config.get("rows", 40)):
+            terminal = TERMINALS[index % len(TERMINALS)]
+            shipping_line = SHIPPING_LINES[(index // len(TERMINALS) + index) % len(SHIPPING_LINES)]
+            row = [terminal, shipping_line]
+            for _ in CONTAINER_TYPES:
+                for _ in SHIFTS:
+                    row.append(rng.choice(["YES", "NO", "DUAL", ""]))
+            rows.append(row)
+        return rows
+
+    def workbook_bytes(self, tab):
+        """Synthetic xlsx export of a tab (built once per tab and cached)"""
+        with self._lock:
+            cached = self._workbooks.get(tab)
+        if cached:
+            return cached
+
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.title = tab[:31]
+        header = ["Terminal", "Shipping Line"]
+        for container_type in CONTAINER_TYPES:
+            header.extend([container_type, ""])
+        worksheet.append(header)
+        worksheet.append(["", ""] + SHIFTS * len(CONTAINER_TYPES))
+        for row in self.table_rows(tab):
+            worksheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        data = buffer.getvalue()
+        with self._lock:
+            self._workbooks[tab] = data
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                "config": dict(self.config),
+                "requests": dict(self.counters),
+                "injected_failures": dict(self.failures),
+                "active_sessions": sum(1 for expires in self.sessions.values() if expires > time.time()),
+            }
+
+
+def create_mock_portal(config=None):
+    """Flask app serving the mock portal; the state is available as app.config['MOCK_STATE']"""
+    state = MockPortalState(config)
+    portal = Flask(__name__)
+    portal.config["MOCK_STATE"] = state
+
+    def page(template, **values):
+        state.delay("page_latency_ms")
+        response = make_response(template.format(style=PAGE_STYLE, **values))
+        response.headers["Content-Type"] = "text/html; charset=utf-8"
+        return response
+
+    def signed_in():
+        if not state.session_valid(request.cookies.get("po_session")):
+            return False
+        return not state.should_fail("session_expired")
+
+    @portal.route('/', methods=['GET'])
+    def dashboard():
+        state.count("dashboard")
+        if not signed_in():
+            return page(LANDING_PAGE)
+        tabs = "".join(TAB_TEMPLATE.format(label=html.escape(tab)) for tab in state.config["tabs"])
+        return page(DASHBOARD_PAGE, tabs=tabs)
+
+    @portal.route('/oauth2/v1/authorize', methods=['GET'])
+    def authorize():
+        state.count("authorize")
+        # Okta single sign-on: a live SSO session signs straight back in
+        if request.cookies.get("okta_sid") in state.sso_sessions:
+            response = redirect('/')
+            response.set_cookie("po_session", state.new_session(), httponly=True)
+            return response
+        return page(IDENTIFIER_PAGE)
+
+    @portal.route('/oauth2/v1/identify', methods=['POST'])
+    def identify():
+        state.count("identify")
+        identifier = request.form.get("identifier", "")
+        return page(PASSCODE_PAGE, error="", identifier=html.escape(identifier))
+
+    @portal.route('/oauth2/v1/verify', methods=['POST'])
+    def verify():
+        state.count("verify")
+        identifier = request.form.get("identifier", "")
+        passcode = request.form.get("credentials.passcode", "")
+        expected_user = state.config.get("username")
+        expected_password = state.config.get("password")
+        rejected = (
+            (expected_user is not None and identifier != expected_user)
+            or (expected_password is not None and passcode != expected_password)
+            or state.should_fail("login_rejected")
+        )
+        if rejected:
+            return page(PASSCODE_PAGE, error="Invalid credentials", identifier=html.escape(identifier))
+
+        sso_token = secrets.token_hex(16)
+        state.sso_sessions.add(sso_token)
+        response = redirect('/')
+        response.set_cookie("okta_sid", sso_token, httponly=True)
+        response.set_cookie("po_session", state.new_session(), httponly=True)
+        return response
+
+    @portal.route('/api/table', methods=['GET'])
+    def table():
+        state.count("table")
+        if not state.session_valid(request.cookies.get("po_session")):
+            return jsonify({"error": "Unauthorized"}), 401
+        tab = request.args.get("tab", "")
+        if tab not in state.config["tabs"]:
+            return jsonify({"error": f"Unknown tab {tab}"}), 404
+        state.delay("table_latency_ms")
+        if state.should_fail("table_timeout"):
+            return jsonify({"error": "Service unavailable"}), 503
+        return jsonify({
+            "tab": tab,
+            "container_types": CONTAINER_TYPES,
+            "rows": state.table_rows(tab),
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:00"),
+        })
+
+    @portal.route('/api/export', methods=['GET'])
+    def export():
+        state.count("export")
+        if not state.session_valid(request.cookies.get("po_session")):
+            # Same as the real portal: unauthenticated exports bounce to the login page
+            return redirect('/oauth2/v1/authorize')
+        tab = request.args.get("tab", "")
+        if tab not in state.config["tabs"]:
+            return jsonify({"error": f"Unknown tab {tab}"}), 404
+        state.delay("download_latency_ms")
+        if state.should_fail("export_error"):
+            return jsonify({"error": "Export failed"}), 500
+
+        data = state.workbook_bytes(tab)
+        if state.should_fail("corrupt_workbook"):
+            data = data[:len(data) // 2]
+        response = make_response(data)
+        response.headers["Content-Type"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        filename = f"{tab.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @portal.route('/__mock__/stats', methods=['GET'])
+    def mock_stats():
+        return jsonify(state.stats())
+
+    @portal.route('/__mock__/config', methods=['POST'])
+    def mock_config():
+        try:
+            state.update_config(request.get_json() or {})
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify({"success": True, "config": state.config})
+
+    return portal
+
+
+class MockPortalServer:
+    """Mock portal running in a background thread (for benchmarks and scripted runs)"""
+
+    def __init__(self, host="127.0.0.1", port=5055, config=None):
+        from werkzeug.serving import make_server
+        self.app = create_mock_portal(config)
+        self.server = make_server(host, port, self.app, threaded=True)
+        self.url = f"http://{host}:{self.server.server_port}/"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def state(self):
+        return self.app.config["MOCK_STATE"]
+
+    def start(self):
+        self._thread.start()
+        print(f"[{datetime.now()}] Mock portal running at {self.url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self._thread.join(timeout=5)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline mock of the PortOptimizer portal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--rows", type=int, default=DEFAULT_MOCK_CONFIG["rows"])
+    parser.add_argument("--page-latency-ms", type=int, default=DEFAULT_MOCK_CONFIG["page_latency_ms"])
+    parser.add_argument("--table-latency-ms", type=int, default=DEFAULT_MOCK_CONFIG["table_latency_ms"])
+    parser.add_argument("--download-latency-ms", type=int, default=DEFAULT_MOCK_CONFIG["download_latency_ms"])
+    parser.add_argument("--jitter-ms", type=int, default=DEFAULT_MOCK_CONFIG["jitter_ms"])
+    parser.add_argument("--failure-rate", type=float, default=DEFAULT_MOCK_CONFIG["failure_rate"])
+    parser.add_argument("--failure-modes", default="",
+                        help=f"Comma separated, any of: {', '.join(FAILURE_MODES)}")
+    return parser.parse_args(argv)
+
+
+def config_from_args(args):
+    """Mock portal config dict from parsed command line arguments"""
+    failure_modes = [mode.strip() for mode in args.failure_modes.split(",") if mode.strip()]
+    unknown = [mode for mode in failure_modes if mode not in FAILURE_MODES]
+    if unknown:
+        raise SystemExit(f"Unknown failure mode(s): {', '.join(unknown)}")
+    return {
+        "rows": args.rows,
+        "page_latency_ms": args.page_latency_ms,
+        "table_latency_ms": args.table_latency_ms,
+        "download_latency_ms": args.download_latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "failure_rate": args.failure_rate,
+        "failure_modes": failure_modes,
+    }
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    config = config_from_args(args)
+    print("=" * 50)
+    print("PortOptimizer Mock Portal")
+    print("=" * 50)
+    print(json.dumps(config, indent=2))
+    print(f"Point the automation at it with PORTOPTIMIZER_PORTAL_URL=http://{args.host}:{args.port}/")
+    print("=" * 50)
+    create_mock_portal(config).run(host=args.host, port=args.port, debug=False, threaded=True)
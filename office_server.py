@@ -0,0 +1,413 @@
+"""
+Persistent LibreOffice conversion server
+
+`libreoffice --headless --convert-to pdf` starts the whole office suite for
+every workbook and collides with other conversions on the user profile lock.
+Instead, a small pool of long-lived headless soffice processes is kept
+running, each with its own user profile and a UNO socket listener on its own
+port. Conversion jobs go over that connection: load the workbook hidden, apply
+Legal landscape and the light-gray borders, export with calc_pdf_Export, close.
+
+- a job waits for a free worker, so at most `workers` conversions run at once
+- a worker is health-checked before each job and by the periodic check(), and
+  restarted when its process died or stopped answering
+- a job running longer than job_timeout_seconds kills its worker (the job
+  fails, the worker is restarted for the next one)
+- workers are recycled after max_jobs conversions to keep soffice memory flat
+
+Needs LibreOffice and its Python UNO bridge (the `uno` module, e.g. the
+python3-uno package or LibreOffice's bundled Python).
+"""
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import psutil
+
+from chrome_watchdog import kill_process_tree, kill_processes
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    UNO_AVAILABLE = True
+except ImportError:
+    UNO_AVAILABLE = False
+
+
+OFFICE_PROFILES_DIR = "office_profiles"
+
+DEFAULT_OFFICE_SERVER_SETTINGS = {
+    "workers": 2,                    # soffice processes converting at the same time
+    "base_port": 2002,               # Worker i listens on base_port + i
+    "max_jobs": 200,                 # Restart a worker after this many conversions
+    "job_timeout_seconds": 120,      # Kill a worker whose conversion hangs
+    "startup_timeout_seconds": 30,   # Wait this long for a new worker's listener
+    "soffice_path": None,            # Default: soffice / libreoffice on PATH or the standard install
+}
+
+SOFFICE_CANDIDATES = [
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+    "/Applications/LibreOffice.app/Contents/MacOS/soffice",
+    "/usr/lib/libreoffice/program/soffice",
+]
+
+# Legal landscape in 1/100 mm
+LEGAL_WIDTH = 35560
+LEGAL_HEIGHT = 21590
+
+# Light gray (12632256 = 0xC0C0C0) thin border, width in 1/100 mm
+BORDER_COLOR = 0xC0C0C0
+BORDER_WIDTH = 18
+
+
+class OfficeWorkerUnavailable(Exception):
+    """The worker could not take a job (soffice dead or not connected); nothing of the job ran"""
+
+
+def find_soffice(path=None):
+    """soffice executable: the configured path, soffice/libreoffice on PATH or a standard install"""
+    candidates = [path] if path else []
+    candidates += [shutil.which("soffice"), shutil.which("libreoffice")] + SOFFICE_CANDIDATES
+    for candidate in candidates:
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def kill_stale_instances(profile_dir):
+    """Kill soffice processes left running on a worker profile (e.g. by a crashed service)"""
+    marker = Path(profile_dir).resolve().as_uri()
+    stale = []
+    for process in psutil.process_iter(["name", "cmdline"]):
+        try:
+            if "soffice" in (process.info["name"] or "").lower() and any(
+                    marker in argument for argument in process.info["cmdline"] or []):
+                stale.append(process)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    if stale:
+        print(f"[{datetime.now()}] Killing {len(stale)} stale soffice process(es) on {profile_dir}")
+    return kill_processes(stale)
+
+
+def _properties(**values):
+    """UNO PropertyValue tuple from keyword arguments"""
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def format_for_print(document):
+    """Light-gray borders on every sheet's used range, Legal landscape fitted to the page width"""
+    line = uno.createUnoStruct("com.sun.star.table.BorderLine2")
+    line.Color = BORDER_COLOR
+    line.OuterLineWidth = BORDER_WIDTH
+    line.LineWidth = BORDER_WIDTH
+
+    sheets = document.Sheets
+    page_styles = document.StyleFamilies.getByName("PageStyles")
+    for index in range(sheets.Count):
+        sheet = sheets.getByIndex(index)
+        used = sheet.createCursor()
+        used.gotoStartOfUsedArea(False)
+        used.gotoEndOfUsedArea(True)
+        # Cell range borders apply to every cell in the range
+        used.TopBorder = line
+        used.BottomBorder = line
+        used.LeftBorder = line
+        used.RightBorder = line
+
+        style = page_styles.getByName(sheet.PageStyle)
+        style.IsLandscape = True
+        style.Width = LEGAL_WIDTH
+        style.Height = LEGAL_HEIGHT
+        style.ScaleToPagesX = 1
+        style.ScaleToPagesY = 0
+
+
+class OfficeWorker:
+    """One headless soffice process with its own profile and UNO listener"""
+
+    def __init__(self, index, port, soffice, profile_dir, startup_timeout=30):
+        self.index = index
+        self.port = port
+        self.soffice = soffice
+        self.profile_dir = profile_dir
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.desktop = None
+        self.jobs = 0
+        self.started_at = None
+
+    @property
+    def accept_string(self):
+        return f"socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+
+    def start(self):
+        """(Re)start the soffice process and connect to its listener"""
+        self.stop()
+        kill_stale_instances(self.profile_dir)
+        os.makedirs(self.profile_dir, exist_ok=True)
+        start = time.monotonic()
+        self.process = subprocess.Popen(
+            [
+                self.soffice, "--headless", "--invisible", "--nologo", "--nodefault",
+                "--norestore", "--nolockcheck",
+                f"-env:UserInstallation={Path(self.profile_dir).resolve().as_uri()}",
+                f"--accept={self.accept_string}",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.desktop = self._connect()
+        self.jobs = 0
+        self.started_at = datetime.now().isoformat()
+        print(f"[{datetime.now()}] Office worker {self.index} ready on port {self.port} "
+              f"(pid {self.process.pid}, {time.monotonic() - start:.1f}s)")
+
+    def _connect(self):
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise Exception(f"soffice exited with code {self.process.returncode}")
+            try:
+                context = resolver.resolve(f"uno:{self.accept_string}")
+                return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+            except Exception as e:
+                # NoConnectException until the listener is up
+                if time.monotonic() > deadline:
+                    raise Exception(f"Could not connect to soffice on port {self.port}: {str(e)}")
+                time.sleep(0.25)
+
+    def healthy(self):
+        """Process alive and answering over the connection"""
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            return False
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def kill(self):
+        """Kill the soffice process tree (used when a job hangs)"""
+        if self.process is not None:
+            kill_process_tree(self.process.pid)
+
+    def stop(self):
+        """Terminate soffice gracefully, killing it if it does not exit"""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                kill_process_tree(self.process.pid)
+            self.process = None
+
+    def convert(self, excel_path, pdf_path):
+        """Convert one workbook to a Legal landscape PDF with borders (written atomically)"""
+        if self.desktop is None or self.process is None or self.process.poll() is not None:
+            raise OfficeWorkerUnavailable(f"Office worker {self.index} is not running")
+        document = self.desktop.loadComponentFromURL(
+            Path(excel_path).resolve().as_uri(), "_blank", 0, _properties(Hidden=True))
+        if document is None:
+            raise Exception(f"soffice could not open {excel_path}")
+        temp_path = pdf_path + ".tmp"
+        try:
+            format_for_print(document)
+            document.storeToURL(Path(temp_path).resolve().as_uri(), _properties(FilterName="calc_pdf_Export"))
+        finally:
+            document.close(True)
+        os.replace(temp_path, pdf_path)
+        self.jobs += 1
+
+    def status(self):
+        return {
+            "index": self.index,
+            "port": self.port,
+            "pid": self.process.pid if self.process is not None else None,
+            "running": self.process is not None and self.process.poll() is None,
+            "jobs": self.jobs,
+            "started_at": self.started_at,
+        }
+
+
+class OfficeConversionServer:
+    """Pool of persistent soffice workers converting workbooks to PDF over UNO"""
+
+    def __init__(self, settings=None, base_dir=None):
+        self.settings = dict(DEFAULT_OFFICE_SERVER_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.soffice = find_soffice(self.settings.get("soffice_path"))
+        profiles_dir = os.path.join(base_dir or os.getcwd(), OFFICE_PROFILES_DIR)
+        self.workers = [
+            OfficeWorker(
+                index,
+                int(self.settings["base_port"]) + index,
+                self.soffice,
+                os.path.join(profiles_dir, f"worker_{index}"),
+                self.settings["startup_timeout_seconds"],
+            )
+            for index in range(max(1, int(self.settings["workers"])))
+        ]
+        self._idle = queue.Queue()
+        for worker in self.workers:
+            self._idle.put(worker)
+        self.stats = {"jobs": 0, "failures": 0, "restarts": 0, "seconds_total": 0.0}
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Whether LibreOffice and the UNO bridge are installed"""
+        return UNO_AVAILABLE and self.soffice is not None
+
+    def _restart(self, worker):
+        if worker.process is not None:
+            with self._lock:
+                self.stats["restarts"] += 1
+        worker.start()
+
+    def convert(self, excel_path, pdf_path):
+        """
+        Convert a workbook on the next free worker
+
+        Returns:
+            str: pdf_path
+
+        Raises:
+            Exception: when the server is unavailable, no worker frees up in time
+                       or the conversion fails
+        """
+        if not self.available():
+            raise Exception("LibreOffice conversion server not available (needs soffice and the Python uno module)")
+        job_timeout = self.settings["job_timeout_seconds"]
+        try:
+            worker = self._idle.get(timeout=job_timeout * 2)
+        except queue.Empty:
+            raise Exception("No LibreOffice worker became free in time")
+        try:
+            # A second attempt only when the worker could not take the job at all (restart
+            # failed, soffice dead or not connected). A job that started and failed or hung
+            # is not retried: a hung one has used up the job timeout already.
+            for attempt in range(2):
+                try:
+                    if not worker.healthy() or worker.jobs >= self.settings["max_jobs"]:
+                        self._restart(worker)
+                except Exception as e:
+                    if attempt:
+                        raise
+                    print(f"[{datetime.now()}] Office worker {worker.index} could not start ({str(e)}), retrying")
+                    continue
+                start = time.monotonic()
+                timed_out = threading.Event()
+
+                def kill_hung_job():
+                    timed_out.set()
+                    worker.kill()
+                watchdog = threading.Timer(job_timeout, kill_hung_job)
+                watchdog.start()
+                try:
+                    worker.convert(excel_path, pdf_path)
+                except Exception as e:
+                    with self._lock:
+                        self.stats["failures"] += 1
+                    print(f"[{datetime.now()}] Office worker {worker.index} failed on "
+                          f"{os.path.basename(excel_path)}: {str(e)}")
+                    if timed_out.is_set():
+                        raise Exception(f"LibreOffice conversion did not finish within {job_timeout}s "
+                                        f"(worker {worker.index} killed)") from e
+                    if attempt or not isinstance(e, OfficeWorkerUnavailable):
+                        raise
+                    continue
+                finally:
+                    watchdog.cancel()
+                elapsed = time.monotonic() - start
+                with self._lock:
+                    self.stats["jobs"] += 1
+                    self.stats["seconds_total"] += elapsed
+                print(f"[{datetime.now()}] Office worker {worker.index} converted "
+                      f"{os.path.basename(excel_path)} in {elapsed:.2f}s")
+                return pdf_path
+        finally:
+            self._idle.put(worker)
+
+    def start(self):
+        """Start every worker ahead of the first job"""
+        if not self.available():
+            return False
+        for worker in self.workers:
+            if not worker.healthy():
+                self._restart(worker)
+        return True
+
+    def check(self):
+        """Health check: restart started workers that died or stopped answering (idle ones only)"""
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            for worker in idle:
+                if worker.process is not None and not worker.healthy():
+                    print(f"[{datetime.now()}] Office worker {worker.index} unhealthy, restarting")
+                    try:
+                        self._restart(worker)
+                    except Exception as e:
+                        print(f"[{datetime.now()}] Could not restart office worker {worker.index}: {str(e)}")
+        finally:
+            for worker in idle:
+                self._idle.put(worker)
+
+    def stop(self):
+        """Stop every worker (service shutdown)"""
+        for worker in self.workers:
+            try:
+                worker.stop()
+            except Exception as e:
+                print(f"[{datetime.now()}] Error stopping office worker {worker.index}: {str(e)}")
+
+    def status(self):
+        jobs = self.stats["jobs"]
+        return {
+            "available": self.available(),
+            "soffice": self.soffice,
+            "jobs": jobs,
+            "failures": self.stats["failures"],
+            "restarts": self.stats["restarts"],
+            "avg_seconds": round(self.stats["seconds_total"] / jobs, 3) if jobs else None,
+            "workers": [worker.status() for worker in self.workers],
+        }
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_office_server(settings=None):
+    """Process-wide conversion server (settings apply on first call), stopped at exit"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = OfficeConversionServer(settings=settings)
+            atexit.register(_server.stop)
+        return _server
@@ -0,0 +1,200 @@
+"""
+Native full-page capture through Chrome DevTools
+
+Replaces the GoFullPage extension trigger (keyboard shortcuts, foreground
+window hacks, multi-second waits): Page.captureScreenshot with
+captureBeyondViewport renders the whole page in one call, in headless Chrome
+as well as on the desktop, so several captures can run side by side.
+
+The portal keeps its tables in scrolling containers sized to the viewport, so
+before the capture the viewport is stretched to the height of the tallest
+scrolled content; the containers then grow and nothing stays hidden below a
+scrollbar.
+
+print_report_pdf prints the rendered report straight to a Legal landscape PDF
+with Page.printToPDF. The watermark header is injected as page CSS, so there is
+no Excel export, Office conversion or PDF rewrite for the watermark.
+"""
+import base64
+import os
+import time
+from datetime import datetime, timedelta
+
+
+# Chrome cannot render a single surface taller than this
+MAX_CAPTURE_HEIGHT = 16384
+
+# Height the page needs to show every scroll container's full content
+CONTENT_HEIGHT_SCRIPT = """
+var doc = document.documentElement;
+var height = Math.max(doc.scrollHeight, document.body ? document.body.scrollHeight : 0);
+document.querySelectorAll('*').forEach(function(el) {
+    if (el.scrollHeight <= el.clientHeight + 1) { return; }
+    var overflow = window.getComputedStyle(el).overflowY;
+    if (overflow !== 'auto' && overflow !== 'scroll') { return; }
+    height = Math.max(height, doc.scrollHeight + el.scrollHeight - el.clientHeight);
+});
+return [Math.ceil(doc.clientWidth || window.innerWidth), Math.ceil(height)];
+"""
+
+
+def screenshot_filename(directory):
+    """
+    Free YYYY-MM-DD_HH-MM-SS.png name (UTC) in directory, as /screenshots/range
+    expects. The file is created empty to reserve the name; parallel captures
+    in the same second move on to the next free second.
+    """
+    timestamp = datetime.utcnow()
+    while True:
+        filename = f"{timestamp.strftime('%Y-%m-%d_%H-%M-%S')}.png"
+        try:
+            os.close(os.open(os.path.join(directory, filename), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return filename
+        except FileExistsError:
+            timestamp += timedelta(seconds=1)
+
+
+def capture_full_page(driver, max_height=MAX_CAPTURE_HEIGHT):
+    """
+    Screenshot of the whole page, including content below the fold and inside
+    scrolling containers
+
+    Returns:
+        bytes: PNG data
+    """
+    width, height = driver.execute_script(CONTENT_HEIGHT_SCRIPT)
+    height = min(max(height, 1), max_height)
+    driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+        "width": width,
+        "height": height,
+        "deviceScaleFactor": 1,
+        "mobile": False,
+    })
+    try:
+        # Give the layout one frame to follow the taller viewport
+        driver.execute_async_script("var done = arguments[0]; requestAnimationFrame(function() { done(); });")
+        result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "png",
+            "captureBeyondViewport": True,
+            "fromSurface": True,
+            "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1},
+        })
+    finally:
+        driver.execute_cdp_cmd("Emulation.clearDeviceMetricsOverride", {})
+    return base64.b64decode(result["data"])
+
+
+def save_full_page_screenshot(driver, directory="screenshots"):
+    """
+    Capture the page and write it to directory under a timestamped name
+
+    Returns:
+        str: filename of the saved PNG
+    """
+    os.makedirs(directory, exist_ok=True)
+    start = time.monotonic()
+    data = capture_full_page(driver)
+    filename = screenshot_filename(directory)
+    path = os.path.join(directory, filename)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    print(f"[{datetime.now()}] Full-page screenshot saved: {filename} "
+          f"({len(data) // 1024} KB in {time.monotonic() - start:.2f}s)")
+    return filename
+
+
+# Legal landscape, in inches (printToPDF takes portrait paper plus landscape=True)
+LEGAL_WIDTH_INCHES = 8.5
+LEGAL_HEIGHT_INCHES = 14
+PRINT_MARGIN_INCHES = 0.4
+CSS_PIXELS_PER_INCH = 96
+
+# Same look as the PyPDF2 watermark: bold, 43pt, gray at 30% opacity, centered
+# at the top of every page (position: fixed repeats on each printed page)
+PRINT_STYLE = """
+html, body { background: #fff !important; }
+#po-print-watermark {
+    position: fixed; top: 2pt; left: 0; right: 0; z-index: 2147483647;
+    text-align: center; pointer-events: none; white-space: pre;
+    font: bold 43pt Helvetica, Arial, sans-serif; line-height: 1.2;
+    color: rgba(128, 128, 128, 0.3);
+}
+"""
+
+# Un-clips the report table's scrolling ancestors so every row is printed,
+# adds the style and watermark, and returns the table's full width in CSS px
+PREPARE_PRINT_SCRIPT = """
+var css = arguments[0], watermark = arguments[1];
+var style = document.getElementById('po-print-style') || document.createElement('style');
+style.id = 'po-print-style';
+style.textContent = css;
+document.head.appendChild(style);
+var old = document.getElementById('po-print-watermark');
+if (old) { old.remove(); }
+if (watermark) {
+    var mark = document.createElement('div');
+    mark.id = 'po-print-watermark';
+    mark.textContent = watermark;
+    document.body.appendChild(mark);
+}
+var table = document.querySelector('mat-table, table, [role="table"], [role="grid"]');
+if (!table) { return document.documentElement.scrollWidth; }
+for (var el = table.parentElement; el && el !== document.documentElement; el = el.parentElement) {
+    el.style.setProperty('overflow', 'visible', 'important');
+    el.style.setProperty('height', 'auto', 'important');
+    el.style.setProperty('max-height', 'none', 'important');
+    el.setAttribute('data-po-print', '1');
+}
+return Math.max(table.scrollWidth, table.getBoundingClientRect().width);
+"""
+
+# Undoes PREPARE_PRINT_SCRIPT so later tabs in the same session behave as before
+RESTORE_PRINT_SCRIPT = """
+['po-print-style', 'po-print-watermark'].forEach(function(id) {
+    var el = document.getElementById(id);
+    if (el) { el.remove(); }
+});
+document.querySelectorAll('[data-po-print]').forEach(function(el) {
+    ['overflow', 'height', 'max-height'].forEach(function(name) { el.style.removeProperty(name); });
+    el.removeAttribute('data-po-print');
+});
+"""
+
+
+def print_report_pdf(driver, pdf_path, watermark_text=None):
+    """
+    Print the rendered report page to a Legal landscape PDF with an optional
+    watermark header on every page; wide tables are scaled down to fit the width
+
+    Returns:
+        str: pdf_path
+    """
+    start = time.monotonic()
+    content_width = driver.execute_script(PREPARE_PRINT_SCRIPT, PRINT_STYLE, watermark_text or "")
+    printable_width = (LEGAL_HEIGHT_INCHES - 2 * PRINT_MARGIN_INCHES) * CSS_PIXELS_PER_INCH
+    scale = max(0.1, min(1.0, printable_width / content_width)) if content_width else 1.0
+    try:
+        result = driver.execute_cdp_cmd("Page.printToPDF", {
+            "landscape": True,
+            "paperWidth": LEGAL_WIDTH_INCHES,
+            "paperHeight": LEGAL_HEIGHT_INCHES,
+            "marginTop": PRINT_MARGIN_INCHES,
+            "marginBottom": PRINT_MARGIN_INCHES,
+            "marginLeft": PRINT_MARGIN_INCHES,
+            "marginRight": PRINT_MARGIN_INCHES,
+            "printBackground": True,
+            "scale": round(scale, 3),
+        })
+    finally:
+        driver.execute_script(RESTORE_PRINT_SCRIPT)
+    data = base64.b64decode(result["data"])
+    os.makedirs(os.path.dirname(os.path.abspath(pdf_path)), exist_ok=True)
+    temp_path = pdf_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, pdf_path)
+    print(f"[{datetime.now()}] Report printed to PDF: {os.path.basename(pdf_path)} "
+          f"({len(data) // 1024} KB, scale {scale:.2f}, {time.monotonic() - start:.2f}s)")
+    return pdf_path
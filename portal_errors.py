@@ -0,0 +1,175 @@
+"""
+Portal error-state classification for the PortOptimizer automation
+
+Every guarded wait also watches the page for known error and challenge states
+(rejected password, MFA prompt, locked account, maintenance page, browser
+network error page, generic portal error) and aborts at once with a typed
+PortalError instead of running out the step budget. classify_failure maps any
+exception from a run to a failure reason, and RETRY_POLICY decides whether and
+how soon a run failing for that reason is retried.
+"""
+import re
+import time
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+from download_manager import InvalidWorkbook
+from export_fetcher import ExportAuthExpired
+from wait_conditions import StepTimeout
+
+
+# Failure reasons and whether to retry them: None = do not retry (needs a human),
+# otherwise the base delay in minutes before the next attempt
+RETRY_POLICY = {
+    "bad_credentials": None,
+    "account_locked": None,
+    "mfa_challenge": None,
+    "maintenance": 30,
+    "network_error": 2,
+    "portal_error": 2,
+    "session_expired": 1,
+    "timeout": 5,
+    "invalid_workbook": 2,
+    "browser_error": 2,
+    "unknown": 5,
+}
+
+# (reason, regex) checked against alert/error text first, then the title, then
+# the page text (the latter only off the dashboard, see detect_portal_error)
+ERROR_SIGNATURES = [
+    ("account_locked", r"account (is|has been) locked|too many (failed )?(sign[- ]in |login )?attempts|account locked"),
+    ("bad_credentials", r"unable to sign in|invalid credentials|incorrect (username|password)|password is incorrect"
+                        r"|authentication failed|invalid (username|password)|user does not exist"),
+    ("mfa_challenge", r"verify with okta verify|get a push notification|enter a code|select a security method"
+                      r"|set up (multifactor|security methods)|one-time (pass)?code|verification code"),
+    ("maintenance", r"scheduled maintenance|under maintenance|down for maintenance|temporarily unavailable"
+                    r"|service unavailable|we('| a)re be right back|bad gateway|gateway time-?out"),
+    ("network_error", r"this site can.t be reached|err_(name_not_resolved|connection_[a-z_]+|internet_disconnected|timed_out|address_unreachable)"),
+    ("portal_error", r"something went wrong|internal server error|an unexpected error|application error"),
+]
+
+PAGE_STATE_SCRIPT = """
+var alerts = [];
+document.querySelectorAll(".o-form-error-container, .okta-form-infobox-error, [role='alert'], .error, .alert-danger")
+    .forEach(function(el) { if (el.innerText) { alerts.push(el.innerText); } });
+return [
+    window.location.href,
+    document.title || '',
+    alerts.join(' | ').slice(0, 2000),
+    document.body ? document.body.innerText.slice(0, 8000) : '',
+    document.querySelector(arguments[0]) !== null
+];
+"""
+
+# Present once the dashboard (report tab bar) is rendered
+DASHBOARD_SELECTOR = ".mdc-tab__text-label"
+
+# Reasons that can show up after login without the session being gone
+PAGE_ERROR_REASONS = ("maintenance", "network_error", "portal_error")
+
+
+class PortalError(Exception):
+    """The portal showed a known error or challenge state"""
+
+    def __init__(self, reason, detail=None, phase=None):
+        self.reason = reason
+        self.detail = detail
+        self.phase = phase
+        message = f"Portal error '{reason}'"
+        if phase:
+            message += f" during {phase}"
+        if detail:
+            message += f": {detail}"
+        super().__init__(message)
+
+    @property
+    def retryable(self):
+        return RETRY_POLICY.get(self.reason) is not None
+
+
+def _match(text, reasons):
+    text = (text or "").lower()
+    for reason, pattern in ERROR_SIGNATURES:
+        if reasons and reason not in reasons:
+            continue
+        found = re.search(pattern, text)
+        if found:
+            return reason, found.group(0)
+    return None
+
+
+def detect_portal_error(driver, reasons=None):
+    """
+    Classify the current page in one script call.
+
+    Returns:
+        tuple or None: (reason, matched text) of the first known error state
+    """
+    try:
+        url, title, alerts, body, on_dashboard = driver.execute_script(PAGE_STATE_SCRIPT, DASHBOARD_SELECTOR)
+    except Exception:
+        return None
+    if url.startswith("chrome-error://") and (not reasons or "network_error" in reasons):
+        return "network_error", title or url
+    # Error boxes are the most specific signal, then the title, then the page text.
+    # The dashboard's own text (notices, report rows) is not an error page.
+    if on_dashboard:
+        body = ""
+    return _match(alerts, reasons) or _match(title, reasons) or _match(body, reasons)
+
+
+def guarded(condition, phase=None, reasons=None, interval=1.0):
+    """
+    Wrap a readiness condition so that, while it is not met, the page is also
+    checked (at most every interval seconds) for known error states. A match
+    raises PortalError, which ends the PhaseTimer wait immediately.
+    """
+    state = {"checked_at": 0.0}
+
+    def _predicate(driver):
+        pending = None
+        try:
+            result = condition(driver)
+        except WebDriverException as e:
+            # Element not there (yet): still look for an error state, then let the wait retry
+            result, pending = False, e
+        if result:
+            return result
+        now = time.monotonic()
+        if now - state["checked_at"] >= interval:
+            state["checked_at"] = now
+            error = detect_portal_error(driver, reasons)
+            if error:
+                reason, detail = error
+                print(f"[{datetime.now()}] Portal error state detected: {reason} ({detail})")
+                raise PortalError(reason, detail, phase)
+        if pending:
+            raise pending
+        return result
+    return _predicate
+
+
+def classify_failure(error):
+    """Failure reason for an exception raised by a run (follows wrapped causes)"""
+    while error.__cause__ is not None and not isinstance(error, (PortalError, StepTimeout)):
+        error = error.__cause__
+    if isinstance(error, PortalError):
+        return error.reason
+    if isinstance(error, StepTimeout):
+        return "timeout"
+    if isinstance(error, InvalidWorkbook):
+        return "invalid_workbook"
+    if isinstance(error, ExportAuthExpired):
+        return "session_expired"
+    if isinstance(error, WebDriverException):
+        message = str(error).lower()
+        if "net::err_" in message or "err_name_not_resolved" in message or "err_connection" in message:
+            return "network_error"
+        return "browser_error"
+    return "unknown"
+
+
+def retry_delay_minutes(reason):
+    """Base retry delay in minutes for a failure reason, or None when it must not be retried"""
+    return RETRY_POLICY.get(reason or "unknown", RETRY_POLICY["unknown"])
@@ -0,0 +1,103 @@
+"""
+Resource usage of a browser run
+
+Samples the chromedriver process tree (chromedriver + every Chrome process it
+spawns) in a background thread and reports the CPU time the run consumed and
+the peak resident memory, so we can size how many exports one core handles.
+"""
+import threading
+from datetime import datetime
+
+import psutil
+
+
+def process_tree(root_pid):
+    """Root process plus all of its descendants (missing processes are skipped)"""
+    try:
+        root = psutil.Process(root_pid)
+        return [root] + root.children(recursive=True)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return []
+
+
+def driver_root_pid(driver):
+    """PID of the chromedriver service behind a Selenium driver, or None"""
+    service = getattr(driver, "service", None)
+    if not service or not getattr(service, "process", None):
+        return None
+    return service.process.pid
+
+
+def tree_usage(root_pid):
+    """Current RSS (MB), CPU percent and process count of a process tree"""
+    rss = 0
+    cpu_percent = 0.0
+    processes = process_tree(root_pid)
+    for process in processes:
+        try:
+            rss += process.memory_info().rss
+            cpu_percent += process.cpu_percent(interval=None)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return {
+        "rss_mb": round(rss / (1024 * 1024), 1),
+        "cpu_percent": round(cpu_percent, 1),
+        "processes": len(processes),
+    }
+
+
+class ProcessTreeMonitor:
+    """Tracks CPU seconds and peak RSS of a process tree while a run is active"""
+
+    def __init__(self, root_pid, interval=0.5):
+        self.root_pid = root_pid
+        self.interval = interval
+        self._baseline = {}     # CPU seconds already used by processes alive at start
+        self._last_cpu = {}     # Latest CPU seconds seen per PID (processes may exit)
+        self._peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = None
+
+    def _sample(self, initial=False):
+        rss = 0
+        for process in process_tree(self.root_pid):
+            try:
+                with process.oneshot():
+                    times = process.cpu_times()
+                    cpu = times.user + times.system
+                    rss += process.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            if initial:
+                self._baseline[process.pid] = cpu
+            self._last_cpu[process.pid] = cpu
+        self._peak_rss = max(self._peak_rss, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._started_at = datetime.now()
+        self._sample(initial=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and return the run's resource usage"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+        self._sample()
+        cpu_seconds = sum(
+            cpu - self._baseline.get(pid, 0.0) for pid, cpu in self._last_cpu.items()
+        )
+        elapsed = (datetime.now() - self._started_at).total_seconds() if self._started_at else 0
+        return {
+            "cpu_seconds": round(cpu_seconds, 2),
+            "wall_seconds": round(elapsed, 2),
+            "peak_rss_mb": round(self._peak_rss / (1024 * 1024), 1),
+            "processes_seen": len(self._last_cpu),
+        }
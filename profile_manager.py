@@ -0,0 +1,217 @@
+"""
+Snapshot-based Chrome profiles
+
+A persistent Chrome profile that is reused forever keeps growing (HTTP and code
+cache, history, service worker and IndexedDB storage) and every launch gets
+slower. Instead, a minimal golden snapshot per profile keeps only what the
+automation needs between runs:
+
+- extension permissions and settings (Preferences, extension state)
+- auth state (cookies, local storage and the Local State file holding the
+  cookie encryption key)
+
+Every run starts Chrome on a throw-away copy of the snapshot. After the run
+the copy's auth state is written back into the snapshot (so a refreshed portal
+session survives) and the copy is deleted with everything else Chrome stored.
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+PROFILE_SNAPSHOTS_DIR = "chrome_profile_snapshots"
+RUN_PROFILES_DIR = "chrome_profile_runs"
+MAX_LAUNCH_SAMPLES = 50
+
+# Profile entries kept in the snapshot (relative to the user data dir)
+SNAPSHOT_ENTRIES = [
+    "Local State",                              # Profile list and cookie encryption key
+    "Default/Preferences",                      # Extension permissions and browser settings
+    "Default/Secure Preferences",
+    "Default/Extensions",
+    "Default/Extension State",
+    "Default/Extension Rules",
+    "Default/Extension Scripts",
+    "Default/Local Extension Settings",
+    "Default/Cookies",                          # Portal/Okta session cookies
+    "Default/Cookies-journal",
+    "Default/Network/Cookies",
+    "Default/Network/Cookies-journal",
+    "Default/Local Storage",                    # Okta token storage
+]
+
+
+def dir_size_mb(path):
+    """Total size of the files below path (MB)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return round(total / (1024 * 1024), 2)
+
+
+def copy_entries(source_dir, target_dir, entries=None):
+    """Copy the snapshot entries that exist in source_dir into target_dir"""
+    copied = 0
+    for entry in entries or SNAPSHOT_ENTRIES:
+        source = os.path.join(source_dir, entry)
+        target = os.path.join(target_dir, entry)
+        if not os.path.exists(source):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.isdir(source):
+            shutil.copytree(source, target, dirs_exist_ok=True)
+        else:
+            shutil.copy2(source, target)
+        copied += 1
+    return copied
+
+
+class ProfileManager:
+    """Golden profile snapshot plus per-run throw-away copies for one Chrome profile"""
+
+    def __init__(self, name, source_dir=None, base_dir=None):
+        """
+        name: Snapshot name (e.g. "chrome_profile" or "<account>_headless")
+        source_dir: Persistent profile the snapshot is seeded from on first use
+        """
+        base_dir = base_dir or os.getcwd()
+        self.name = name
+        self.source_dir = source_dir
+        self.snapshot_dir = os.path.join(base_dir, PROFILE_SNAPSHOTS_DIR, name)
+        self.runs_dir = os.path.join(base_dir, RUN_PROFILES_DIR)
+        self.stats = {"checkouts": 0, "releases": 0, "auth_refreshes": 0, "copy_seconds_total": 0.0}
+        self.launches = {"snapshot": [], "persistent": []}
+        self._lock = threading.Lock()
+
+    def ensure_snapshot(self):
+        """Create the snapshot from the persistent profile (or empty) if it does not exist yet"""
+        if os.path.isdir(self.snapshot_dir):
+            return self.snapshot_dir
+        os.makedirs(os.path.dirname(self.snapshot_dir), exist_ok=True)
+        temp_dir = f"{self.snapshot_dir}.new"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        if self.source_dir and os.path.isdir(self.source_dir):
+            copied = copy_entries(self.source_dir, temp_dir)
+            print(f"[{datetime.now()}] Profile snapshot '{self.name}' created from {self.source_dir} "
+                  f"({copied} entries, {dir_size_mb(temp_dir)} MB of {dir_size_mb(self.source_dir)} MB)")
+        else:
+            print(f"[{datetime.now()}] Profile snapshot '{self.name}' created empty")
+        os.replace(temp_dir, self.snapshot_dir)
+        return self.snapshot_dir
+
+    def checkout(self):
+        """
+        Fresh copy of the snapshot for one browser run
+
+        Returns:
+            str: user data dir to launch Chrome with
+        """
+        run_dir = os.path.join(self.runs_dir, f"{self.name}_{uuid.uuid4().hex[:8]}")
+        start = time.monotonic()
+        with self._lock:
+            self.ensure_snapshot()
+            shutil.copytree(self.snapshot_dir, run_dir)
+        elapsed = time.monotonic() - start
+        self.stats["checkouts"] += 1
+        self.stats["copy_seconds_total"] += elapsed
+        print(f"[{datetime.now()}] Profile '{self.name}' checked out in {elapsed * 1000:.0f}ms: {run_dir}")
+        return run_dir
+
+    def release(self, run_dir, keep_auth=True):
+        """
+        Delete a run's profile copy. With keep_auth, its extension and auth
+        state first replaces the snapshot's (Chrome must have exited).
+        """
+        if not run_dir:
+            return
+        try:
+            if keep_auth and os.path.isdir(run_dir):
+                self._refresh_snapshot(run_dir)
+        except Exception as e:
+            print(f"[{datetime.now()}] Could not refresh profile snapshot '{self.name}': {str(e)}")
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+            self.stats["releases"] += 1
+
+    def _refresh_snapshot(self, run_dir):
+        with self._lock:
+            self.ensure_snapshot()
+            new_dir = f"{self.snapshot_dir}.new"
+            old_dir = f"{self.snapshot_dir}.old"
+            shutil.rmtree(new_dir, ignore_errors=True)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            # Current snapshot as the base, then the run's newer state on top
+            shutil.copytree(self.snapshot_dir, new_dir)
+            copy_entries(run_dir, new_dir)
+            os.replace(self.snapshot_dir, old_dir)
+            os.replace(new_dir, self.snapshot_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        self.stats["auth_refreshes"] += 1
+
+    def record_launch(self, seconds, snapshot=True):
+        """Remember a browser launch duration for the before/after comparison"""
+        samples = self.launches["snapshot" if snapshot else "persistent"]
+        samples.append(round(seconds, 3))
+        del samples[:-MAX_LAUNCH_SAMPLES]
+
+    def summary(self):
+        """Profile sizes, copy time and launch times with and without the snapshot"""
+        def launch_summary(samples):
+            if not samples:
+                return None
+            return {
+                "count": len(samples),
+                "avg_seconds": round(sum(samples) / len(samples), 3),
+                "last_seconds": samples[-1],
+            }
+
+        checkouts = self.stats["checkouts"]
+        return {
+            "name": self.name,
+            "snapshot_dir": self.snapshot_dir,
+            "snapshot_size_mb": dir_size_mb(self.snapshot_dir) if os.path.isdir(self.snapshot_dir) else None,
+            "persistent_size_mb": (dir_size_mb(self.source_dir)
+                                   if self.source_dir and os.path.isdir(self.source_dir) else None),
+            "checkouts": checkouts,
+            "auth_refreshes": self.stats["auth_refreshes"],
+            "avg_copy_ms": round(self.stats["copy_seconds_total"] * 1000 / checkouts, 1) if checkouts else None,
+            "launch_snapshot": launch_summary(self.launches["snapshot"]),
+            "launch_persistent": launch_summary(self.launches["persistent"]),
+        }
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_profile_manager(name, source_dir=None):
+    """Process-wide ProfileManager per snapshot name"""
+    with _managers_lock:
+        if name not in _managers:
+            _managers[name] = ProfileManager(name, source_dir)
+        return _managers[name]
+
+
+def profile_managers():
+    """Every ProfileManager used by this process"""
+    with _managers_lock:
+        return list(_managers.values())
+
+
+def cleanup_run_profiles(base_dir=None):
+    """Delete every run profile copy (call on startup, after orphaned Chrome is reaped)"""
+    runs_dir = os.path.join(base_dir or os.getcwd(), RUN_PROFILES_DIR)
+    if not os.path.isdir(runs_dir):
+        return 0
+    entries = os.listdir(runs_dir)
+    for entry in entries:
+        shutil.rmtree(os.path.join(runs_dir, entry), ignore_errors=True)
+    return len(entries)
@@ -0,0 +1,150 @@
+"""
+Structured Return Signal data straight from the live page
+
+Reads the report table from the DOM in one script call (header rows skipped,
+rowspan cells carried down) and builds the same structured document as
+tester/create_structured_report.py does from the Excel export:
+
+    {"date": ..., "data": [{"terminal", "shipping_line",
+      "container_acceptance": {"20ST": {"Shift 1": "YES", "Shift 2": ""}, ...}}],
+     "key": {"YES": "accepting", "NO": "not accepting", "DUAL": "dual only"}}
+
+so data consumers get fresh JSON without downloading or parsing a workbook.
+"""
+import json
+import os
+from datetime import datetime
+
+
+CONTAINER_TYPES = ["20ST", "40ST", "40HC", "45", "20RF", "40RF", "Special", "Flat"]
+SHIFTS = ["Shift 1", "Shift 2"]
+ACCEPTANCE_KEY = {
+    "YES": "accepting",
+    "NO": "not accepting",
+    "DUAL": "dual only",
+}
+STRUCTURED_DATA_DIR = os.path.join("downloads", "json")
+
+# Body rows of the first report table as lists of cell texts. Header rows
+# (thead, th-only, mat-header-row, columnheader) are skipped and cells spanning
+# several rows are repeated in each of them, so every row has the full width.
+EXTRACT_TABLE_SCRIPT = """
+var table = document.querySelector('mat-table, table, [role="table"], [role="grid"]');
+if (!table) { return null; }
+var rows = table.querySelectorAll('tr, mat-row, [role="row"]');
+var result = [], carry = [];
+for (var r = 0; r < rows.length; r++) {
+    var row = rows[r];
+    if (row.closest('thead') || row.matches('mat-header-row, .mat-header-row, .mat-mdc-header-row')) { continue; }
+    var cells = row.querySelectorAll(':scope > td, :scope > th, :scope > mat-cell, :scope > [role="cell"], :scope > [role="gridcell"]');
+    if (!cells.length || Array.prototype.every.call(cells, function(c) {
+        return c.tagName === 'TH' || c.getAttribute('role') === 'columnheader';
+    })) { continue; }
+    var values = [], c = 0, col = 0;
+    while (c < cells.length || (carry[col] && carry[col].left > 0)) {
+        if (carry[col] && carry[col].left > 0) {
+            values.push(carry[col].text);
+            carry[col].left--;
+            col++;
+            continue;
+        }
+        var cell = cells[c++];
+        var text = (cell.innerText || cell.textContent || '').trim();
+        var span = parseInt(cell.getAttribute('colspan') || '1', 10);
+        var down = parseInt(cell.getAttribute('rowspan') || '1', 10);
+        for (var s = 0; s < span; s++) {
+            values.push(text);
+            if (down > 1) { carry[col] = {text: text, left: down - 1}; }
+            col++;
+        }
+    }
+    result.push(values);
+}
+return result;
+"""
+
+
+def normalize_acceptance(value):
+    """Cell value as one of the key's codes (YES / NO / DUAL), "" for anything else"""
+    value = str(value or "").strip().upper()
+    return value if value in ACCEPTANCE_KEY else ""
+
+
+def structure_rows(rows, date=None):
+    """
+    Structured document from table rows laid out like the Excel export:
+    terminal, shipping line, then Shift 1 / Shift 2 for each container type
+    """
+    data = []
+    for row in rows:
+        terminal = str(row[0]).strip() if len(row) > 0 else ""
+        shipping_line = str(row[1]).strip() if len(row) > 1 else ""
+        if terminal == "" or shipping_line == "":
+            continue
+
+        container_acceptance = {}
+        for i, container_type in enumerate(CONTAINER_TYPES):
+            col_index = 2 + (i * 2)  # Each container type has 2 columns (Shift 1, Shift 2)
+            container_acceptance[container_type] = {
+                shift: normalize_acceptance(row[col_index + offset]) if col_index + offset < len(row) else ""
+                for offset, shift in enumerate(SHIFTS)
+            }
+
+        data.append({
+            "terminal": terminal,
+            "shipping_line": shipping_line,
+            "container_acceptance": container_acceptance,
+        })
+
+    return {
+        "date": date or datetime.now().strftime("%Y-%m-%d"),
+        "data": data,
+        "key": dict(ACCEPTANCE_KEY),
+    }
+
+
+def extract_structured_report(driver, tab_label=None):
+    """
+    Structured document of the report table currently shown in the browser
+
+    Raises:
+        Exception: when the page has no report table
+    """
+    rows = driver.execute_script(EXTRACT_TABLE_SCRIPT)
+    if rows is None:
+        raise Exception("No report table found on the page")
+    document = structure_rows(rows)
+    document["source"] = "dom"
+    document["tab"] = tab_label
+    document["extracted_at"] = datetime.now().isoformat()
+    print(f"[{datetime.now()}] Extracted {len(document['data'])} shipping line row(s) from the page")
+    return document
+
+
+def save_structured_report(document, filename, directory=STRUCTURED_DATA_DIR):
+    """
+    Write the document to directory/filename atomically
+
+    Returns:
+        str: filename
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(document, f, indent=2)
+    os.replace(temp_path, path)
+    return filename
+
+
+def latest_structured_report(directory=STRUCTURED_DATA_DIR, prefix=""):
+    """Filename of the newest saved structured document (optionally by prefix), or None"""
+    if not os.path.isdir(directory):
+        return None
+    files = [
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".json") and filename.startswith(prefix)
+    ]
+    if not files:
+        return None
+    return max(files, key=lambda filename: os.path.getmtime(os.path.join(directory, filename)))
@@ -0,0 +1,118 @@
+"""
+Declarative registry of the portal reports to export each cycle
+
+Reports are stored in reports.json. Each entry names the portal tab to export,
+the filename prefix of the saved workbook and, optionally, its own portal
+account (otherwise the login credentials from system settings are used).
+"""
+import json
+import os
+import re
+
+
+SAFE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def _safe_name(value):
+    """value is a non-empty string of letters, digits, '_' or '-'"""
+    return isinstance(value, str) and bool(SAFE_NAME_PATTERN.match(value))
+
+
+class ReportRegistry:
+    """Manages report definitions stored in a JSON file"""
+
+    REGISTRY_FILE = "reports.json"
+
+    DEFAULT_REPORTS = [
+        {
+            "id": "pola_return_signal",
+            "enabled": True,
+            "tab": "Return Signal",
+            "file_prefix": "POLA_Empty_Returns_",
+            "credentials": None,   # None: use login_credentials from system settings
+            "convert_pdf": True
+        }
+    ]
+
+    REPORT_FIELDS = ("id", "enabled", "tab", "file_prefix", "credentials", "convert_pdf")
+
+    def __init__(self, registry_file=None):
+        """Initialize registry, create file if it doesn't exist"""
+        self.registry_file = registry_file or self.REGISTRY_FILE
+        if not os.path.exists(self.registry_file):
+            self._save_reports(self.DEFAULT_REPORTS)
+
+    def _load_reports(self):
+        """Load report definitions from file"""
+        try:
+            with open(self.registry_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading reports: {e}")
+            return [dict(report) for report in self.DEFAULT_REPORTS]
+
+    def _save_reports(self, reports):
+        """Save report definitions to file"""
+        try:
+            with open(self.registry_file, 'w') as f:
+                json.dump(reports, f, indent=4)
+            return True
+        except Exception as e:
+            print(f"Error saving reports: {e}")
+            return False
+
+    def get_reports(self, enabled_only=False):
+        """All report definitions (optionally only enabled ones)"""
+        reports = self._load_reports()
+        if enabled_only:
+            reports = [report for report in reports if report.get("enabled", True)]
+        return reports
+
+    def get_report(self, report_id):
+        """Report definition by id, or None"""
+        for report in self._load_reports():
+            if report.get("id") == report_id:
+                return report
+        return None
+
+    def set_report(self, report):
+        """Add or replace a report definition (matched by id)"""
+        report_id = report.get("id")
+        if not _safe_name(report_id):
+            raise ValueError("Report id must contain only letters, digits, '_' or '-'")
+        if not report.get("tab") or not report.get("file_prefix"):
+            raise ValueError("Report tab and file_prefix are required")
+        if not _safe_name(report["file_prefix"]):
+            # Part of the saved file names: no path separators or '..'
+            raise ValueError("Report file_prefix must contain only letters, digits, '_' or '-'")
+        credentials = report.get("credentials")
+        if credentials is not None and not isinstance(credentials, dict):
+            raise ValueError("Report credentials must be an object with username and password")
+        if credentials is not None and not (credentials.get("username") and credentials.get("password")):
+            raise ValueError("Report credentials need both username and password")
+
+        report = {field: report.get(field) for field in self.REPORT_FIELDS}
+        report["enabled"] = True if report["enabled"] is None else report["enabled"]
+        report["convert_pdf"] = True if report["convert_pdf"] is None else report["convert_pdf"]
+
+        reports = [existing for existing in self._load_reports() if existing.get("id") != report_id]
+        reports.append(report)
+        return self._save_reports(reports)
+
+    def remove_report(self, report_id):
+        """Delete a report definition; returns False if it did not exist"""
+        reports = self._load_reports()
+        remaining = [report for report in reports if report.get("id") != report_id]
+        if len(remaining) == len(reports):
+            return False
+        return self._save_reports(remaining)
+
+    def get_public_reports(self):
+        """Report definitions with passwords hidden"""
+        reports = []
+        for report in self._load_reports():
+            report = dict(report)
+            if report.get("credentials"):
+                report["credentials"] = {"username": report["credentials"].get("username"), "password": "***"}
+            reports.append(report)
+        return reports
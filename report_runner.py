@@ -0,0 +1,169 @@
+"""
+Parallel export of several portal reports with a bounded worker pool
+
+Reports are grouped by portal account: one browser worker logs in once and
+walks the tabs of every report that shares that account, so launch and login
+are paid once per account per cycle. Different accounts run in parallel, each
+with an isolated copy of the Chrome profile and its own login session state.
+"""
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from automation import default_user_data_dir, download_excel_reports
+import run_records
+from portal_errors import classify_failure
+from profile_manager import get_profile_manager
+from session_manager import PortalSessionManager
+from wait_conditions import PhaseTimer
+
+
+WORKER_PROFILES_DIR = "chrome_profiles"
+
+# Profile content that is either locked by a running Chrome or only cache
+PROFILE_COPY_IGNORE = shutil.ignore_patterns(
+    "Singleton*", "lockfile", "*.lock", "Cache", "Code Cache", "GPUCache",
+    "Service Worker", "Crashpad", "ShaderCache", "GrShaderCache",
+)
+
+
+def account_key(username):
+    """Filesystem-safe key for a portal account (profile and session file names)"""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', username or "default")
+
+
+def prepare_worker_profile(worker_id, browser_profile="desktop"):
+    """
+    Chrome profile directory for one worker. Created on first use as a
+    copy of the main profile (so extension permissions carry over), then kept
+    so the account's login session persists between cycles.
+    """
+    source = "chrome_profile_headless" if browser_profile == "headless" else "chrome_profile"
+    source_dir = os.path.join(os.getcwd(), source)
+    profile_dir = os.path.join(os.getcwd(), WORKER_PROFILES_DIR, f"{worker_id}_{browser_profile}")
+    if not os.path.exists(profile_dir):
+        if os.path.isdir(source_dir):
+            print(f"[{datetime.now()}] Creating worker profile for '{worker_id}' from {source}...")
+            shutil.copytree(source_dir, profile_dir, ignore=PROFILE_COPY_IGNORE)
+        else:
+            os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
+
+
+class ReportRunner:
+    """Runs registry reports concurrently, one isolated browser per portal account"""
+
+    def __init__(self, max_workers=2, timeouts=None, export_mode="ui", browser_profile="desktop",
+                 retry_settings=None, profile_mode="persistent", output_options=None, change_probe=None):
+        self.max_workers = max(1, int(max_workers))
+        # Extra per-tab outputs for download_excel_reports (printed PDF, structured JSON)
+        self.output_options = output_options or {}
+        # Optional ChangeProbe: reports whose data has not changed are not exported
+        self.change_probe = change_probe
+        # "snapshot": each account runs on a throw-away copy of its own profile snapshot
+        self.profile_mode = profile_mode
+        self.timeouts = timeouts
+        self.retry_settings = retry_settings
+        # A captured HTTP export belongs to one account and tab, so workers click or capture via CDP
+        self.export_mode = "cdp" if export_mode == "cdp" else "ui"
+        self.browser_profile = browser_profile
+
+    @staticmethod
+    def group_by_account(reports, default_credentials):
+        """List of (credentials, reports) with one entry per portal account, in first-seen order"""
+        groups = {}
+        for report in reports:
+            credentials = report.get("credentials") or default_credentials
+            key = (credentials["username"], credentials["password"])
+            groups.setdefault(key, (credentials, []))[1].append(report)
+        return list(groups.values())
+
+    def _run_account(self, credentials, reports, record=None):
+        # Worker threads charge their spans and counters to the caller's run record
+        with run_records.activate(record):
+            return self._export_account(credentials, reports)
+
+    def _profile_arguments(self, worker_id):
+        """Chrome profile for an account worker: its persistent copy or its snapshot"""
+        if self.profile_mode != "snapshot":
+            return {"user_data_dir": prepare_worker_profile(worker_id, self.browser_profile)}
+        # Seed the account's snapshot from its existing worker profile, else from the main profile
+        worker_profile = os.path.join(os.getcwd(), WORKER_PROFILES_DIR, f"{worker_id}_{self.browser_profile}")
+        source = worker_profile if os.path.isdir(worker_profile) else default_user_data_dir(self.browser_profile)
+        return {"profile_manager": get_profile_manager(f"{worker_id}_{self.browser_profile}", source)}
+
+    def _export_account(self, credentials, reports):
+        worker_id = account_key(credentials["username"])
+        timer = PhaseTimer(self.timeouts)
+        report_ids = [report["id"] for report in reports]
+        print(f"[{datetime.now()}] Worker starting report(s) {', '.join(report_ids)} in one session...")
+        try:
+            exports = download_excel_reports(
+                credentials["username"],
+                credentials["password"],
+                [{"label": report["id"], "tab": report["tab"], "file_prefix": report["file_prefix"]}
+                 for report in reports],
+                phase_timer=timer,
+                session_manager=PortalSessionManager(f"session_state_{worker_id}.json"),
+                export_mode=self.export_mode,
+                browser_profile=self.browser_profile,
+                retry_settings=self.retry_settings,
+                change_probe=self.change_probe,
+                **self._profile_arguments(worker_id),
+                **self.output_options,
+            )
+        except Exception as e:
+            error = f"Worker error: {str(e)}"
+            exports = [{"success": False, "filename": None, "error": error,
+                        "failure_reason": classify_failure(e), "duration_seconds": 0}
+                       for _ in reports]
+
+        results = []
+        for report, export in zip(reports, exports):
+            results.append({
+                "report_id": report["id"],
+                "success": export["success"],
+                "unchanged": export.get("unchanged", False),
+                "filename": export["filename"],
+                "error": export["error"],
+                "failure_reason": export.get("failure_reason"),
+                "data_filename": export.get("data_filename"),
+                "convert_pdf": report.get("convert_pdf", True),
+                "duration_seconds": export["duration_seconds"],
+                # Shared login phases plus this report's own tab/download phases
+                "phases": [phase for phase in timer.phases if phase.get("label") in (None, report["id"])],
+                # Browser usage covers the whole session shared by these reports
+                "resource_usage": timer.resource_usage,
+            })
+        return results
+
+    def run(self, reports, default_credentials, record=None):
+        """
+        Export all reports with at most max_workers browsers at a time.
+        record: Optional RunRecord the workers add their spans and counters to
+
+        Returns:
+            list: one result dict per report, in the order given
+        """
+        if not reports:
+            return []
+        start = time.monotonic()
+        results = {}
+        groups = self.group_by_account(reports, default_credentials)
+        workers = min(self.max_workers, len(groups))
+        print(f"[{datetime.now()}] Running {len(reports)} report(s) for {len(groups)} account(s) with {workers} worker(s)...")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-worker") as executor:
+            futures = [
+                executor.submit(self._run_account, credentials, group, record)
+                for credentials, group in groups
+            ]
+            for future in as_completed(futures):
+                for result in future.result():
+                    results[result["report_id"]] = result
+                    status = "OK" if result["success"] else f"FAILED: {result['error']}"
+                    print(f"[{datetime.now()}] Report '{result['report_id']}' finished in {result['duration_seconds']}s - {status}")
+        print(f"[{datetime.now()}] All reports finished in {time.monotonic() - start:.1f}s")
+        return [results[report["id"]] for report in reports]
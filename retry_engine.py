@@ -0,0 +1,202 @@
+"""
+Retry engine for the export pipeline
+
+Two levels of retries, both with exponential backoff and jitter:
+
+- Step retries (run_step): inside one run, a failed step (browser launch,
+  login, one tab export) is retried in place. The browser and portal session
+  stay alive and the run resumes from the failed step instead of starting
+  over.
+- Retry chains (RetryChainStore): when a run still fails, the follow-up runs
+  form a chain that is capped at max_attempts. Each failed attempt and the
+  time of the next one are written to retry_state.json, so a restart of the
+  service picks the chain up where it left off.
+
+How soon and whether at all a failure is retried depends on its reason
+(portal_errors.RETRY_POLICY).
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import run_records
+from portal_errors import classify_failure, retry_delay_minutes
+
+
+RETRY_STATE_FILE = "retry_state.json"
+MAX_CHAIN_HISTORY = 20
+
+DEFAULT_RETRY_SETTINGS = {
+    "max_attempts": 5,           # Failed runs in a chain before giving up
+    "max_delay_minutes": 120,    # Cap of the backoff between runs
+    "jitter": 0.25,              # +/- fraction applied to every delay
+    "step_attempts": 2,          # Tries of one step (login, tab export) inside a run
+    "step_base_seconds": 2,      # First in-run backoff, doubled per attempt
+    "step_max_seconds": 30,
+}
+
+
+def backoff_delay(base, attempt, max_delay, jitter=0.25):
+    """base * 2^(attempt-1), capped at max_delay, then spread by +/- jitter"""
+    delay = min(max_delay, base * (2 ** max(0, attempt - 1)))
+    return min(max_delay, delay * random.uniform(1 - jitter, 1 + jitter))
+
+
+def run_step(name, func, attempts=2, base_seconds=2, max_seconds=30, jitter=0.25, recover=None):
+    """
+    Run one pipeline step, retrying it in place on retryable failures.
+
+    Args:
+        name: Step name for logs
+        func: Callable performing the step
+        attempts: Maximum tries of this step
+        recover: Optional callable run before each retry to bring the browser back
+                 to the step's starting point (e.g. re-open the dashboard)
+
+    Returns:
+        The step's return value; the last exception is raised when retries run out
+        or the failure reason must not be retried
+    """
+    attempt = 1
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            reason = classify_failure(e)
+            if attempt >= attempts or retry_delay_minutes(reason) is None:
+                raise
+            delay = backoff_delay(base_seconds, attempt, max_seconds, jitter)
+            print(f"[{datetime.now()}] Step '{name}' failed ({reason}): {str(e)} - "
+                  f"retrying in {delay:.1f}s (attempt {attempt + 1}/{attempts})")
+            run_records.count("retries")
+            time.sleep(delay)
+            attempt += 1
+            if recover:
+                try:
+                    recover()
+                except Exception as recover_error:
+                    print(f"[{datetime.now()}] Could not recover before retrying '{name}': {str(recover_error)}")
+
+
+class RetryChainStore:
+    """Persists the active retry chain (and recent finished chains) in a JSON file"""
+
+    STATE_FILE = RETRY_STATE_FILE
+
+    def __init__(self, state_file=None, settings=None):
+        self.state_file = state_file or self.STATE_FILE
+        self.settings = dict(DEFAULT_RETRY_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {"active": None, "history": []}
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            state.setdefault("active", None)
+            state.setdefault("history", [])
+            return state
+        except Exception as e:
+            print(f"Error loading retry state: {e}")
+            return {"active": None, "history": []}
+
+    def _save_state(self, state):
+        try:
+            temp_path = self.state_file + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(state, f, indent=4)
+            os.replace(temp_path, self.state_file)
+            return True
+        except Exception as e:
+            print(f"Error saving retry state: {e}")
+            return False
+
+    @staticmethod
+    def _close(state, status):
+        chain = state["active"]
+        if chain:
+            chain["status"] = status
+            chain["closed_at"] = datetime.now().isoformat()
+            state["history"] = (state["history"] + [chain])[-MAX_CHAIN_HISTORY:]
+            state["active"] = None
+        return chain
+
+    def record_failure(self, report_ids, reason, error=None, continue_chain=False):
+        """
+        Add a failed attempt. A retry run continues the active chain; any other
+        run starts a new one (closing the old chain as superseded).
+
+        Returns:
+            dict: the chain; status "pending" (with next_retry_at), "exhausted"
+                  (max_attempts reached) or "abandoned" (reason is not retried)
+        """
+        with self._lock:
+            state = self._load_state()
+            chain = state["active"]
+            if chain and not continue_chain:
+                self._close(state, "superseded")
+                chain = None
+            if not chain:
+                chain = {
+                    "chain_id": uuid.uuid4().hex[:12],
+                    "started_at": datetime.now().isoformat(),
+                    "attempts": [],
+                }
+                state["active"] = chain
+
+            attempt = len(chain["attempts"]) + 1
+            chain["report_ids"] = report_ids
+            entry = {
+                "attempt": attempt,
+                "failed_at": datetime.now().isoformat(),
+                "reason": reason,
+                "error": error,
+            }
+            chain["attempts"].append(entry)
+
+            base_minutes = retry_delay_minutes(reason)
+            if base_minutes is None:
+                chain = self._close(state, "abandoned")
+            elif attempt >= self.settings["max_attempts"]:
+                chain = self._close(state, "exhausted")
+            else:
+                delay = backoff_delay(base_minutes, attempt, self.settings["max_delay_minutes"], self.settings["jitter"])
+                entry["retry_in_minutes"] = round(delay, 2)
+                chain["next_retry_at"] = (datetime.now() + timedelta(minutes=delay)).isoformat()
+                chain["status"] = "pending"
+            self._save_state(state)
+            return chain
+
+    def record_success(self):
+        """Close the active chain (if any) as succeeded"""
+        with self._lock:
+            state = self._load_state()
+            chain = self._close(state, "succeeded")
+            if chain:
+                self._save_state(state)
+            return chain
+
+    def pending(self):
+        """Active chain waiting for its next attempt, or None"""
+        with self._lock:
+            chain = self._load_state()["active"]
+        if chain and chain.get("status") == "pending":
+            return chain
+        return None
+
+    def stats(self):
+        """Active chain and the most recent finished chains"""
+        with self._lock:
+            state = self._load_state()
+        return {
+            "active": state["active"],
+            "recent": state["history"][-5:],
+            "max_attempts": self.settings["max_attempts"],
+        }
@@ -0,0 +1,259 @@
+"""
+Run records for the export pipeline
+
+Every execution (scheduled cycle, retry or manual download) gets a RunRecord
+holding named spans (browser launch, login, each tab export, PDF conversion,
+watermarking), counters (Selenium commands, retries, bytes downloaded) and
+the outcome. Records are appended to run_records.jsonl so phase durations
+can be compared across weeks through the /runs API.
+
+The active record is kept per thread, so the automation and the PDF helpers
+can add spans and counters without passing the record around. Outside of an
+active record the helpers do nothing.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+
+RUN_RECORDS_FILE = "run_records.jsonl"
+MAX_RUN_RECORDS = 2000
+
+_local = threading.local()
+
+
+class RunRecord:
+    """Spans, counters and outcome of one pipeline execution"""
+
+    def __init__(self, kind="excel_download", trigger=None):
+        self.run_id = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.kind = kind
+        self.trigger = trigger
+        self.started_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.outcome = "running"
+        self.error = None
+        self.spans = []
+        self.counters = {"selenium_commands": 0, "retries": 0, "bytes_downloaded": 0}
+        self.details = {}
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time a named block. Yields the span's attribute dict; set "ok" to False
+        when the block handled its own failure.
+        """
+        entry = {"name": name, "started_at": datetime.now().isoformat(), "ok": True}
+        entry.update(attrs)
+        start = time.monotonic()
+        try:
+            yield entry
+        except Exception as e:
+            entry["ok"] = False
+            entry["error"] = str(e)
+            raise
+        finally:
+            entry["duration_seconds"] = round(time.monotonic() - start, 3)
+            with self._lock:
+                self.spans.append(entry)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self, success, error=None):
+        """
+        Close the record; a run with some failed exports is recorded as "partial",
+        one that skipped its exports because the data had not changed as "unchanged"
+        """
+        if success in ("partial", "unchanged"):
+            self.outcome = success
+        else:
+            self.outcome = "success" if success else "failed"
+        self.error = error
+        self.finished_at = datetime.now().isoformat()
+        self.details["duration_seconds"] = round(time.monotonic() - self._start, 3)
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.details.get("duration_seconds"),
+            "outcome": self.outcome,
+            "error": self.error,
+            "spans": list(self.spans),
+            "counters": dict(self.counters),
+            "details": {k: v for k, v in self.details.items() if k != "duration_seconds"},
+        }
+
+
+@contextmanager
+def activate(record):
+    """Make record the active run record of the current thread"""
+    previous = getattr(_local, "record", None)
+    _local.record = record
+    try:
+        yield record
+    finally:
+        _local.record = previous
+
+
+def current_record():
+    """Active run record of the current thread, or None"""
+    return getattr(_local, "record", None)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Span on the active record (a plain block when no record is active)"""
+    record = current_record()
+    if record is None:
+        yield dict(attrs)
+        return
+    with record.span(name, **attrs) as entry:
+        yield entry
+
+
+def count(name, amount=1):
+    """Add to a counter of the active record, if any"""
+    record = current_record()
+    if record is not None:
+        record.count(name, amount)
+
+
+def annotate(**details):
+    """Attach details (mode, phase waits, resource usage...) to the active record, if any"""
+    record = current_record()
+    if record is not None:
+        record.details.update(details)
+
+
+def traced(name):
+    """
+    Decorator recording each call as a span; a False return value (the PDF
+    helpers' failure convention) marks the span as failed.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name) as entry:
+                result = func(*args, **kwargs)
+                if result is False:
+                    entry["ok"] = False
+                return result
+        return wrapper
+    return decorator
+
+
+def instrument_driver(driver):
+    """
+    Count the Selenium commands a driver sends (charged to whichever run record
+    is active on the calling thread). Safe to call again on a pooled driver.
+    """
+    if getattr(driver, "_run_records_instrumented", False):
+        return driver
+    original_execute = driver.execute
+
+    def _counting_execute(driver_command, params=None):
+        count("selenium_commands")
+        return original_execute(driver_command, params)
+
+    driver.execute = _counting_execute
+    driver._run_records_instrumented = True
+    return driver
+
+
+def span_stats(records):
+    """Per span name: count, average, p95 and max duration over the given records"""
+    durations = {}
+    for record in records:
+        for entry in record.get("spans", []):
+            durations.setdefault(entry["name"], []).append(entry.get("duration_seconds", 0))
+    stats = {}
+    for name, values in durations.items():
+        values.sort()
+        stats[name] = {
+            "count": len(values),
+            "avg_seconds": round(sum(values) / len(values), 3),
+            "p95_seconds": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max_seconds": values[-1],
+        }
+    return stats
+
+
+class RunStore:
+    """Run records persisted as JSON lines (oldest trimmed beyond max_records)"""
+
+    def __init__(self, records_file=None, max_records=MAX_RUN_RECORDS):
+        self.records_file = records_file or RUN_RECORDS_FILE
+        self.max_records = max_records
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if not os.path.exists(self.records_file):
+            return []
+        records = []
+        try:
+            with open(self.records_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except Exception as e:
+            print(f"[{datetime.now()}] Error reading run records: {str(e)}")
+        return records
+
+    def save(self, record):
+        """Append a finished record"""
+        data = record.to_dict() if isinstance(record, RunRecord) else record
+        with self._lock:
+            try:
+                with open(self.records_file, 'a') as f:
+                    f.write(json.dumps(data, default=str) + "\n")
+                self._trim()
+            except Exception as e:
+                print(f"[{datetime.now()}] Error saving run record: {str(e)}")
+
+    def _trim(self):
+        records = self._load()
+        if len(records) <= self.max_records:
+            return
+        temp_path = self.records_file + ".tmp"
+        with open(temp_path, 'w') as f:
+            for data in records[-self.max_records:]:
+                f.write(json.dumps(data, default=str) + "\n")
+        os.replace(temp_path, self.records_file)
+
+    def list_runs(self, limit=50, kind=None, outcome=None):
+        """Most recent records first, optionally filtered by kind and outcome"""
+        with self._lock:
+            records = self._load()
+        if kind:
+            records = [data for data in records if data.get("kind") == kind]
+        if outcome:
+            records = [data for data in records if data.get("outcome") == outcome]
+        records.reverse()
+        return records[:limit] if limit else records
+
+    def get_run(self, run_id):
+        """Record by run id, or None"""
+        with self._lock:
+            records = self._load()
+        for data in records:
+            if data.get("run_id") == run_id:
+                return data
+        return None
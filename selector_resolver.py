@@ -0,0 +1,214 @@
+"""
+Single-round-trip element resolution with a learned locator cache
+
+All candidate locators for an element (e.g. the report's Download button) are
+checked in one execute_script call per poll instead of one 5s WebDriverWait per
+selector. The locator that matched is remembered per page in
+selector_cache.json and tried first next time. When a different locator wins
+than the one learned before, the change is recorded as drift so portal UI
+changes show up before they cost time.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+import run_records
+
+
+SELECTOR_CACHE_FILE = "selector_cache.json"
+MAX_DRIFT_EVENTS = 50
+
+# (name, kind, locator) in default priority order; kind is "css" or "xpath"
+DOWNLOAD_BUTTON_LOCATORS = [
+    ("title", "css", "button[title='Download']"),
+    ("aria_label", "css", "button[aria-label='Download']"),
+    ("button_text", "xpath", "//button[contains(normalize-space(.), 'Download')]"),
+    ("href", "css", "a[href*='download']"),
+    ("button_class", "css", "button[class*='download']"),
+    ("link_class", "css", "a[class*='download']"),
+    ("button_onclick", "css", "button[onclick*='download']"),
+    ("link_onclick", "css", "a[onclick*='download']"),
+]
+
+# Returns [index, element] of the first candidate with a visible, enabled match
+RESOLVE_SCRIPT = """
+var candidates = arguments[0];
+function usable(el) {
+    if (!el || el.disabled) { return false; }
+    var style = window.getComputedStyle(el);
+    if (style.visibility === 'hidden' || style.display === 'none') { return false; }
+    return el.getClientRects().length > 0;
+}
+for (var i = 0; i < candidates.length; i++) {
+    var kind = candidates[i][0], locator = candidates[i][1], matches = [];
+    try {
+        if (kind === 'xpath') {
+            var result = document.evaluate(locator, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < result.snapshotLength; j++) { matches.push(result.snapshotItem(j)); }
+        } else {
+            matches = document.querySelectorAll(locator);
+        }
+    } catch (e) {
+        continue;
+    }
+    for (var k = 0; k < matches.length; k++) {
+        if (usable(matches[k])) { return [i, matches[k]]; }
+    }
+}
+return null;
+"""
+
+
+class SelectorCache:
+    """Remembers which locator won per page and records locator drift"""
+
+    CACHE_FILE = SELECTOR_CACHE_FILE
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file or self.CACHE_FILE
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return {"pages": {}, "drift": []}
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            data.setdefault("pages", {})
+            data.setdefault("drift", [])
+            return data
+        except Exception as e:
+            print(f"Error loading selector cache: {e}")
+            return {"pages": {}, "drift": []}
+
+    def _save(self, data):
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump(data, f, indent=4)
+            return True
+        except Exception as e:
+            print(f"Error saving selector cache: {e}")
+            return False
+
+    def ordered(self, page_key, locators):
+        """Locators with the learned winner first, then by past wins, then default order"""
+        with self._lock:
+            page = self._load()["pages"].get(page_key, {})
+        winner = page.get("winner")
+        wins = page.get("wins", {})
+        return sorted(
+            locators,
+            key=lambda locator: (locator[0] != winner, -wins.get(locator[0], 0), locators.index(locator)),
+        )
+
+    def record_win(self, page_key, name):
+        """Remember the winning locator; returns the drift event if the winner changed"""
+        with self._lock:
+            data = self._load()
+            page = data["pages"].setdefault(page_key, {"winner": None, "wins": {}})
+            previous = page.get("winner")
+            drift = None
+            if previous and previous != name:
+                drift = {
+                    "page": page_key,
+                    "previous": previous,
+                    "current": name,
+                    "detected_at": datetime.now().isoformat(),
+                }
+                data["drift"] = (data["drift"] + [drift])[-MAX_DRIFT_EVENTS:]
+            page["winner"] = name
+            page["wins"][name] = page["wins"].get(name, 0) + 1
+            page["last_resolved_at"] = datetime.now().isoformat()
+            self._save(data)
+        return drift
+
+    def record_miss(self, page_key):
+        """Note that no locator matched (the page may have changed completely)"""
+        with self._lock:
+            data = self._load()
+            page = data["pages"].setdefault(page_key, {"winner": None, "wins": {}})
+            page["misses"] = page.get("misses", 0) + 1
+            page["last_miss_at"] = datetime.now().isoformat()
+            data["drift"] = (data["drift"] + [{
+                "page": page_key,
+                "previous": page.get("winner"),
+                "current": None,
+                "detected_at": datetime.now().isoformat(),
+            }])[-MAX_DRIFT_EVENTS:]
+            self._save(data)
+
+    def stats(self):
+        """Learned winners per page and the most recent drift events"""
+        with self._lock:
+            data = self._load()
+        return {
+            "pages": {
+                key: {k: page.get(k) for k in ("winner", "wins", "misses", "last_resolved_at")}
+                for key, page in data["pages"].items()
+            },
+            "recent_drift": data["drift"][-10:],
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_selector_cache():
+    """Process-wide selector cache backed by selector_cache.json"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SelectorCache()
+        return _default_cache
+
+
+def first_usable(locators):
+    """
+    Readiness condition for PhaseTimer: checks every locator in one script call
+    and returns (name, element) for the first usable match, else False.
+    """
+    candidates = [[kind, locator] for _, kind, locator in locators]
+
+    def _predicate(driver):
+        match = driver.execute_script(RESOLVE_SCRIPT, candidates)
+        if not match:
+            return False
+        index, element = match
+        return locators[int(index)][0], element
+    return _predicate
+
+
+def resolve_element(driver, timer, page_key, locators, phase, cache=None, optional=True):
+    """
+    Find an element from several candidate locators, learned winner first.
+
+    Returns:
+        WebElement or None (when optional and nothing matched within the phase budget)
+    """
+    cache = cache or get_selector_cache()
+    ordered = cache.ordered(page_key, locators)
+    match = timer.wait(driver, phase, first_usable(ordered), optional=optional)
+    if not match:
+        cache.record_miss(page_key)
+        run_records.count("selector_misses")
+        print(f"[{datetime.now()}] No locator matched for '{page_key}'")
+        return None
+
+    name, element = match
+    drift = cache.record_win(page_key, name)
+    if drift:
+        run_records.count("selector_drift")
+        print(f"[{datetime.now()}] WARNING: locator drift on '{page_key}': "
+              f"'{drift['previous']}' no longer matches first, now '{name}'")
+    print(f"[{datetime.now()}] Found element for '{page_key}' with locator: {name}")
+    return element
+
+
+def resolve_download_button(driver, timer, tab_label, cache=None):
+    """Download button of the open report tab, or None"""
+    return resolve_element(
+        driver, timer, f"download_button:{tab_label}", DOWNLOAD_BUTTON_LOCATORS,
+        phase="download_button", cache=cache,
+    )
@@ -0,0 +1,133 @@
+"""
+Portal session persistence for the PortOptimizer automation
+
+The Chrome profile already keeps the portal/Okta cookies between runs, so most
+runs do not need the identifier -> Next -> passcode -> Verify sequence at all.
+The automation probes the portal first (dashboard visible = session still
+valid) and only falls back to the full login when needed. The session manager
+tracks when the stored session expires and keeps hit/miss statistics in a
+JSON file.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+
+# Cookie domains that carry the portal / Okta authentication state
+AUTH_COOKIE_DOMAINS = ("portoptimizer", "okta")
+
+
+class PortalSessionManager:
+    """Tracks portal login session validity and reuse statistics"""
+
+    STATE_FILE = "session_state.json"
+
+    DEFAULT_STATE = {
+        "hits": 0,               # Runs that reused an existing session
+        "misses": 0,             # Runs that had to do the full login
+        "last_hit_at": None,
+        "last_login_at": None,
+        "expires_at": None,      # Unix time the earliest auth cookie expires
+        "force_login": False,    # Next run must clear cookies and log in again
+    }
+
+    def __init__(self, state_file=None):
+        self.state_file = state_file or self.STATE_FILE
+        self._lock = threading.Lock()
+        if not os.path.exists(self.state_file):
+            self._save_state(dict(self.DEFAULT_STATE))
+
+    def _load_state(self):
+        """Load session state from file"""
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            return {**self.DEFAULT_STATE, **state}
+        except Exception as e:
+            print(f"Error loading session state: {e}")
+            return dict(self.DEFAULT_STATE)
+
+    def _save_state(self, state):
+        """Save session state to file"""
+        try:
+            with open(self.state_file, 'w') as f:
+                json.dump(state, f, indent=4)
+            return True
+        except Exception as e:
+            print(f"Error saving session state: {e}")
+            return False
+
+    def is_expired(self):
+        """Whether the stored session is known to have expired (unknown expiry is not expired)"""
+        expires_at = self._load_state().get("expires_at")
+        return expires_at is not None and expires_at <= time.time()
+
+    @staticmethod
+    def session_expiry(driver):
+        """Earliest expiry (unix time) of the portal/Okta cookies, or None for session cookies"""
+        try:
+            cookies = driver.get_cookies()
+        except Exception:
+            return None
+        expiries = [
+            cookie["expiry"] for cookie in cookies
+            if "expiry" in cookie and any(domain in cookie.get("domain", "") for domain in AUTH_COOKIE_DOMAINS)
+        ]
+        return min(expiries) if expiries else None
+
+    def record_hit(self, driver=None):
+        """A run reused the existing session"""
+        with self._lock:
+            state = self._load_state()
+            state["hits"] += 1
+            state["last_hit_at"] = datetime.now().isoformat()
+            if driver is not None:
+                state["expires_at"] = self.session_expiry(driver)
+            self._save_state(state)
+        print(f"[{datetime.now()}] Session reused (skipped login)")
+
+    def record_miss(self, driver=None):
+        """A run had to go through the full login flow"""
+        with self._lock:
+            state = self._load_state()
+            state["misses"] += 1
+            state["last_login_at"] = datetime.now().isoformat()
+            if driver is not None:
+                state["expires_at"] = self.session_expiry(driver)
+            self._save_state(state)
+        print(f"[{datetime.now()}] Full login performed")
+
+    def invalidate(self):
+        """Drop the stored session so the next run logs in again (e.g. after a credentials change)"""
+        with self._lock:
+            state = self._load_state()
+            state["expires_at"] = None
+            state["force_login"] = True
+            self._save_state(state)
+
+    def consume_force_login(self):
+        """Return True once if a fresh login was requested via invalidate()"""
+        with self._lock:
+            state = self._load_state()
+            if not state.get("force_login"):
+                return False
+            state["force_login"] = False
+            self._save_state(state)
+            return True
+
+    def stats(self):
+        """Hit/miss statistics for the status endpoint"""
+        state = self._load_state()
+        total = state["hits"] + state["misses"]
+        expires_at = state.get("expires_at")
+        return {
+            "hits": state["hits"],
+            "misses": state["misses"],
+            "hit_rate": round(state["hits"] / total, 3) if total else None,
+            "expired": self.is_expired(),
+            "last_hit_at": state["last_hit_at"],
+            "last_login_at": state["last_login_at"],
+            "expires_at": datetime.fromtimestamp(expires_at).isoformat() if expires_at else None,
+        }
@@ -21,6 +21,97 @@ class SystemSettings:
             "use_pdf_name": True,  # Use PDF filename (date) as watermark text
             "include_timestamp": True,  # Include generation timestamp
             "include_date": True  # Include report date (only if use_pdf_name is False)
+        },
+        "wait_timeouts": {
+            # Per-step timeout budgets (seconds) for the Excel download automation
+            "extension_init": 5,
+            "portal_load": 60,
+            "session_probe": 2,              # Warm (pooled) driver already on the portal
+            "login_page": 60,
+            "next_button": 10,
+            "password_field": 30,
+            "verify_button": 10,
+            "post_login": 90,
+            "return_signal_tab": 10,
+            "tab_selected": 5,
+            "return_signal_table": 45,
+            "return_signal_idle": 10,
+            "download_button": 15,
+            "download_start": 30,
+            "download_complete": 60
+        },
+        "browser_profile": "desktop",  # "desktop" (Windows, extension) or "headless" (Linux workers)
+        "browser_pool": {
+            "enabled": True,
+            "size": 1,               # Warm drivers kept alive between runs
+            "max_runs": 20,          # Recycle a driver after this many runs
+            "max_memory_mb": 1500,   # Recycle a driver above this memory use
+            "prewarm_minutes": 5     # Start a driver this long before each scheduled run
+        },
+        "pdf": {
+            # "excel": convert the downloaded workbook (Excel via PowerShell) and watermark it;
+            # "native": render the workbook in-process (openpyxl + reportlab) and watermark it;
+            # "libreoffice": convert on the persistent LibreOffice conversion server and watermark it;
+            # "print": print the rendered report page to PDF via DevTools during the browser run
+            "mode": "excel"
+        },
+        "screenshots": {
+            "browser_profile": "headless",   # Full-page capture via DevTools runs headless
+            "tabs": ["Return Signal"],       # Report tabs captured by /screenshot/now
+            "max_parallel": 2                # Browsers capturing at the same time
+        },
+        "structured_data": {
+            "with_export": False,            # Also save each exported tab's table as JSON read from the page
+            "tabs": ["Return Signal"],       # Report tabs refreshed by /data/now
+            "browser_profile": "headless",
+            "max_parallel": 2                # Browsers extracting at the same time
+        },
+        "conversion": {
+            "workers": 2,                    # Excel to PDF conversions running at the same time (worker processes)
+            "timeout_seconds": 180           # Give up waiting for one conversion after this long
+        },
+        "conversion_cache": {
+            "enabled": True,                 # Reuse PDFs of workbooks already converted with the same settings
+            "max_entries": 500               # Least recently used entries above this are dropped
+        },
+        "office_server": {
+            "workers": 2,                    # Persistent soffice processes (pdf.mode "libreoffice")
+            "base_port": 2002,               # UNO listener of worker i: base_port + i
+            "max_jobs": 200,                 # Restart a worker after this many conversions
+            "job_timeout_seconds": 120,      # Kill a worker whose conversion hangs
+            "health_check_seconds": 60,      # How often idle workers are checked
+            "soffice_path": None             # Default: soffice/libreoffice on PATH
+        },
+        "change_probe": {
+            "enabled": False,                # Scheduled runs skip the export when the report data has not changed
+            "max_unchanged_hours": 24        # Export anyway once the last stored file is this old (0 = never)
+        },
+        "chrome_profile": {
+            "mode": "snapshot"       # "snapshot" (throw-away copy of a slim golden profile per run) or "persistent"
+        },
+        "reports": {
+            "max_workers": 2         # Browsers running registry reports at the same time
+        },
+        "export": {
+            # "ui": click the Download button; "http": replay the captured export request;
+            # "cdp": click Download and capture the response in memory via DevTools
+            "mode": "ui",
+            "browserless": False     # "http" mode: try the saved cookies before starting a browser at all
+        },
+        "retries": {
+            "max_attempts": 5,           # Failed runs in a retry chain before giving up
+            "max_delay_minutes": 120,    # Cap of the exponential backoff between runs
+            "jitter": 0.25,              # +/- fraction applied to every backoff delay
+            "step_attempts": 2,          # Tries of one step (login, tab export) inside a run
+            "step_base_seconds": 2,      # First in-run backoff, doubled per attempt
+            "step_max_seconds": 30
+        },
+        "watchdog": {
+            "enabled": True,
+            "interval_seconds": 60,      # How often orphaned Chrome processes are reaped
+            "max_rss_mb": 3000,          # Kill a browser tree using more memory than this
+            "max_cpu_percent": 95,       # Kill a browser tree above this CPU percent...
+            "cpu_strikes": 5             # ...for this many watchdog checks in a row
         }
     }
     
@@ -115,6 +206,130 @@ class SystemSettings:
         
         return self._save_settings(settings)
     
+    def get_wait_timeouts(self):
+        """Get per-step timeout budgets (seconds) for the download automation"""
+        settings = self._load_settings()
+        timeouts = dict(self.DEFAULT_SETTINGS["wait_timeouts"])
+        timeouts.update(settings.get("wait_timeouts", {}))
+        return timeouts
+    
+    def set_wait_timeouts(self, timeouts):
+        """Update per-step timeout budgets (seconds); unknown steps are ignored"""
+        settings = self._load_settings()
+        current = settings.get("wait_timeouts", dict(self.DEFAULT_SETTINGS["wait_timeouts"]))
+        for step, seconds in timeouts.items():
+            if step not in self.DEFAULT_SETTINGS["wait_timeouts"]:
+                continue
+            if not isinstance(seconds, (int, float)) or seconds <= 0:
+                raise ValueError(f"Timeout for '{step}' must be a positive number")
+            current[step] = seconds
+        settings["wait_timeouts"] = current
+        return self._save_settings(settings)
+    
+    def get_browser_profile(self):
+        """Get browser execution profile ("desktop" or "headless")"""
+        settings = self._load_settings()
+        return settings.get("browser_profile", self.DEFAULT_SETTINGS["browser_profile"])
+    
+    def set_browser_profile(self, profile):
+        """Set browser execution profile ("desktop" or "headless")"""
+        if profile not in ("desktop", "headless"):
+            raise ValueError("Browser profile must be 'desktop' or 'headless'")
+        settings = self._load_settings()
+        settings["browser_profile"] = profile
+        return self._save_settings(settings)
+    
+    def get_browser_pool_settings(self):
+        """Get warm browser pool settings"""
+        settings = self._load_settings()
+        pool_settings = dict(self.DEFAULT_SETTINGS["browser_pool"])
+        pool_settings.update(settings.get("browser_pool", {}))
+        return pool_settings
+    
+    def get_pdf_settings(self):
+        """Get report PDF generation settings"""
+        settings = self._load_settings()
+        pdf_settings = dict(self.DEFAULT_SETTINGS["pdf"])
+        pdf_settings.update(settings.get("pdf", {}))
+        return pdf_settings
+    
+    def get_screenshot_settings(self):
+        """Get full-page screenshot settings"""
+        settings = self._load_settings()
+        screenshot_settings = dict(self.DEFAULT_SETTINGS["screenshots"])
+        screenshot_settings.update(settings.get("screenshots", {}))
+        return screenshot_settings
+    
+    def get_structured_data_settings(self):
+        """Get structured (JSON) report data settings"""
+        settings = self._load_settings()
+        data_settings = dict(self.DEFAULT_SETTINGS["structured_data"])
+        data_settings.update(settings.get("structured_data", {}))
+        return data_settings
+    
+    def get_conversion_settings(self):
+        """Get Excel to PDF conversion executor settings"""
+        settings = self._load_settings()
+        conversion_settings = dict(self.DEFAULT_SETTINGS["conversion"])
+        conversion_settings.update(settings.get("conversion", {}))
+        return conversion_settings
+    
+    def get_conversion_cache_settings(self):
+        """Get conversion cache settings"""
+        settings = self._load_settings()
+        cache_settings = dict(self.DEFAULT_SETTINGS["conversion_cache"])
+        cache_settings.update(settings.get("conversion_cache", {}))
+        return cache_settings
+    
+    def get_office_server_settings(self):
+        """Get LibreOffice conversion server settings"""
+        settings = self._load_settings()
+        server_settings = dict(self.DEFAULT_SETTINGS["office_server"])
+        server_settings.update(settings.get("office_server", {}))
+        return server_settings
+    
+    def get_change_probe_settings(self):
+        """Get change probe settings (skip unchanged scheduled exports)"""
+        settings = self._load_settings()
+        probe_settings = dict(self.DEFAULT_SETTINGS["change_probe"])
+        probe_settings.update(settings.get("change_probe", {}))
+        return probe_settings
+    
+    def get_chrome_profile_settings(self):
+        """Get Chrome profile settings (snapshot or persistent profile)"""
+        settings = self._load_settings()
+        profile_settings = dict(self.DEFAULT_SETTINGS["chrome_profile"])
+        profile_settings.update(settings.get("chrome_profile", {}))
+        return profile_settings
+    
+    def get_report_settings(self):
+        """Get registry report runner settings"""
+        settings = self._load_settings()
+        report_settings = dict(self.DEFAULT_SETTINGS["reports"])
+        report_settings.update(settings.get("reports", {}))
+        return report_settings
+    
+    def get_export_settings(self):
+        """Get Excel export mode settings"""
+        settings = self._load_settings()
+        export_settings = dict(self.DEFAULT_SETTINGS["export"])
+        export_settings.update(settings.get("export", {}))
+        return export_settings
+    
+    def get_retry_settings(self):
+        """Get retry backoff settings"""
+        settings = self._load_settings()
+        retry_settings = dict(self.DEFAULT_SETTINGS["retries"])
+        retry_settings.update(settings.get("retries", {}))
+        return retry_settings
+    
+    def get_watchdog_settings(self):
+        """Get Chrome watchdog settings (orphan reaping and per-browser caps)"""
+        settings = self._load_settings()
+        watchdog_settings = dict(self.DEFAULT_SETTINGS["watchdog"])
+        watchdog_settings.update(settings.get("watchdog", {}))
+        return watchdog_settings
+    
     def get_all_settings(self, include_passwords=False):
         """Get all settings (optionally hide passwords)"""
         settings = self._load_settings()
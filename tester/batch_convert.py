@@ -0,0 +1,81 @@
+"""
+Convert a directory of historical workbooks to PDF on the persistent
+LibreOffice conversion server (office_server.py)
+
+The soffice workers start once; every workbook then goes over their UNO
+connection, several at a time, instead of starting LibreOffice per file.
+Workbooks that already have a PDF are skipped unless --force is given.
+
+Usage:
+    python tester/batch_convert.py
+    python tester/batch_convert.py --input downloads --output downloads/pdfs --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add parent directory to path to import app functions
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office_server import get_office_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-convert workbooks to PDF on the LibreOffice conversion server")
+    parser.add_argument("--input", default="downloads")
+    parser.add_argument("--output", default=os.path.join("downloads", "pdfs"))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--force", action="store_true", help="Convert workbooks that already have a PDF")
+    args = parser.parse_args()
+
+    server = get_office_server({"workers": args.workers})
+    if not server.available():
+        print("❌ LibreOffice conversion server not available (needs soffice and the Python uno module)")
+        return
+
+    os.makedirs(args.output, exist_ok=True)
+    jobs = []
+    for filename in sorted(os.listdir(args.input)):
+        if not filename.endswith(".xlsx") or filename.startswith("~$"):
+            continue
+        pdf_path = os.path.join(args.output, os.path.splitext(filename)[0] + ".pdf")
+        if os.path.exists(pdf_path) and not args.force:
+            continue
+        jobs.append((os.path.join(args.input, filename), pdf_path))
+    if not jobs:
+        print("Nothing to convert")
+        return
+
+    start = time.monotonic()
+    server.start()
+    startup = time.monotonic() - start
+
+    def convert(job):
+        try:
+            server.convert(*job)
+            return True
+        except Exception as e:
+            print(f"❌ {os.path.basename(job[0])}: {str(e)}")
+            return False
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(convert, jobs))
+    elapsed = time.monotonic() - start
+    server.stop()
+
+    status = server.status()
+    print("=" * 60)
+    print(f"BATCH CONVERSION - {datetime.now()}")
+    print("=" * 60)
+    print(f"Workbooks:      {len(jobs)} ({results.count(True)} converted, {results.count(False)} failed)")
+    print(f"Server startup: {startup:.1f}s ({args.workers} workers)")
+    print(f"Conversion:     {elapsed:.1f}s total, {elapsed / len(jobs):.2f}s per workbook")
+    print(f"Worker average: {status['avg_seconds']}s per job, {status['restarts']} restart(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+End-to-end benchmark of the scrape -> convert -> watermark pipeline against the
+offline mock portal (mock_portal.py)
+
+Starts the mock portal in a background thread, points the automation at it and
+runs the pipeline a number of times, then reports success rate, throughput and
+p50/p95/max latency of each stage plus the per-span statistics from the run
+records. Runs in its own work directory so downloads, settings and the Chrome
+profile never mix with the real service.
+
+Usage:
+    python tester/benchmark_pipeline.py --iterations 10 --browser-profile headless
+    python tester/benchmark_pipeline.py --iterations 20 --warm --export-mode cdp --skip-convert
+    python tester/benchmark_pipeline.py --failure-rate 0.2 --failure-modes export_error,table_timeout
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path to import app functions
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from mock_portal import FAILURE_MODES, MockPortalServer
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))], 3)
+
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "p50_seconds": percentile(values, 0.5),
+        "p95_seconds": percentile(values, 0.95),
+        "max_seconds": round(max(values), 3) if values else None,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the export pipeline against the mock portal")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warm", action="store_true",
+                        help="Reuse one browser across iterations (like the browser pool)")
+    parser.add_argument("--browser-profile", default="headless", choices=["desktop", "headless"])
+    parser.add_argument("--export-mode", default="ui", choices=["ui", "http", "cdp"])
+    parser.add_argument("--tabs", default="Return Signal",
+                        help="Comma separated tabs exported per iteration in one session")
+    parser.add_argument("--skip-convert", action="store_true", help="Only benchmark the scrape")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--page-latency-ms", type=int, default=150)
+    parser.add_argument("--table-latency-ms", type=int, default=500)
+    parser.add_argument("--download-latency-ms", type=int, default=300)
+    parser.add_argument("--jitter-ms", type=int, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-modes", default="",
+                        help=f"Comma separated, any of: {', '.join(FAILURE_MODES)}")
+    parser.add_argument("--workdir", default=None,
+                        help="Working directory for downloads/settings (default: a new temp dir)")
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    failure_modes = [mode.strip() for mode in args.failure_modes.split(",") if mode.strip()]
+    tabs = [tab.strip() for tab in args.tabs.split(",") if tab.strip()]
+
+    portal = MockPortalServer(port=args.port, config={
+        "rows": args.rows,
+        "page_latency_ms": args.page_latency_ms,
+        "table_latency_ms": args.table_latency_ms,
+        "download_latency_ms": args.download_latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "failure_rate": args.failure_rate,
+        "failure_modes": failure_modes,
+    }).start()
+
+    # The automation reads the portal URL at import time
+    os.environ["PORTOPTIMIZER_PORTAL_URL"] = portal.url
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="portoptimizer_bench_"))
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    print(f"[{datetime.now()}] Benchmark work directory: {workdir}")
+
+    from automation import create_chrome_driver, download_excel_reports, quit_driver
+    from run_records import RunRecord, activate, span_stats
+    from wait_conditions import PhaseTimer
+    convert_excel_to_pdf = None
+    if not args.skip_convert:
+        from app import convert_excel_to_pdf
+
+    exports = [{"tab": tab, "file_prefix": f"{tab.replace(' ', '_')}_"} for tab in tabs]
+    driver = create_chrome_driver(profile=args.browser_profile) if args.warm else None
+
+    iterations = []
+    records = []
+    bench_start = time.monotonic()
+    try:
+        for iteration in range(1, args.iterations + 1):
+            record = RunRecord(kind="benchmark", trigger="benchmark")
+            timer = PhaseTimer()
+            with activate(record):
+                start = time.monotonic()
+                results = download_excel_reports(
+                    "benchmark@example.com", "benchmark",
+                    exports,
+                    phase_timer=timer,
+                    driver=driver,
+                    export_mode=args.export_mode,
+                    browser_profile=args.browser_profile,
+                )
+                scrape_seconds = time.monotonic() - start
+
+                convert_seconds = 0.0
+                converted = 0
+                if convert_excel_to_pdf:
+                    convert_start = time.monotonic()
+                    for result in results:
+                        if not result["success"]:
+                            continue
+                        excel_path = os.path.join("downloads", result["filename"])
+                        pdfs_dir = os.path.join("downloads", "pdfs")
+                        os.makedirs(pdfs_dir, exist_ok=True)
+                        pdf_path = os.path.join(pdfs_dir, result["filename"].replace('.xlsx', '.pdf'))
+                        if convert_excel_to_pdf(excel_path, pdf_path, use_pdf_name=True):
+                            converted += 1
+                    convert_seconds = time.monotonic() - convert_start
+
+            success = all(result["success"] for result in results)
+            record.finish(success, None if success else "; ".join(
+                result["error"] for result in results if result["error"]))
+            records.append(record.to_dict())
+            iterations.append({
+                "iteration": iteration,
+                "success": success,
+                "scrape_seconds": round(scrape_seconds, 3),
+                "convert_seconds": round(convert_seconds, 3),
+                "total_seconds": round(scrape_seconds + convert_seconds, 3),
+                "exports": len(results),
+                "converted": converted,
+                "errors": [result["error"] for result in results if result["error"]],
+                "counters": record.counters,
+                "resource_usage": timer.resource_usage,
+            })
+            status = "OK" if success else f"FAILED: {iterations[-1]['errors']}"
+            print(f"[{datetime.now()}] Iteration {iteration}/{args.iterations}: "
+                  f"scrape {scrape_seconds:.2f}s, convert {convert_seconds:.2f}s - {status}")
+    finally:
+        if driver:
+            quit_driver(driver)
+        portal_stats = portal.state.stats()
+        portal.stop()
+
+    elapsed = time.monotonic() - bench_start
+    successful = [entry for entry in iterations if entry["success"]]
+    summary = {
+        "started_at": datetime.now().isoformat(),
+        "settings": vars(args),
+        "iterations": len(iterations),
+        "succeeded": len(successful),
+        "success_rate": round(len(successful) / len(iterations), 3) if iterations else None,
+        "elapsed_seconds": round(elapsed, 3),
+        "exports_per_minute": round(sum(entry["exports"] for entry in successful) * 60 / elapsed, 2) if elapsed else None,
+        "scrape": latency_summary([entry["scrape_seconds"] for entry in successful]),
+        "convert": latency_summary([entry["convert_seconds"] for entry in successful]),
+        "total": latency_summary([entry["total_seconds"] for entry in successful]),
+        "span_stats": span_stats(records),
+        "portal": portal_stats,
+        "runs": iterations,
+    }
+
+    print("=" * 60)
+    print("BENCHMARK SUMMARY")
+    print("=" * 60)
+    print(f"Iterations: {summary['iterations']}  Succeeded: {summary['succeeded']}  "
+          f"Success rate: {summary['success_rate']}")
+    print(f"Throughput: {summary['exports_per_minute']} exports/minute")
+    for stage in ("scrape", "convert", "total"):
+        stats = summary[stage]
+        print(f"{stage:>8}: p50 {stats['p50_seconds']}s  p95 {stats['p95_seconds']}s  max {stats['max_seconds']}s")
+    for name, stats in sorted(summary["span_stats"].items()):
+        print(f"  span {name}: avg {stats['avg_seconds']}s  p95 {stats['p95_seconds']}s  (n={stats['count']})")
+
+    output = output or os.path.join(workdir, f"benchmark_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(summary, f, indent=4, default=str)
+    print(f"Results written to {output}")
+    return 0 if successful else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,14 @@ Convert the latest Excel file to PDF
 """
 import os
 import subprocess
+import sys
 from datetime import datetime
 
+# Add parent directory to path to import app functions
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from convert_excel_to_pdf_libreoffice import convert_excel_to_pdf_libreoffice
+
 def main():
     print("="*50)
     print("CONVERT LATEST EXCEL TO PDF")
@@ -40,32 +46,12 @@ def main():
     
     print(f"🔄 Converting to PDF...")
     
-    # Try LibreOffice first
-    try:
-        cmd = [
-            'libreoffice',
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', 'screenshots',
-            excel_path
-        ]
-        
-        print("Trying LibreOffice...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            # Find the created PDF
-            expected_pdf = excel_path.replace('.xlsx', '.pdf')
-            if os.path.exists(expected_pdf):
-                os.rename(expected_pdf, pdf_path)
-                print(f"✅ PDF created: {pdf_path}")
-                return
-            else:
-                print("❌ PDF file not found after conversion")
-        else:
-            print(f"❌ LibreOffice failed: {result.stderr}")
-    except Exception as e:
-        print(f"❌ LibreOffice error: {str(e)}")
+    # Try LibreOffice first (persistent conversion server when available)
+    print("Trying LibreOffice...")
+    if convert_excel_to_pdf_libreoffice(excel_path, pdf_path):
+        print(f"✅ PDF created: {pdf_path}")
+        return
+    print("❌ LibreOffice failed")
     
     # Try PowerShell as fallback
     try:
@@ -2,9 +2,14 @@
 List Excel files and convert to PDF
 """
 import os
-import subprocess
+import sys
 from datetime import datetime
 
+# Add parent directory to path to import app functions
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from convert_excel_to_pdf_libreoffice import convert_excel_to_pdf_libreoffice
+
 def list_excel_files():
     """List all Excel files in screenshots directory"""
     screenshots_dir = "screenshots"
@@ -23,39 +28,13 @@ def list_excel_files():
     return excel_files
 
 def convert_to_pdf(excel_path, pdf_path):
-    """Convert Excel to PDF using LibreOffice"""
-    try:
-        print(f"Converting {excel_path} to PDF...")
-        
-        # Use LibreOffice
-        cmd = [
-            'libreoffice',
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', 'screenshots',
-            excel_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            # Find the created PDF
-            expected_pdf = excel_path.replace('.xlsx', '.pdf')
-            if os.path.exists(expected_pdf):
-                # Rename to desired name
-                os.rename(expected_pdf, pdf_path)
-                print(f"✅ PDF created: {pdf_path}")
-                return True
-            else:
-                print("❌ PDF file not found after conversion")
-                return False
-        else:
-            print(f"❌ LibreOffice failed: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Conversion failed: {str(e)}")
-        return False
+    """Convert Excel to PDF using LibreOffice (persistent conversion server when available)"""
+    print(f"Converting {excel_path} to PDF...")
+    if convert_excel_to_pdf_libreoffice(excel_path, pdf_path):
+        print(f"✅ PDF created: {pdf_path}")
+        return True
+    print("❌ LibreOffice conversion failed")
+    return False
 
 def main():
     print("="*60)
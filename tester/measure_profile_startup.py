@@ -0,0 +1,66 @@
+"""
+Compare Chrome launch time and profile size: persistent profile vs snapshot copy
+
+Launches Chrome a number of times on the persistent profile (chrome_profile or
+chrome_profile_headless) and the same number of times on a fresh copy of the
+slim profile snapshot (profile_manager.py), then prints profile sizes, snapshot
+copy time and launch times for both.
+
+Usage:
+    python tester/measure_profile_startup.py --launches 5
+    python tester/measure_profile_startup.py --launches 10 --browser-profile headless
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add parent directory to path to import app functions
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation import create_chrome_driver, default_user_data_dir, quit_driver
+from profile_manager import dir_size_mb, get_profile_manager
+
+
+def launch_seconds(user_data_dir, browser_profile):
+    start = time.monotonic()
+    driver = create_chrome_driver(user_data_dir=user_data_dir, profile=browser_profile)
+    elapsed = time.monotonic() - start
+    quit_driver(driver)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Chrome launch time with and without the profile snapshot")
+    parser.add_argument("--launches", type=int, default=5)
+    parser.add_argument("--browser-profile", default="desktop", choices=["desktop", "headless"])
+    args = parser.parse_args()
+
+    persistent_dir = default_user_data_dir(args.browser_profile)
+    manager = get_profile_manager(os.path.basename(persistent_dir), persistent_dir)
+    manager.ensure_snapshot()
+
+    for _ in range(args.launches):
+        manager.record_launch(launch_seconds(persistent_dir, args.browser_profile), snapshot=False)
+    for _ in range(args.launches):
+        run_dir = manager.checkout()
+        try:
+            manager.record_launch(launch_seconds(run_dir, args.browser_profile), snapshot=True)
+        finally:
+            # Measurement only: do not write the run's state back into the snapshot
+            manager.release(run_dir, keep_auth=False)
+
+    summary = manager.summary()
+    print("=" * 60)
+    print(f"PROFILE STARTUP ({args.browser_profile}, {args.launches} launches each) - {datetime.now()}")
+    print("=" * 60)
+    print(f"Persistent profile: {dir_size_mb(persistent_dir)} MB  ({persistent_dir})")
+    print(f"Snapshot:           {summary['snapshot_size_mb']} MB  ({summary['snapshot_dir']})")
+    print(f"Snapshot copy:      {summary['avg_copy_ms']} ms on average")
+    print(f"Launch persistent:  {summary['launch_persistent']['avg_seconds']}s on average")
+    print(f"Launch snapshot:    {summary['launch_snapshot']['avg_seconds']}s on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Tests for change_probe: table fingerprints and the ChangeProbe skip decision"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from change_probe import ChangeProbe, probe_page, rows_fingerprint
+
+
+def test_fingerprint_normalizes_cells():
+    assert rows_fingerprint([["APM", " Maersk ", None]]) == rows_fingerprint([["APM", "Maersk", ""]])
+    assert rows_fingerprint([[1, 2]]) == rows_fingerprint([["1", "2"]])
+    assert rows_fingerprint([["APM", "YES"]]) != rows_fingerprint([["APM", "NO"]])
+    assert rows_fingerprint([["a", "b"]]) != rows_fingerprint([["a"], ["b"]])
+
+
+class TableDriver:
+    """Answers the table script with rows and the last-updated script with marker"""
+
+    def __init__(self, rows, marker=None):
+        self.results = [rows, marker]
+
+    def execute_script(self, script, *args):
+        return self.results.pop(0)
+
+
+def test_probe_page():
+    probe = probe_page(TableDriver([["APM", "Maersk", "YES"]], "Last updated 10:05"))
+    assert probe == {"fingerprint": rows_fingerprint([["APM", "Maersk", "YES"]]), "rows": 1,
+                     "marker": "Last updated 10:05"}
+
+
+def test_probe_page_without_table():
+    with pytest.raises(Exception, match="No report table"):
+        probe_page(TableDriver(None))
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / "change_probe.json")
+
+
+def test_first_probe_is_changed(state_file):
+    probe = ChangeProbe(state_file=state_file)
+    assert probe.unchanged("default", "abc") is False
+    assert probe.status()["changed"] == 1
+
+
+def test_same_fingerprint_after_export_is_unchanged(state_file):
+    probe = ChangeProbe(state_file=state_file)
+    probe.record("default", "abc", marker="Last updated 10:05")
+    assert probe.unchanged("default", "abc", marker="Last updated 11:05") is True
+    assert probe.unchanged("default", "def") is False
+    assert probe.unchanged("other", "abc") is False
+    status = probe.status()
+    assert (status["changed"], status["unchanged"], status["skip_rate"]) == (2, 1, 0.333)
+    assert status["reports"]["default"]["last_changed"] is True
+    assert status["reports"]["default"]["marker"] == "Last updated 11:05"
+
+
+def set_exported_at(state_file, key, hours_ago):
+    with open(state_file) as f:
+        state = json.load(f)
+    state["reports"][key]["exported_at"] = (datetime.now() - timedelta(hours=hours_ago)).isoformat()
+    with open(state_file, "w") as f:
+        json.dump(state, f)
+
+
+def test_old_export_is_refreshed(state_file):
+    probe = ChangeProbe(max_unchanged_hours=4, state_file=state_file)
+    probe.record("default", "abc")
+    set_exported_at(state_file, "default", 3)
+    assert probe.unchanged("default", "abc") is True
+    # Within AGE_MARGIN of the cap counts as old, so a run one interval later exports
+    set_exported_at(state_file, "default", 3.8)
+    assert probe.unchanged("default", "abc") is False
+
+
+def test_no_age_cap(state_file):
+    probe = ChangeProbe(max_unchanged_hours=0, state_file=state_file)
+    probe.record("default", "abc")
+    set_exported_at(state_file, "default", 24 * 30)
+    assert probe.unchanged("default", "abc") is True
+
+
+def test_empty_fingerprint_not_recorded(state_file):
+    probe = ChangeProbe(state_file=state_file)
+    probe.record("default", None)
+    assert probe.status()["reports"] == {}
+
+
+def test_forget(state_file):
+    probe = ChangeProbe(state_file=state_file)
+    probe.record("default", "abc")
+    probe.record("other", "def")
+    probe.forget("default")
+    assert probe.unchanged("default", "abc") is False
+    assert list(probe.status()["reports"]) == ["other"]
+    probe.forget()
+    assert probe.status()["reports"] == {}
@@ -0,0 +1,53 @@
+"""Tests for conversion_cache.workbook_hash and cache keys"""
+import zipfile
+
+from conversion_cache import cache_key, workbook_hash
+
+
+def write_workbook(path, cells="<c>42</c>", created="2025-11-03T23:19:50Z"):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("docProps/core.xml", f"<created>{created}</created>")
+        archive.writestr("docProps/app.xml", f"<app>{created}</app>")
+        archive.writestr("xl/workbook.xml", "<workbook/>")
+        archive.writestr("xl/worksheets/sheet1.xml", f"<worksheet>{cells}</worksheet>")
+    return str(path)
+
+
+def test_same_data_different_properties_hash_the_same(tmp_path):
+    first = write_workbook(tmp_path / "a.xlsx", created="2025-11-03T23:19:50Z")
+    second = write_workbook(tmp_path / "b.xlsx", created="2025-11-04T05:19:50Z")
+    assert open(first, "rb").read() != open(second, "rb").read()
+    assert workbook_hash(first) == workbook_hash(second)
+
+
+def test_changed_cells_change_the_hash(tmp_path):
+    first = write_workbook(tmp_path / "a.xlsx", cells="<c>42</c>")
+    second = write_workbook(tmp_path / "b.xlsx", cells="<c>43</c>")
+    assert workbook_hash(first) != workbook_hash(second)
+
+
+def test_part_order_does_not_matter(tmp_path):
+    first = write_workbook(tmp_path / "a.xlsx")
+    second = tmp_path / "b.xlsx"
+    with zipfile.ZipFile(first) as source, zipfile.ZipFile(second, "w") as target:
+        for name in reversed(source.namelist()):
+            target.writestr(name, source.read(name))
+    assert workbook_hash(first) == workbook_hash(str(second))
+
+
+def test_non_zip_file_hashes_its_bytes(tmp_path):
+    first = tmp_path / "a.xls"
+    first.write_bytes(b"legacy workbook")
+    second = tmp_path / "b.xls"
+    second.write_bytes(b"legacy workbook")
+    assert workbook_hash(str(first)) == workbook_hash(str(second))
+    second.write_bytes(b"legacy workbook 2")
+    assert workbook_hash(str(first)) != workbook_hash(str(second))
+
+
+def test_cache_key_depends_on_options():
+    content_hash = "ab" * 32
+    assert cache_key(content_hash, engine="python") == cache_key(content_hash, engine="python")
+    assert cache_key(content_hash, engine="python") != cache_key(content_hash, engine="libreoffice")
+    assert cache_key(content_hash, engine="python", watermark="a") != cache_key(content_hash, engine="python")
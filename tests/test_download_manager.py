@@ -0,0 +1,65 @@
+"""Tests for download_manager.finalize_workbook"""
+import os
+import zipfile
+
+import pytest
+
+from download_manager import InvalidWorkbook, finalize_workbook
+
+
+def write_workbook(path, extra=b""):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("xl/workbook.xml", "<workbook/>")
+        archive.writestr("xl/worksheets/sheet1.xml", b"<worksheet/>" + extra)
+    return str(path)
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    path = tmp_path / "run"
+    path.mkdir()
+    return path
+
+
+def test_moves_workbook_into_downloads(tmp_path, run_dir):
+    downloads = tmp_path / "downloads"
+    source = write_workbook(run_dir / "export.xlsx")
+    assert finalize_workbook(source, "POLA_Empty_Returns_1.xlsx", str(downloads)) == "POLA_Empty_Returns_1.xlsx"
+    assert not os.path.exists(source)
+    assert zipfile.is_zipfile(downloads / "POLA_Empty_Returns_1.xlsx")
+
+
+def test_taken_name_gets_numeric_suffix(tmp_path, run_dir):
+    downloads = str(tmp_path)
+    first = finalize_workbook(write_workbook(run_dir / "a.xlsx"), "report.xlsx", downloads)
+    second = finalize_workbook(write_workbook(run_dir / "b.xlsx", b"<!-- b -->"), "report.xlsx", downloads)
+    third = finalize_workbook(write_workbook(run_dir / "c.xlsx", b"<!-- c -->"), "report.xlsx", downloads)
+    assert (first, second, third) == ("report.xlsx", "report_2.xlsx", "report_3.xlsx")
+    with zipfile.ZipFile(tmp_path / "report_2.xlsx") as archive:
+        assert archive.read("xl/worksheets/sheet1.xml").endswith(b"<!-- b -->")
+
+
+def test_rejects_non_zip_download(tmp_path, run_dir):
+    source = run_dir / "export.xlsx"
+    source.write_bytes(b"<html>Session expired</html>")
+    with pytest.raises(InvalidWorkbook, match="not a ZIP container"):
+        finalize_workbook(str(source), "report.xlsx", str(tmp_path / "downloads"))
+    assert source.exists()
+    assert not (tmp_path / "downloads").exists()
+
+
+def test_rejects_zip_without_workbook_parts(tmp_path, run_dir):
+    source = run_dir / "export.xlsx"
+    with zipfile.ZipFile(source, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+    with pytest.raises(InvalidWorkbook, match="xl/workbook.xml"):
+        finalize_workbook(str(source), "report.xlsx", str(tmp_path / "downloads"))
+
+
+def test_rejects_truncated_workbook(tmp_path, run_dir):
+    source = run_dir / "export.xlsx"
+    data = open(write_workbook(source), "rb").read()
+    source.write_bytes(data[:len(data) // 2])
+    with pytest.raises(InvalidWorkbook):
+        finalize_workbook(str(source), "report.xlsx", str(tmp_path / "downloads"))
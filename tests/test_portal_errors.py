@@ -0,0 +1,161 @@
+"""Tests for portal_errors: error signatures, page classification and failure reasons"""
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.common.exceptions import WebDriverException
+
+from download_manager import InvalidWorkbook
+from export_fetcher import ExportAuthExpired
+from portal_errors import (
+    ERROR_SIGNATURES,
+    PortalError,
+    _match,
+    classify_failure,
+    detect_portal_error,
+    guarded,
+    retry_delay_minutes,
+)
+from wait_conditions import StepTimeout
+
+
+class FakeDriver:
+    """Answers PAGE_STATE_SCRIPT with a fixed page state"""
+
+    def __init__(self, url="https://portal.example/", title="", alerts="", body="", on_dashboard=False):
+        self.state = [url, title, alerts, body, on_dashboard]
+
+    def execute_script(self, script, *args):
+        return list(self.state)
+
+
+SIGNATURE_SAMPLES = [
+    ("account_locked", "Your account is locked. Contact your administrator."),
+    ("account_locked", "Too many failed sign-in attempts"),
+    ("bad_credentials", "Unable to sign in"),
+    ("bad_credentials", "The password is incorrect"),
+    ("bad_credentials", "Authentication failed"),
+    ("mfa_challenge", "Get a push notification"),
+    ("mfa_challenge", "Enter a code from your authenticator"),
+    ("mfa_challenge", "Select a security method"),
+    ("maintenance", "The site is down for maintenance"),
+    ("maintenance", "503 Service Unavailable"),
+    ("maintenance", "502 Bad Gateway"),
+    ("network_error", "This site can't be reached"),
+    ("network_error", "ERR_NAME_NOT_RESOLVED"),
+    ("network_error", "ERR_CONNECTION_REFUSED"),
+    ("portal_error", "Something went wrong, please try again"),
+    ("portal_error", "500 Internal Server Error"),
+]
+
+
+def test_every_signature_has_a_sample():
+    assert {reason for reason, _ in ERROR_SIGNATURES} == {reason for reason, _ in SIGNATURE_SAMPLES}
+
+
+@pytest.mark.parametrize("reason,text", SIGNATURE_SAMPLES)
+def test_signature_matches(reason, text):
+    matched = _match(text, None)
+    assert matched is not None
+    assert matched[0] == reason
+
+
+def test_match_ignores_ordinary_text():
+    assert _match("Return Signal  Container  Size  Empty returns 42", None) is None
+    assert _match(None, None) is None
+
+
+def test_match_limited_to_reasons():
+    assert _match("Service unavailable", ("portal_error",)) is None
+    assert _match("Service unavailable", ("maintenance",))[0] == "maintenance"
+
+
+def test_detect_checks_body_off_the_dashboard():
+    driver = FakeDriver(body="Sorry, the portal is temporarily unavailable")
+    assert detect_portal_error(driver)[0] == "maintenance"
+
+
+def test_detect_ignores_dashboard_body_text():
+    driver = FakeDriver(body="Notice: the gate API is temporarily unavailable tonight. Enter a code...",
+                        on_dashboard=True)
+    assert detect_portal_error(driver) is None
+
+
+def test_detect_checks_alerts_and_title_on_the_dashboard():
+    assert detect_portal_error(FakeDriver(alerts="Something went wrong", on_dashboard=True))[0] == "portal_error"
+    assert detect_portal_error(FakeDriver(title="502 Bad Gateway", on_dashboard=True))[0] == "maintenance"
+
+
+def test_detect_chrome_error_page():
+    driver = FakeDriver(url="chrome-error://chromewebdata/", title="portal.example")
+    assert detect_portal_error(driver) == ("network_error", "portal.example")
+    assert detect_portal_error(driver, ("maintenance",)) is None
+
+
+def test_detect_script_failure_is_no_error():
+    class BrokenDriver:
+        def execute_script(self, script, *args):
+            raise WebDriverException("no such window")
+
+    assert detect_portal_error(BrokenDriver()) is None
+
+
+def test_guarded_raises_portal_error():
+    predicate = guarded(lambda driver: False, "post_login")
+    with pytest.raises(PortalError) as raised:
+        predicate(FakeDriver(alerts="Invalid credentials"))
+    assert raised.value.reason == "bad_credentials"
+    assert raised.value.phase == "post_login"
+    assert not raised.value.retryable
+
+
+def test_guarded_returns_condition_result():
+    predicate = guarded(lambda driver: "ready")
+    assert predicate(FakeDriver(body="Service unavailable")) == "ready"
+
+
+def test_classify_direct_errors():
+    assert classify_failure(PortalError("maintenance")) == "maintenance"
+    assert classify_failure(StepTimeout("post_login", 30)) == "timeout"
+    assert classify_failure(InvalidWorkbook("truncated")) == "invalid_workbook"
+    assert classify_failure(ExportAuthExpired("401")) == "session_expired"
+    assert classify_failure(WebDriverException("unknown error: net::ERR_CONNECTION_RESET")) == "network_error"
+    assert classify_failure(WebDriverException("chrome not reachable")) == "browser_error"
+    assert classify_failure(ValueError("boom")) == "unknown"
+
+
+def _wrapped(cause, *messages):
+    """cause wrapped in one Exception per message, outermost last (raise ... from ...)"""
+    error = cause
+    for message in messages:
+        try:
+            raise Exception(message) from error
+        except Exception as e:
+            error = e
+    return error
+
+
+def test_classify_follows_cause_chain():
+    assert classify_failure(_wrapped(PortalError("mfa_challenge"), "Could not log in")) == "mfa_challenge"
+    assert classify_failure(_wrapped(StepTimeout("return_signal_table", 30),
+                                     "Could not find Return Signal tab", "Export failed")) == "timeout"
+    assert classify_failure(_wrapped(InvalidWorkbook("not a zip"), "Export failed")) == "invalid_workbook"
+
+
+def _timeout_from(cause):
+    try:
+        raise StepTimeout("download_complete", 60) from cause
+    except StepTimeout as e:
+        return e
+
+
+def test_classify_stops_at_first_typed_error():
+    # A timeout raised while handling a portal error is reported as the timeout
+    assert classify_failure(_wrapped(_timeout_from(PortalError("portal_error")), "Export failed")) == "timeout"
+
+
+def test_retry_delay_minutes():
+    assert retry_delay_minutes("bad_credentials") is None
+    assert retry_delay_minutes("maintenance") == 30
+    assert retry_delay_minutes(None) == retry_delay_minutes("unknown")
+    assert retry_delay_minutes("not_a_reason") == retry_delay_minutes("unknown")
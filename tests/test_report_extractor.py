@@ -0,0 +1,48 @@
+"""Tests for report_extractor.structure_rows"""
+from report_extractor import ACCEPTANCE_KEY, CONTAINER_TYPES, SHIFTS, structure_rows
+
+
+def full_row(terminal, shipping_line, values):
+    return [terminal, shipping_line] + list(values)
+
+
+def test_row_laid_out_like_the_export():
+    values = ["YES", "NO"] + ["DUAL", ""] * (len(CONTAINER_TYPES) - 1)
+    document = structure_rows([full_row("APM", "Maersk", values)], date="2025-11-03")
+    assert document["date"] == "2025-11-03"
+    assert document["key"] == ACCEPTANCE_KEY
+    [entry] = document["data"]
+    assert entry["terminal"] == "APM"
+    assert entry["shipping_line"] == "Maersk"
+    assert list(entry["container_acceptance"]) == CONTAINER_TYPES
+    assert entry["container_acceptance"]["20ST"] == {"Shift 1": "YES", "Shift 2": "NO"}
+    assert entry["container_acceptance"]["Flat"] == {"Shift 1": "DUAL", "Shift 2": ""}
+
+
+def test_values_normalized_to_key_codes():
+    values = [" yes ", "no", "Dual", "n/a", None, 3]
+    entry = structure_rows([full_row(" APM ", " Maersk ", values)])["data"][0]
+    assert entry["terminal"] == "APM"
+    assert entry["shipping_line"] == "Maersk"
+    assert entry["container_acceptance"]["20ST"] == {"Shift 1": "YES", "Shift 2": "NO"}
+    assert entry["container_acceptance"]["40ST"] == {"Shift 1": "DUAL", "Shift 2": ""}
+    assert entry["container_acceptance"]["40HC"] == {"Shift 1": "", "Shift 2": ""}
+
+
+def test_short_rows_padded_with_blanks():
+    entry = structure_rows([["APM", "Maersk", "YES"]])["data"][0]
+    assert entry["container_acceptance"]["20ST"] == {"Shift 1": "YES", "Shift 2": ""}
+    assert all(entry["container_acceptance"][container_type] == {shift: "" for shift in SHIFTS}
+               for container_type in CONTAINER_TYPES[1:])
+
+
+def test_rows_without_terminal_or_line_skipped():
+    rows = [[], ["APM"], ["", "Maersk", "YES"], ["APM", "  ", "YES"], ["TTI", "ONE", "NO"]]
+    document = structure_rows(rows)
+    assert [(entry["terminal"], entry["shipping_line"]) for entry in document["data"]] == [("TTI", "ONE")]
+
+
+def test_default_date_is_today():
+    from datetime import datetime
+
+    assert structure_rows([])["date"] == datetime.now().strftime("%Y-%m-%d")
@@ -0,0 +1,129 @@
+"""Tests for retry_engine: backoff, in-run step retries and persisted retry chains"""
+import pytest
+
+pytest.importorskip("selenium")
+
+import retry_engine
+from portal_errors import PortalError
+from retry_engine import RetryChainStore, backoff_delay, run_step
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(retry_engine.time, "sleep", lambda seconds: None)
+
+
+def test_backoff_doubles_per_attempt():
+    assert [backoff_delay(2, attempt, 100, jitter=0) for attempt in (1, 2, 3, 4)] == [2, 4, 8, 16]
+    assert backoff_delay(2, 0, 100, jitter=0) == 2
+
+
+def test_backoff_capped_at_max_delay():
+    assert backoff_delay(2, 10, 30, jitter=0) == 30
+    for _ in range(50):
+        assert backoff_delay(2, 10, 30, jitter=0.25) <= 30
+
+
+def test_backoff_jitter_range():
+    for _ in range(50):
+        assert 6 <= backoff_delay(2, 3, 100, jitter=0.25) <= 10
+
+
+class FlakyStep:
+    """Fails with the given errors first, then returns "done" """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "done"
+
+
+def test_run_step_returns_first_success():
+    step = FlakyStep()
+    assert run_step("login", step) == "done"
+    assert step.calls == 1
+
+
+def test_run_step_retries_and_recovers():
+    step = FlakyStep(PortalError("portal_error"))
+    recovered = []
+    assert run_step("export", step, attempts=3, recover=lambda: recovered.append(step.calls)) == "done"
+    assert step.calls == 2
+    assert recovered == [1]
+
+
+def test_run_step_raises_when_attempts_run_out():
+    step = FlakyStep(PortalError("portal_error"), PortalError("maintenance"), PortalError("portal_error"))
+    with pytest.raises(PortalError) as raised:
+        run_step("export", step, attempts=2)
+    assert raised.value.reason == "maintenance"
+    assert step.calls == 2
+
+
+def test_run_step_does_not_retry_reasons_needing_a_human():
+    step = FlakyStep(PortalError("bad_credentials"))
+    recovered = []
+    with pytest.raises(PortalError):
+        run_step("login", step, attempts=3, recover=lambda: recovered.append(True))
+    assert step.calls == 1
+    assert recovered == []
+
+
+def test_run_step_retries_when_recover_fails():
+    def broken_recover():
+        raise RuntimeError("dashboard did not load")
+
+    step = FlakyStep(PortalError("portal_error"))
+    assert run_step("export", step, attempts=2, recover=broken_recover) == "done"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RetryChainStore(state_file=str(tmp_path / "retry_state.json"), settings={"max_attempts": 3, "jitter": 0})
+
+
+def test_chain_pending_until_exhausted(store):
+    chain = store.record_failure(["default"], "timeout", "Step timed out")
+    assert chain["status"] == "pending"
+    assert chain["attempts"][0]["retry_in_minutes"] == 5
+    assert store.pending()["chain_id"] == chain["chain_id"]
+
+    chain = store.record_failure(["default"], "timeout", continue_chain=True)
+    assert chain["status"] == "pending"
+    assert chain["attempts"][1]["retry_in_minutes"] == 10
+
+    chain = store.record_failure(["default"], "timeout", continue_chain=True)
+    assert chain["status"] == "exhausted"
+    assert len(chain["attempts"]) == 3
+    assert store.pending() is None
+    assert store.stats()["recent"][-1]["status"] == "exhausted"
+
+
+def test_new_run_supersedes_active_chain(store):
+    first = store.record_failure(["default"], "timeout")
+    second = store.record_failure(["default"], "network_error")
+    assert second["chain_id"] != first["chain_id"]
+    assert len(second["attempts"]) == 1
+    assert store.stats()["recent"][-1]["chain_id"] == first["chain_id"]
+    assert store.stats()["recent"][-1]["status"] == "superseded"
+
+
+def test_chain_abandoned_for_reasons_needing_a_human(store):
+    store.record_failure(["default"], "timeout")
+    chain = store.record_failure(["default"], "bad_credentials", continue_chain=True)
+    assert chain["status"] == "abandoned"
+    assert store.pending() is None
+    assert [c["status"] for c in store.stats()["recent"]] == ["abandoned"]
+
+
+def test_chain_survives_a_restart(store):
+    chain = store.record_failure(["default"], "maintenance")
+    reloaded = RetryChainStore(state_file=store.state_file, settings={"max_attempts": 3})
+    assert reloaded.pending()["chain_id"] == chain["chain_id"]
+    assert reloaded.record_success()["status"] == "succeeded"
+    assert reloaded.pending() is None
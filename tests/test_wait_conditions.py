@@ -0,0 +1,75 @@
+"""Tests for wait_conditions.download_finalized"""
+import pytest
+
+pytest.importorskip("selenium")
+
+import wait_conditions
+from wait_conditions import download_finalized
+
+
+class Clock:
+    """Stands in for time.monotonic so stability windows pass without sleeping"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(wait_conditions.time, "monotonic", clock)
+    return clock
+
+
+def test_empty_or_missing_directory(tmp_path, clock):
+    assert download_finalized(str(tmp_path))(None) is False
+    assert download_finalized(str(tmp_path / "missing"))(None) is False
+
+
+def test_file_returned_once_size_is_stable(tmp_path, clock):
+    path = tmp_path / "export.xlsx"
+    path.write_bytes(b"x" * 10)
+    ready = download_finalized(str(tmp_path), stable_seconds=1.0)
+    assert ready(None) is False
+    clock.now += 0.5
+    assert ready(None) is False
+    clock.now += 0.5
+    assert ready(None) == str(path)
+
+
+def test_growing_file_restarts_the_window(tmp_path, clock):
+    path = tmp_path / "export.xlsx"
+    path.write_bytes(b"x" * 10)
+    ready = download_finalized(str(tmp_path), stable_seconds=1.0)
+    assert ready(None) is False
+    clock.now += 0.8
+    path.write_bytes(b"x" * 20)
+    assert ready(None) is False
+    clock.now += 0.8
+    assert ready(None) is False
+    clock.now += 0.2
+    assert ready(None) == str(path)
+
+
+@pytest.mark.parametrize("partial", ["export.xlsx.crdownload", "export.xlsx.tmp"])
+def test_waits_while_a_partial_file_remains(tmp_path, clock, partial):
+    (tmp_path / "export.xlsx").write_bytes(b"x" * 10)
+    (tmp_path / partial).write_bytes(b"x" * 5)
+    ready = download_finalized(str(tmp_path), stable_seconds=0)
+    assert ready(None) is False
+    clock.now += 5
+    assert ready(None) is False
+    (tmp_path / partial).unlink()
+    assert ready(None) is False
+    assert ready(None) == str(tmp_path / "export.xlsx")
+
+
+def test_empty_file_is_never_finalized(tmp_path, clock):
+    (tmp_path / "export.xlsx").write_bytes(b"")
+    ready = download_finalized(str(tmp_path), stable_seconds=0)
+    for _ in range(3):
+        clock.now += 5
+        assert ready(None) is False
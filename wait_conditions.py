@@ -0,0 +1,251 @@
+"""
+Readiness conditions for the PortOptimizer automation
+
+Instead of sleeping a fixed number of seconds after every click, each step of
+the scrape waits on a predicate (element present, network idle, URL change,
+tab selected, table rows rendered, download started) with its own timeout budget. The
+PhaseTimer records how long every phase actually waited so slow steps show up
+in the logs.
+"""
+import os
+import time
+from datetime import datetime
+
+from selenium.common.exceptions import (
+    ElementNotInteractableException,
+    InvalidElementStateException,
+    JavascriptException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from system_settings import SystemSettings
+
+
+# Default per-step timeout budgets in seconds (overridable via system settings)
+DEFAULT_STEP_TIMEOUTS = SystemSettings.DEFAULT_SETTINGS["wait_timeouts"]
+
+# File suffixes Chrome uses while a download is still in progress
+PARTIAL_DOWNLOAD_SUFFIXES = ('.crdownload', '.tmp', '.part')
+
+
+class StepTimeout(Exception):
+    """Raised when a readiness condition is not met within its step budget"""
+
+    def __init__(self, phase, timeout):
+        self.phase = phase
+        self.timeout = timeout
+        super().__init__(f"Step '{phase}' not ready after {timeout}s")
+
+
+def element_present(by, locator):
+    """Element exists in the DOM (returns the element)"""
+    def _predicate(driver):
+        elements = driver.find_elements(by, locator)
+        return elements[0] if elements else False
+    return _predicate
+
+
+def element_clickable(by, locator):
+    """Element is visible and enabled (returns the element)"""
+    return EC.element_to_be_clickable((by, locator))
+
+
+def network_idle(idle_ms=500):
+    """
+    Page has finished loading and no resource request has completed for idle_ms.
+    Uses the Resource Timing API so it also covers XHR/fetch calls made by the app.
+    """
+    script = """
+        var entries = performance.getEntriesByType('resource');
+        var lastEnd = 0;
+        for (var i = 0; i < entries.length; i++) {
+            if (entries[i].responseEnd > lastEnd) { lastEnd = entries[i].responseEnd; }
+        }
+        return {ready: document.readyState, idle: performance.now() - lastEnd};
+    """
+
+    def _predicate(driver):
+        state = driver.execute_script(script)
+        return state["ready"] == "complete" and state["idle"] >= idle_ms
+    return _predicate
+
+
+def url_changed(previous_url):
+    """Browser navigated away from previous_url (returns the new URL)"""
+    def _predicate(driver):
+        current = driver.current_url
+        return current if current != previous_url else False
+    return _predicate
+
+
+def tab_selected(by, locator):
+    """Material tab is the active one (aria-selected or mdc-tab--active)"""
+    def _predicate(driver):
+        tab = driver.find_element(by, locator)
+        if tab.get_attribute("aria-selected") == "true":
+            return True
+        return "mdc-tab--active" in (tab.get_attribute("class") or "")
+    return _predicate
+
+
+def table_rows_rendered(min_rows=1, row_selector="table tbody tr, mat-row, [role='row']"):
+    """At least min_rows table rows are rendered (returns the row count)"""
+    script = "return document.querySelectorAll(arguments[0]).length;"
+
+    def _predicate(driver):
+        count = driver.execute_script(script, row_selector)
+        return count if count >= min_rows else False
+    return _predicate
+
+
+def list_download_dir(download_dir):
+    """Snapshot of file names currently in the download directory"""
+    if not os.path.exists(download_dir):
+        return set()
+    return set(os.listdir(download_dir))
+
+
+def download_started(download_dir, existing_files):
+    """A new file (partial or finished) appeared in download_dir (returns its name)"""
+    def _predicate(driver):
+        new_files = list_download_dir(download_dir) - set(existing_files)
+        return sorted(new_files)[0] if new_files else False
+    return _predicate
+
+
+def download_finalized(download_dir, stable_seconds=1.0):
+    """
+    Exactly one finished file exists in a per-run download_dir: no partial
+    (.crdownload/.tmp) files remain and its size has not changed for
+    stable_seconds. Returns the file path.
+    """
+    state = {"name": None, "size": -1, "since": None}
+
+    def _predicate(driver):
+        names = list_download_dir(download_dir)
+        if not names or any(name.endswith(PARTIAL_DOWNLOAD_SUFFIXES) for name in names):
+            state["name"] = None
+            return False
+        name = sorted(names)[0]
+        path = os.path.join(download_dir, name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        now = time.monotonic()
+        if name != state["name"] or size != state["size"] or size == 0:
+            state.update(name=name, size=size, since=now)
+            return False
+        return path if now - state["since"] >= stable_seconds else False
+    return _predicate
+
+
+def first_of(conditions):
+    """
+    Whichever of several named conditions is met first.
+    conditions: dict of name -> predicate. Returns (name, value) of the first
+    truthy predicate, checked in insertion order.
+    """
+    def _predicate(driver):
+        for name, condition in conditions.items():
+            try:
+                value = condition(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                value = False
+            if value:
+                return name, value
+        return False
+    return _predicate
+
+
+class PhaseTimer:
+    """Waits on readiness conditions and records how long each phase took"""
+
+    # Element-level errors mean "not ready yet" and are polled through. Session and
+    # connection errors (browser crashed, window closed) fail the step at once.
+    IGNORED_EXCEPTIONS = (
+        NoSuchElementException,
+        StaleElementReferenceException,
+        ElementNotInteractableException,
+        InvalidElementStateException,
+        JavascriptException,
+    )
+
+    def __init__(self, timeouts=None, poll_frequency=0.25):
+        self.timeouts = dict(DEFAULT_STEP_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.poll_frequency = poll_frequency
+        self.phases = []
+        # Export currently being worked on when one session walks several tabs
+        self.label = None
+        # Browser CPU seconds / peak RSS for the run, filled in by the automation
+        self.resource_usage = None
+        # Typed reason of the run's failure (see portal_errors.RETRY_POLICY), if it failed
+        self.failure_reason = None
+
+    def budget(self, phase, default=30):
+        """Timeout budget for a phase in seconds"""
+        return self.timeouts.get(phase, default)
+
+    def wait(self, driver, phase, condition, timeout=None, optional=False):
+        """
+        Poll condition until it returns a truthy value or the phase budget runs out.
+        Returns the condition's value. Raises StepTimeout unless optional=True,
+        in which case None is returned on timeout.
+        """
+        timeout = self.budget(phase) if timeout is None else timeout
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(
+                driver,
+                timeout,
+                poll_frequency=self.poll_frequency,
+                ignored_exceptions=self.IGNORED_EXCEPTIONS,
+            ).until(condition)
+        except TimeoutException:
+            waited = time.monotonic() - start
+            self._record(phase, waited, timeout, timed_out=True)
+            if optional:
+                print(f"[{datetime.now()}] Phase '{phase}' not ready after {waited:.1f}s (optional, continuing)")
+                return None
+            print(f"[{datetime.now()}] Phase '{phase}' timed out after {waited:.1f}s")
+            raise StepTimeout(phase, timeout)
+        except Exception as e:
+            # A guarded condition spotted an error state: record the early abort
+            waited = time.monotonic() - start
+            self._record(phase, waited, timeout, timed_out=False, aborted=str(e))
+            print(f"[{datetime.now()}] Phase '{phase}' aborted after {waited:.1f}s: {str(e)}")
+            raise
+
+        waited = time.monotonic() - start
+        self._record(phase, waited, timeout, timed_out=False)
+        print(f"[{datetime.now()}] Phase '{phase}' ready after {waited:.1f}s (budget {timeout}s)")
+        return result
+
+    def _record(self, phase, waited, timeout, timed_out, aborted=None):
+        entry = {
+            "phase": phase,
+            "waited_seconds": round(waited, 3),
+            "budget_seconds": timeout,
+            "timed_out": timed_out,
+            "label": self.label,
+        }
+        if aborted:
+            entry["aborted"] = aborted
+        self.phases.append(entry)
+
+    def summary(self):
+        """Dictionary of phase name (prefixed with its export label, if any) -> seconds waited"""
+        return {
+            (f"{entry['label']}/{entry['phase']}" if entry.get("label") else entry["phase"]): entry["waited_seconds"]
+            for entry in self.phases
+        }
+
+    def total_waited(self):
+        """Total seconds spent waiting across all phases"""
+        return round(sum(entry["waited_seconds"] for entry in self.phases), 3)